@@ -0,0 +1,391 @@
+"""
+Motor alternativo de bitboards para o chess_new
+
+Doze bitboards de 64 bits (um por cor e tipo de peça, indexados pelo mesmo
+código inteiro do Board), ocupação por cor e tabelas de ataque
+pré-calculadas (cavalo, rei, peão, BETWEEN e LINE vêm de geometry.py).
+As peças deslizantes usam tabelas por linha (fileira, coluna, diagonal e
+antidiagonal) indexadas pela ocupação mascarada da linha, no espírito dos
+"rotated bitboards", com um dict fazendo o papel do hash mágico.
+
+A BitBoard mantém o bytearray do Board sincronizado, então o ChessGame e a
+IA rodam sobre ela sem mudanças:
+
+    game = ChessGame(board_backend='bitboard')
+
+perft() usa um gerador legal próprio (xeques, cravadas e máscara de
+evasão) com cópia dos bitboards a cada lance.
+"""
+
+from typing import List
+
+from chess_new import (
+    Board, Color, COLOR_BITS, EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    BLACK_BIT, TYPE_MASK,
+    QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EN_PASSANT_CAPTURE, PROMOTION, PROMOTION_FLAGS,
+)
+from geometry import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE
+
+FULL = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+
+# Direitos de roque usados pelo perft
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+
+def squares_of(bitboard: int):
+    """Itera os índices das casas ligadas no bitboard (do menor para o maior)"""
+    while bitboard:
+        low = bitboard & -bitboard
+        yield low.bit_length() - 1
+        bitboard ^= low
+
+
+def _ray(square: int, dx: int, dy: int, occupancy: int = 0) -> int:
+    """Casas a partir de square na direção (dx, dy), parando no primeiro bloqueio"""
+    x, y = square % 8 + dx, square // 8 + dy
+    ray = 0
+    while 0 <= x < 8 and 0 <= y < 8:
+        bit = 1 << (y * 8 + x)
+        ray |= bit
+        if occupancy & bit:
+            break
+        x += dx
+        y += dy
+    return ray
+
+
+def _line_tables(dx: int, dy: int):
+    """Máscara relevante e tabela ocupação->ataques de uma linha para cada casa"""
+    masks = []
+    tables = []
+    for square in range(64):
+        mask = 0
+        for sx, sy in ((dx, dy), (-dx, -dy)):
+            ray = _ray(square, sx, sy)
+            # A última casa do raio nunca muda o ataque: fica fora da máscara
+            if ray:
+                last = ray & -ray if sy * 8 + sx < 0 else 1 << (ray.bit_length() - 1)
+                mask |= ray ^ last
+        table = {}
+        subset = 0
+        while True:
+            table[subset] = _ray(square, dx, dy, subset) | _ray(square, -dx, -dy, subset)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+RANK_MASKS, RANK_TABLES = _line_tables(1, 0)
+FILE_MASKS, FILE_TABLES = _line_tables(0, 1)
+DIAGONAL_MASKS, DIAGONAL_TABLES = _line_tables(1, 1)
+ANTIDIAGONAL_MASKS, ANTIDIAGONAL_TABLES = _line_tables(1, -1)
+
+# Máscara aplicada aos direitos de roque quando um lance sai de/chega a uma casa
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[60] = 15 ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[63] = 15 ^ WHITE_KINGSIDE
+CASTLING_MASK[56] = 15 ^ WHITE_QUEENSIDE
+CASTLING_MASK[4] = 15 ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[7] = 15 ^ BLACK_KINGSIDE
+CASTLING_MASK[0] = 15 ^ BLACK_QUEENSIDE
+
+
+def rook_attacks(square: int, occupancy: int) -> int:
+    return (RANK_TABLES[square][occupancy & RANK_MASKS[square]]
+            | FILE_TABLES[square][occupancy & FILE_MASKS[square]])
+
+
+def bishop_attacks(square: int, occupancy: int) -> int:
+    return (DIAGONAL_TABLES[square][occupancy & DIAGONAL_MASKS[square]]
+            | ANTIDIAGONAL_TABLES[square][occupancy & ANTIDIAGONAL_MASKS[square]])
+
+
+def attackers(bitboards, square: int, side: int, occupancy: int) -> int:
+    """Bitboard das peças do lado side (0 brancas, 1 pretas) que atacam square"""
+    color_bit = side << 3
+    rooks = bitboards[ROOK | color_bit] | bitboards[QUEEN | color_bit]
+    bishops = bitboards[BISHOP | color_bit] | bitboards[QUEEN | color_bit]
+    return ((KNIGHT_ATTACKS[square] & bitboards[KNIGHT | color_bit])
+            | (KING_ATTACKS[square] & bitboards[KING | color_bit])
+            | (PAWN_ATTACKS[side ^ 1][square] & bitboards[PAWN | color_bit])
+            | (rook_attacks(square, occupancy) & rooks)
+            | (bishop_attacks(square, occupancy) & bishops))
+
+
+def _add_pawn_move(moves, origin: int, target: int, flags: int):
+    # Chegando na última fileira gera as quatro promoções
+    if target < 8 or target >= 56:
+        for promotion in PROMOTION_FLAGS:
+            moves.append(origin | target << 6 | (promotion | flags) << 12)
+    else:
+        moves.append(origin | target << 6 | flags << 12)
+
+
+def legal_moves(bitboards, occupancy, side: int, castling: int, en_passant: int):
+    """Lances legais no mesmo formato compactado do Board (origem | destino << 6 | flags << 12)"""
+    color_bit = side << 3
+    own = occupancy[side]
+    enemy = occupancy[side ^ 1]
+    occupied = own | enemy
+    king = bitboards[KING | color_bit].bit_length() - 1
+    enemy_bit = color_bit ^ BLACK_BIT
+    enemy_rooks = bitboards[ROOK | enemy_bit] | bitboards[QUEEN | enemy_bit]
+    enemy_bishops = bitboards[BISHOP | enemy_bit] | bitboards[QUEEN | enemy_bit]
+    moves = []
+
+    checkers = attackers(bitboards, king, side ^ 1, occupied)
+
+    # Cravadas: atacantes deslizantes vistos do rei atravessando as nossas peças
+    pinned = 0
+    snipers = (rook_attacks(king, enemy) & enemy_rooks) | (bishop_attacks(king, enemy) & enemy_bishops)
+    for sniper in squares_of(snipers):
+        blockers = BETWEEN[king][sniper] & occupied
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            pinned |= blockers
+
+    # Lances do rei: o próprio rei sai da ocupação para enxergar através dele
+    without_king = occupied ^ (1 << king)
+    for target in squares_of(KING_ATTACKS[king] & ~own):
+        if not attackers(bitboards, target, side ^ 1, without_king):
+            moves.append(king | target << 6 | (CAPTURE if enemy >> target & 1 else QUIET) << 12)
+
+    if checkers & (checkers - 1):
+        return moves  # Xeque duplo: só o rei se move
+
+    if checkers:
+        evasion = checkers | BETWEEN[king][checkers.bit_length() - 1]
+    else:
+        evasion = FULL
+        if side == 0:
+            if (castling & WHITE_KINGSIDE and not occupied & 0x6000000000000000
+                    and not attackers(bitboards, 61, 1, occupied) and not attackers(bitboards, 62, 1, occupied)):
+                moves.append(60 | 62 << 6 | KING_CASTLE << 12)
+            if (castling & WHITE_QUEENSIDE and not occupied & 0x0E00000000000000
+                    and not attackers(bitboards, 59, 1, occupied) and not attackers(bitboards, 58, 1, occupied)):
+                moves.append(60 | 58 << 6 | QUEEN_CASTLE << 12)
+        else:
+            if (castling & BLACK_KINGSIDE and not occupied & 0x60
+                    and not attackers(bitboards, 5, 0, occupied) and not attackers(bitboards, 6, 0, occupied)):
+                moves.append(4 | 6 << 6 | KING_CASTLE << 12)
+            if (castling & BLACK_QUEENSIDE and not occupied & 0x0E
+                    and not attackers(bitboards, 3, 0, occupied) and not attackers(bitboards, 2, 0, occupied)):
+                moves.append(4 | 2 << 6 | QUEEN_CASTLE << 12)
+
+    targets = ~own & evasion
+    line = LINE[king]
+
+    for origin in squares_of(bitboards[KNIGHT | color_bit] & ~pinned):
+        for target in squares_of(KNIGHT_ATTACKS[origin] & targets):
+            moves.append(origin | target << 6 | (CAPTURE if enemy >> target & 1 else QUIET) << 12)
+
+    queens = bitboards[QUEEN | color_bit]
+    for sliders, attack in ((bitboards[BISHOP | color_bit] | queens, bishop_attacks),
+                            (bitboards[ROOK | color_bit] | queens, rook_attacks)):
+        for origin in squares_of(sliders):
+            reach = attack(origin, occupied) & targets
+            if pinned >> origin & 1:
+                reach &= line[origin]
+            for target in squares_of(reach):
+                moves.append(origin | target << 6 | (CAPTURE if enemy >> target & 1 else QUIET) << 12)
+
+    step = 8 if side else -8
+    start_rank = 1 if side else 6
+    pawn_attacks = PAWN_ATTACKS[side]
+    for origin in squares_of(bitboards[PAWN | color_bit]):
+        allowed = targets & line[origin] if pinned >> origin & 1 else targets
+        forward = origin + step
+        if not occupied >> forward & 1:
+            if allowed >> forward & 1:
+                _add_pawn_move(moves, origin, forward, QUIET)
+            double = forward + step
+            if origin >> 3 == start_rank and not occupied >> double & 1 and allowed >> double & 1:
+                moves.append(origin | double << 6 | DOUBLE_PUSH << 12)
+        for target in squares_of(pawn_attacks[origin] & enemy & allowed):
+            _add_pawn_move(moves, origin, target, CAPTURE)
+        if en_passant >= 0 and pawn_attacks[origin] >> en_passant & 1:
+            # En passant tira duas peças da linha do rei: teste completo
+            captured = en_passant - step
+            after = occupied ^ (1 << origin) ^ (1 << captured) | (1 << en_passant)
+            enemy_pawns = bitboards[PAWN | enemy_bit] ^ (1 << captured)
+            if not ((rook_attacks(king, after) & enemy_rooks)
+                    or (bishop_attacks(king, after) & enemy_bishops)
+                    or (KNIGHT_ATTACKS[king] & bitboards[KNIGHT | enemy_bit])
+                    or (PAWN_ATTACKS[side][king] & enemy_pawns)):
+                moves.append(origin | en_passant << 6 | EN_PASSANT_CAPTURE << 12)
+
+    return moves
+
+
+def play(bitboards, occupancy, squares, side: int, castling: int, en_passant: int, move: int):
+    """Aplica o lance em cópias do estado e devolve o novo estado"""
+    origin = move & 63
+    target = move >> 6 & 63
+    flags = move >> 12
+    bitboards = bitboards[:]
+    occupancy = occupancy[:]
+    squares = bytearray(squares)
+
+    code = squares[origin]
+    captured = squares[target]
+    moved = (1 << origin) | (1 << target)
+    bitboards[code] ^= moved
+    occupancy[side] ^= moved
+    if captured:
+        bitboards[captured] ^= 1 << target
+        occupancy[side ^ 1] ^= 1 << target
+    squares[origin] = EMPTY
+    squares[target] = code
+
+    new_en_passant = -1
+    if flags == EN_PASSANT_CAPTURE:
+        removed = target + 8 if side == 0 else target - 8
+        bitboards[squares[removed]] ^= 1 << removed
+        occupancy[side ^ 1] ^= 1 << removed
+        squares[removed] = EMPTY
+    elif flags == DOUBLE_PUSH:
+        new_en_passant = (origin + target) // 2
+    elif flags & PROMOTION:
+        promoted = KNIGHT + (flags & 3) | (side << 3)
+        bitboards[code] ^= 1 << target
+        bitboards[promoted] |= 1 << target
+        squares[target] = promoted
+    elif flags == KING_CASTLE or flags == QUEEN_CASTLE:
+        rook_from, rook_to = (origin + 3, origin + 1) if flags == KING_CASTLE else (origin - 4, origin - 1)
+        rook = squares[rook_from]
+        rook_moved = (1 << rook_from) | (1 << rook_to)
+        bitboards[rook] ^= rook_moved
+        occupancy[side] ^= rook_moved
+        squares[rook_from] = EMPTY
+        squares[rook_to] = rook
+
+    castling &= CASTLING_MASK[origin] & CASTLING_MASK[target]
+    return bitboards, occupancy, squares, side ^ 1, castling, new_en_passant
+
+
+def _perft(bitboards, occupancy, squares, side, castling, en_passant, depth: int) -> int:
+    moves = legal_moves(bitboards, occupancy, side, castling, en_passant)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        nodes += _perft(*play(bitboards, occupancy, squares, side, castling, en_passant, move), depth - 1)
+    return nodes
+
+
+class BitBoard(Board):
+    """Board com bitboards por peça mantidos em sincronia com o bytearray"""
+
+    def index_pieces(self):
+        super().index_pieces()
+        self.bitboards = [0] * 16
+        self.occupancy = [0, 0]
+        for square, code in enumerate(self.squares):
+            if code:
+                self.bitboards[code] |= 1 << square
+                self.occupancy[code >> 3] |= 1 << square
+
+    def put(self, square: int, code: int):
+        old = self.squares[square]
+        if old != code:
+            bit = 1 << square
+            if old:
+                self.bitboards[old] ^= bit
+                self.occupancy[old >> 3] ^= bit
+            if code:
+                self.bitboards[code] ^= bit
+                self.occupancy[code >> 3] ^= bit
+            Board.put(self, square, code)
+
+    def copy(self) -> 'BitBoard':
+        board = super().copy()
+        board.bitboards = list(self.bitboards)
+        board.occupancy = list(self.occupancy)
+        return board
+
+    def pseudo_targets(self, square: int, en_passant: int = -1) -> List[int]:
+        code = self.squares[square]
+        if not code:
+            return []
+        side = code >> 3
+        own = self.occupancy[side]
+        occupied = own | self.occupancy[side ^ 1]
+        piece_code = code & TYPE_MASK
+        if piece_code == PAWN:
+            targets = PAWN_ATTACKS[side][square] & self.occupancy[side ^ 1]
+            if en_passant >= 0:
+                targets |= PAWN_ATTACKS[side][square] & (1 << en_passant)
+            step = 8 if side else -8
+            forward = square + step
+            if 0 <= forward < 64 and not occupied >> forward & 1:
+                targets |= 1 << forward
+                if square >> 3 == (1 if side else 6) and not occupied >> (forward + step) & 1:
+                    targets |= 1 << (forward + step)
+        elif piece_code == KNIGHT:
+            targets = KNIGHT_ATTACKS[square] & ~own
+        elif piece_code == BISHOP:
+            targets = bishop_attacks(square, occupied) & ~own
+        elif piece_code == ROOK:
+            targets = rook_attacks(square, occupied) & ~own
+        elif piece_code == QUEEN:
+            targets = (rook_attacks(square, occupied) | bishop_attacks(square, occupied)) & ~own
+        else:
+            targets = KING_ATTACKS[square] & ~own
+        return list(squares_of(targets))
+
+    def capture_targets(self, square: int) -> List[int]:
+        code = self.squares[square]
+        side = code >> 3
+        enemy = self.occupancy[side ^ 1]
+        occupied = enemy | self.occupancy[side]
+        piece_code = code & TYPE_MASK
+        if piece_code == PAWN:
+            targets = PAWN_ATTACKS[side][square] & enemy
+            forward = square + (8 if side else -8)
+            if (forward < 8 or forward >= 56) and not occupied >> forward & 1:
+                targets |= 1 << forward
+        elif piece_code == KNIGHT:
+            targets = KNIGHT_ATTACKS[square] & enemy
+        elif piece_code == BISHOP:
+            targets = bishop_attacks(square, occupied) & enemy
+        elif piece_code == ROOK:
+            targets = rook_attacks(square, occupied) & enemy
+        elif piece_code == QUEEN:
+            targets = (rook_attacks(square, occupied) | bishop_attacks(square, occupied)) & enemy
+        else:
+            targets = KING_ATTACKS[square] & enemy
+        return list(squares_of(targets))
+
+    def square_attacked(self, square: int, color_bit: int) -> bool:
+        occupied = self.occupancy[0] | self.occupancy[1]
+        return attackers(self.bitboards, square, color_bit >> 3, occupied) != 0
+
+    def attackers_of(self, square: int, color: Color) -> List[int]:
+        occupied = self.occupancy[0] | self.occupancy[1]
+        return list(squares_of(attackers(self.bitboards, square, COLOR_BITS[color] >> 3, occupied)))
+
+    def castling_rights(self) -> int:
+        rights = 0
+        squares = self.squares
+        if not self.white_king_moved and squares[60] == KING:
+            if not self.white_rook_h_moved and squares[63] == ROOK:
+                rights |= WHITE_KINGSIDE
+            if not self.white_rook_a_moved and squares[56] == ROOK:
+                rights |= WHITE_QUEENSIDE
+        if not self.black_king_moved and squares[4] == KING | BLACK_BIT:
+            if not self.black_rook_h_moved and squares[7] == ROOK | BLACK_BIT:
+                rights |= BLACK_KINGSIDE
+            if not self.black_rook_a_moved and squares[0] == ROOK | BLACK_BIT:
+                rights |= BLACK_QUEENSIDE
+        return rights
+
+    def perft(self, depth: int) -> int:
+        """Conta as folhas da árvore de lances legais até a profundidade dada"""
+        if depth <= 0:
+            return 1
+        return _perft(self.bitboards, self.occupancy, self.squares, self.turn >> 3,
+                      self.castling_rights(), self.en_passant, depth)
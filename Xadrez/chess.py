@@ -1,6 +1,8 @@
 import os
 import pygame as pg
 
+from geometry import KNIGHT_TARGETS, KING_TARGETS, PAWN_CAPTURES, RAYS, ROOK_RAYS, BISHOP_RAYS
+
 
 class Chess:
     def __init__(self):
@@ -30,7 +32,7 @@ class Chess:
 
         # Move history / undo
         self.move_history = []          # list of move strings
-        self.state_history = []         # list of board snapshots for undo
+        self.state_history = []         # list of move deltas for undo (changed squares + flags)
 
         # Sounds (optional). Put wav files in Xadrez/sounds: move.wav, check.wav, mate.wav
         self.sounds = {'move': None, 'check': None, 'mate': None}
@@ -381,9 +383,14 @@ class Chess:
             moved_piece = self.board_map[last_y][last_x]
             # Move or capture
             if self.actions_board_map[y][x] == '.' or self.actions_board_map[y][x] == 'o':
-                # save snapshot for undo
+                # save a delta for undo: only the squares this move can touch
+                touched = [(last_x, last_y), (x, y)]
+                if moved_piece[2:5] == 'pw' and last_x != x:
+                    touched.append((x, last_y))  # en passant victim
+                if moved_piece[2:5] == 'kg' and abs(x - last_x) == 2:
+                    touched.extend((col, y) for col in range(8))  # castling rook
                 snapshot = {
-                    'board_map': [row[:] for row in self.board_map],
+                    'squares': [(xx, yy, self.board_map[yy][xx]) for xx, yy in touched],
                     'player_turn': self.player_turn,
                     'en_passant': None if self.en_passant is None else list(self.en_passant),
                     'white_castling_movement_condition': list(self.white_castling_movement_condition),
@@ -612,7 +619,8 @@ class Chess:
         if not self.state_history:
             return
         snapshot = self.state_history.pop()
-        self.board_map = [row[:] for row in snapshot['board_map']]
+        for x, y, piece in reversed(snapshot['squares']):
+            self.board_map[y][x] = piece
         self.player_turn = snapshot['player_turn']
         self.en_passant = None if snapshot['en_passant'] is None else list(snapshot['en_passant'])
         self.white_castling_movement_condition = list(snapshot['white_castling_movement_condition'])
@@ -827,177 +835,52 @@ class Chess:
                     elif self.player_turn == 'black' and self.board_map[y][x][0:1] == 'b':
                         direction[7] = self.piece_path(direction[7], 'w', -move, -move)
 
-    def is_opposing_piece_checking_the_king(self, path, opposing_piece, x, y, step_x, step_y):
-        if x + step_x <= -1 or y + step_y <= -1:
-            return False, False
-        elif x + step_x >= 8 or y + step_y >= 8:
-            return False, False
-
-        if  opposing_piece[0:1] == 'w':
-            king = 'b_kg'
-        else:
-            king = 'w_kg'
-
-        if path:
-            if self.board_map[y+step_y][x+step_x] == opposing_piece:
-                return False, True
-            elif self.board_map[y+step_y][x+step_x] == king:
-                return True, False
-            elif self.board_map[y+step_y][x+step_x] == '':
-                return True, False
-            elif self.board_map[y+step_y][x+step_x] != '':
-                return False, False
-        else:
-            return False, False
+    def is_slider_checking_the_king(self, opposing_piece, x, y, rays):
+        # Percorre os raios pré-calculados a partir da casa; o rei atacado não bloqueia
+        if not (0 <= x < 8 and 0 <= y < 8):
+            return False
+        king = 'b_kg' if opposing_piece[0:1] == 'w' else 'w_kg'
+        for ray in rays[y * 8 + x]:
+            for square in ray:
+                piece = self.board_map[square >> 3][square & 7]
+                if piece == opposing_piece:
+                    return True
+                if piece != '' and piece != king:
+                    break
+        return False
 
     def is_bishop_checking_the_king(self, opposing_piece, x, y):
-        check = [False, False, False, False]
-        final_check = False
-        direction = [True, True, True, True]
-        for move in range(1, 8):
-            direction[0], check_pivot = self.is_opposing_piece_checking_the_king(direction[0], opposing_piece+'_bs', x, y, move, -move)
-            if direction[0] == False and check_pivot == True:
-                check[0] = True
-            direction[1], check_pivot = self.is_opposing_piece_checking_the_king(direction[1], opposing_piece+'_bs', x, y, move, move)
-            if direction[1] == False and check_pivot == True:
-                check[1] = True
-            direction[2], check_pivot = self.is_opposing_piece_checking_the_king(direction[2], opposing_piece+'_bs', x, y, -move, move)
-            if direction[2] == False and check_pivot == True:
-                check[2] = True
-            direction[3], check_pivot = self.is_opposing_piece_checking_the_king(direction[3], opposing_piece+'_bs', x, y, -move, -move)
-            if direction[3] == False and check_pivot == True:
-                check[3] = True
-        if check[0] == True or check[2] == True:
-            final_check = True
-        elif check[1] == True or check[3] == True:
-            final_check = True
-        return final_check
+        return self.is_slider_checking_the_king(opposing_piece+'_bs', x, y, BISHOP_RAYS)
 
     def is_rook_checking_the_king(self, opposing_piece, x, y):
-        check = [False, False, False, False]
-        final_check = False
-        direction = [True, True, True, True]
-        for move in range(1, 8):
-            direction[0], check_pivot = self.is_opposing_piece_checking_the_king(direction[0], opposing_piece+'_rk', x, y, 0, -move)
-            if direction[0] == False and check_pivot == True:
-                check[0] = True
-            direction[1], check_pivot = self.is_opposing_piece_checking_the_king(direction[1], opposing_piece+'_rk', x, y, move, 0)
-            if direction[1] == False and check_pivot == True:
-                check[1] = True
-            direction[2], check_pivot = self.is_opposing_piece_checking_the_king(direction[2], opposing_piece+'_rk', x, y, 0, move)
-            if direction[2] == False and check_pivot == True:
-                check[2] = True
-            direction[3], check_pivot = self.is_opposing_piece_checking_the_king(direction[3], opposing_piece+'_rk', x, y, -move, 0)
-            if direction[3] == False and check_pivot == True:
-                check[3] = True
-        if check[0] == True or check[2] == True:
-            final_check = True
-        elif check[1] == True or check[3] == True:
-            final_check = True
-        return final_check
+        return self.is_slider_checking_the_king(opposing_piece+'_rk', x, y, ROOK_RAYS)
 
     def is_queen_checking_the_king(self, opposing_piece, x, y):
-        check = [False, False, False, False, False, False, False, False]
-        final_check = False
-        direction = [True, True, True, True, True, True, True, True]
-        for move in range(1, 8):
-            direction[0], check_pivot = self.is_opposing_piece_checking_the_king(direction[0], opposing_piece+'_qn', x, y, 0, -move)
-            if direction[0] == False and check_pivot == True:
-                check[0] = True
-            direction[1], check_pivot = self.is_opposing_piece_checking_the_king(direction[1], opposing_piece+'_qn', x, y, move, 0)
-            if direction[1] == False and check_pivot == True:
-                check[1] = True
-            direction[2], check_pivot = self.is_opposing_piece_checking_the_king(direction[2], opposing_piece+'_qn', x, y, 0, move)
-            if direction[2] == False and check_pivot == True:
-                check[2] = True
-            direction[3], check_pivot = self.is_opposing_piece_checking_the_king(direction[3], opposing_piece+'_qn', x, y, -move, 0)
-            if direction[3] == False and check_pivot == True:
-                check[3] = True
-            direction[4], check_pivot = self.is_opposing_piece_checking_the_king(direction[4], opposing_piece+'_qn', x, y, move, -move)
-            if direction[4] == False and check_pivot == True:
-                check[4] = True
-            direction[5], check_pivot = self.is_opposing_piece_checking_the_king(direction[5], opposing_piece+'_qn', x, y, move, move)
-            if direction[5] == False and check_pivot == True:
-                check[5] = True
-            direction[6], check_pivot = self.is_opposing_piece_checking_the_king(direction[6], opposing_piece+'_qn', x, y, -move, move)
-            if direction[6] == False and check_pivot == True:
-                check[6] = True
-            direction[7], check_pivot = self.is_opposing_piece_checking_the_king(direction[7], opposing_piece+'_qn', x, y, -move, -move)
-            if direction[7] == False and check_pivot == True:
-                check[7] = True
-        if check[0] == True or check[2] == True:
-            final_check = True
-        elif check[1] == True or check[3] == True:
-            final_check = True
-        elif check[4] == True or check[6] == True:
-            final_check = True
-        elif check[5] == True or check[7] == True:
-            final_check = True
-        return final_check
+        return self.is_slider_checking_the_king(opposing_piece+'_qn', x, y, RAYS)
 
-    def is_knight_checking_the_king(self, opposing_piece, x, y):
-        moves = [[1, 2], [2, 1], [2, -1], [1, -2], [-1, -2], [-2, -1], [-2, 1], [-1 , 2]]
-        for move in moves:
-            if y+move[0] <= 7 and x+move[1] <= 7 and y+move[0] >= 0 and x+move[1] >= 0:
-                if self.board_map[y+move[0]][x+move[1]] == opposing_piece+'_kn':
-                    return True
-            else:
-                continue
+    def is_piece_on_squares(self, piece, squares):
+        for square in squares:
+            if self.board_map[square >> 3][square & 7] == piece:
+                return True
         return False
 
+    def is_knight_checking_the_king(self, opposing_piece, x, y):
+        if not (0 <= x < 8 and 0 <= y < 8):
+            return False
+        return self.is_piece_on_squares(opposing_piece+'_kn', KNIGHT_TARGETS[y * 8 + x])
+
     def is_pawn_checking_the_king(self, opposing_piece, x, y):
-        check_left = True
-        check_right = True
-        check_up = True
-        check_down = True
-        if x - 1 <= -1:
-            check_left = False
-        if y - 1 <= -1:
-            check_up = False
-        if x + 1 >= 8:
-            check_right = False
-        if y + 1 >= 8:
-            check_down = False
-
-        if self.player_view == 'white' and opposing_piece == 'b':
-            if check_left and check_up:
-                if self.board_map[y-1][x-1] == opposing_piece+'_pw':
-                    return True
-            if check_up and check_right:
-                if self.board_map[y-1][x+1] == opposing_piece+'_pw':
-                    return True
-        elif self.player_view == 'white' and opposing_piece == 'w':
-            if check_left and check_down:
-                if self.board_map[y+1][x-1] == opposing_piece+'_pw':
-                    return True
-            if check_down and check_right:
-                if self.board_map[y+1][x+1] == opposing_piece+'_pw':
-                    return True
-        elif self.player_view == 'black' and opposing_piece == 'b':
-            if check_left and check_down:
-                if self.board_map[y+1][x-1] == opposing_piece+'_pw':
-                    return True
-            if check_down and check_right:
-                if self.board_map[y+1][x+1] == opposing_piece+'_pw':
-                    return True
-        elif self.player_view == 'black' and opposing_piece == 'w':
-            if check_left and check_up:
-                if self.board_map[y-1][x-1] == opposing_piece+'_pw':
-                    return True
-            if check_up and check_right:
-                if self.board_map[y-1][x+1] == opposing_piece+'_pw':
-                    return True
+        if not (0 <= x < 8 and 0 <= y < 8):
+            return False
+        # Peão que ataca subindo na tela fica uma fileira abaixo: são as casas que um
+        # peão descendo (PAWN_CAPTURES[1]) atacaria a partir do rei
+        attacks_up = (opposing_piece == 'w') == (self.player_view == 'white')
+        return self.is_piece_on_squares(opposing_piece+'_pw', PAWN_CAPTURES[1 if attacks_up else 0][y * 8 + x])
 
     def is_other_king_checking_the_king(self, opposing_piece, x, y):
-        check = False
-        for yy in range(-1, 2):
-            for xx in range(-1, 2):
-                try:
-                    if self.board_map[y+yy][x+xx] == opposing_piece+'_kg':
-                        check = True
-                except:
-                    continue
-        return check
+        if not (0 <= x < 8 and 0 <= y < 8):
+            return False
+        return self.is_piece_on_squares(opposing_piece+'_kg', KING_TARGETS[y * 8 + x])
 
     def is_king_in_check(self, opposing_piece, x, y):
         check = False
@@ -1142,6 +1025,13 @@ class Chess:
         # Flip en_passant variable position
         if self.en_passant != None:
             self.en_passant = [7 - self.en_passant[0], 7 - self.en_passant[1]]
+        # Flip undo deltas (squares, en passant and castling flags saved before each move)
+        for snapshot in self.state_history:
+            snapshot['squares'] = [(7 - x, 7 - y, piece) for x, y, piece in snapshot['squares']]
+            if snapshot['en_passant'] is not None:
+                snapshot['en_passant'] = [7 - snapshot['en_passant'][0], 7 - snapshot['en_passant'][1]]
+            for condition in (snapshot['white_castling_movement_condition'], snapshot['black_castling_movement_condition']):
+                condition[0], condition[2] = condition[2], condition[0]
         # Flip castling variable position
         pivot = self.white_castling_movement_condition[0]
         self.white_castling_movement_condition[0] = self.white_castling_movement_condition[2]
@@ -10,7 +10,7 @@ Exemplos:
     python play_chess.py medium black    # IA Médio, você com peças pretas
     python play_chess.py hard white      # IA Difícil, você com peças brancas
 
-Dificuldades: easy (aleatória), medium (3 profundidade), hard (5 profundidade)
+Dificuldades: easy (aleatória), medium (0,3 s, até 3 de profundidade), hard (1,5 s por lance)
 Cores: white (brancas/douradas), black (pretas)
 
 Controles:
@@ -18,13 +18,24 @@ Controles:
     - ESC para sair
     - N para novo jogo
     - U para desfazer movimento
+    - R para refazer movimento
 """
 
 import os
+import random
+import threading
+import time
 import pygame as pg
+from concurrent.futures import wait, FIRST_COMPLETED
 from enum import Enum
 from typing import List, Tuple, Optional, Set
 
+from game_tree import GameTree
+from transposition import TranspositionTable, DEFAULT_HASH_MB, EXACT, LOWER, UPPER
+from geometry import (
+    KNIGHT_TARGETS, KING_TARGETS, PAWN_CAPTURES, RAYS, ROOK_RAYS, BISHOP_RAYS, BETWEEN, LINE,
+)
+
 
 class PieceType(Enum):
     PAWN = 'pw'
@@ -38,11 +49,47 @@ class Color(Enum):
     WHITE = 'w'
     BLACK = 'b'
 
+# Códigos compactos das peças: 3 bits de tipo + 1 bit de cor (8 = pretas).
+# O tabuleiro guarda apenas esses inteiros; objetos Piece só aparecem na interface.
+EMPTY = 0
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(1, 7)
+BLACK_BIT = 8
+TYPE_MASK = 7
+
+PIECE_CODES = {
+    PieceType.PAWN: PAWN,
+    PieceType.KNIGHT: KNIGHT,
+    PieceType.BISHOP: BISHOP,
+    PieceType.ROOK: ROOK,
+    PieceType.QUEEN: QUEEN,
+    PieceType.KING: KING,
+}
+COLOR_BITS = {Color.WHITE: 0, Color.BLACK: BLACK_BIT}
+
+# Evento pygame postado por ChessAI.think quando o lance da IA fica pronto (atributos move, o lance
+# compactado, e key)
+AI_MOVE_EVENT = pg.USEREVENT
+
 class Piece:
-    def __init__(self, color: Color, piece_type: PieceType):
-        self.color = color
-        self.piece_type = piece_type
-        self.has_moved = False
+    """Peça imutável e compartilhada (flyweight): existe uma instância por cor e tipo"""
+    __slots__ = ('color', 'piece_type', 'code')
+    _instances = {}
+
+    def __new__(cls, color: Color, piece_type: PieceType):
+        piece = cls._instances.get((color, piece_type))
+        if piece is None:
+            piece = object.__new__(cls)
+            object.__setattr__(piece, 'color', color)
+            object.__setattr__(piece, 'piece_type', piece_type)
+            object.__setattr__(piece, 'code', PIECE_CODES[piece_type] | COLOR_BITS[color])
+            cls._instances[(color, piece_type)] = piece
+        return piece
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Piece é imutável; troque a peça no tabuleiro")
+
+    def __reduce__(self):
+        return (Piece, (self.color, self.piece_type))
     
     def __repr__(self):
         return f"{self.color.value}_{self.piece_type.value}"
@@ -52,73 +99,813 @@ class Piece:
             return repr(self) == other
         return isinstance(other, Piece) and self.color == other.color and self.piece_type == other.piece_type
 
+    __hash__ = object.__hash__
+
+# Código inteiro -> flyweight (None para casa vazia)
+PIECES = [None] * 16
+for _color in Color:
+    for _piece_type in PieceType:
+        _piece = Piece(_color, _piece_type)
+        PIECES[_piece.code] = _piece
+
+BACK_RANK = (ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK)
+
+COLORS = (Color.WHITE, Color.BLACK)
+
+# Flags de roque ("já moveu") guardadas em um único inteiro no Board
+WHITE_KING_MOVED, WHITE_ROOK_A_MOVED, WHITE_ROOK_H_MOVED = 1, 2, 4
+BLACK_KING_MOVED, BLACK_ROOK_A_MOVED, BLACK_ROOK_H_MOVED = 8, 16, 32
+# Flags ligadas quando um lance sai de ou chega a uma casa (rei/torre movido ou capturado)
+CASTLING_FLAGS_TOUCHED = [0] * 64
+CASTLING_FLAGS_TOUCHED[60] = WHITE_KING_MOVED
+CASTLING_FLAGS_TOUCHED[56] = WHITE_ROOK_A_MOVED
+CASTLING_FLAGS_TOUCHED[63] = WHITE_ROOK_H_MOVED
+CASTLING_FLAGS_TOUCHED[4] = BLACK_KING_MOVED
+CASTLING_FLAGS_TOUCHED[0] = BLACK_ROOK_A_MOVED
+CASTLING_FLAGS_TOUCHED[7] = BLACK_ROOK_H_MOVED
+
+# Lance compactado em 16 bits: origem | destino << 6 | flags << 12 (cabe em array('H'))
+QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EN_PASSANT_CAPTURE = 0, 1, 2, 3, 4, 5
+# Promoção: PROMOTION + 0..3 (cavalo, bispo, torre, dama), somada a CAPTURE quando captura
+PROMOTION = 8
+PROMOTION_FLAGS = (PROMOTION | 3, PROMOTION | 2, PROMOTION | 1, PROMOTION)  # dama primeiro
+
+def encode_move(origin: int, target: int, flags: int = QUIET) -> int:
+    return origin | target << 6 | flags << 12
+
+def move_promotion(move: int) -> int:
+    """Código do tipo da peça promovida (0 se o lance não é promoção)"""
+    flags = move >> 12
+    return KNIGHT + (flags & 3) if flags & PROMOTION else EMPTY
+
+def move_to_coordinates(move: int) -> Tuple[int, int, int, int]:
+    """Lance compactado -> (from_x, from_y, to_x, to_y) usado pela interface"""
+    origin, target = move & 63, move >> 6 & 63
+    return (origin % 8, origin // 8, target % 8, target // 8)
+
+# Chaves Zobrist de 64 bits (semente fixa: a mesma posição tem a mesma chave em todo processo)
+_zobrist_random = random.Random(0x5EED)
+# ZOBRIST_PIECES[código << 6 | casa]; o código 0 (casa vazia) vale 0
+ZOBRIST_PIECES = [0] * 64 + [_zobrist_random.getrandbits(64) for _ in range(64 * 15)]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING = [_zobrist_random.getrandbits(64) for _ in range(64)]
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(64)]
+for _code in (BLACK_BIT, BLACK_BIT | 7, 7):
+    ZOBRIST_PIECES[_code << 6:(_code + 1) << 6] = [0] * 64  # códigos que não existem
+
+# Assinatura de material: um nibble por código de peça com a quantidade em jogo
+MATERIAL_WEIGHTS = [0] + [1 << (code * 4) for code in range(1, 16)]
+# Reis mais no máximo uma peça menor no total: nenhum dos lados consegue dar mate
+_BARE_KINGS = MATERIAL_WEIGHTS[KING] + MATERIAL_WEIGHTS[KING | BLACK_BIT]
+INSUFFICIENT_MATERIAL = frozenset([_BARE_KINGS] + [_BARE_KINGS + MATERIAL_WEIGHTS[code]
+                                                   for code in (KNIGHT, BISHOP, KNIGHT | BLACK_BIT, BISHOP | BLACK_BIT)])
+# Um bispo de cada lado: só é empate se os dois andam na mesma cor de casa
+_BISHOP_EACH = _BARE_KINGS + MATERIAL_WEIGHTS[BISHOP] + MATERIAL_WEIGHTS[BISHOP | BLACK_BIT]
+# Nibbles de cavalo, bispo, torre e dama de cada lado (finais só de peões são propensos a zugzwang)
+NON_PAWN_MATERIAL = tuple(sum(15 * MATERIAL_WEIGHTS[code | color_bit] for code in (KNIGHT, BISHOP, ROOK, QUEEN))
+                          for color_bit in (0, BLACK_BIT))
+
+def _castling_flag(flag: int) -> property:
+    """Expõe um bit de castling_flags com o nome antigo (white_king_moved, ...)"""
+    def get(self) -> bool:
+        return bool(self.castling_flags & flag)
+    
+    def set(self, value: bool):
+        if value:
+            self.castling_flags |= flag
+        else:
+            self.castling_flags &= ~flag
+    
+    return property(get, set)
+
+def _to_index(square: Optional[Tuple[int, int]]) -> int:
+    """(x, y) -> índice 0..63; None -> -1"""
+    return -1 if square is None else square[1] * 8 + square[0]
+
+def _to_coordinates(squares) -> Set[Tuple[int, int]]:
+    return {(square % 8, square // 8) for square in squares}
+
+def _least_valuable_attacker(squares, square: int, color_bit: int) -> int:
+    """Casa da peça mais barata de color_bit que ataca square em squares (-1 se nenhuma)
+
+    Lê um bytearray qualquer, então a troca estática pode tirar peças de uma
+    cópia do tabuleiro e revelar os ataques em raio-x que estavam atrás delas.
+    """
+    pawn = PAWN | color_bit
+    for origin in PAWN_CAPTURES[(color_bit >> 3) ^ 1][square]:
+        if squares[origin] == pawn:
+            return origin
+    knight = KNIGHT | color_bit
+    for origin in KNIGHT_TARGETS[square]:
+        if squares[origin] == knight:
+            return origin
+    # Primeira peça de cada raio: bispo, torre e dama, nessa ordem de valor
+    sliders = [-1, -1, -1]
+    bishop, rook, queen = BISHOP | color_bit, ROOK | color_bit, QUEEN | color_bit
+    for index, ray in enumerate(RAYS[square]):
+        for origin in ray:
+            code = squares[origin]
+            if code:
+                if code == queen:
+                    sliders[2] = origin
+                elif code == (rook if index < 4 else bishop):
+                    sliders[index < 4] = origin
+                break
+    for origin in sliders:
+        if origin >= 0:
+            return origin
+    king = KING | color_bit
+    for origin in KING_TARGETS[square]:
+        if squares[origin] == king:
+            return origin
+    return -1
+
+
 class Board:
+    """Tabuleiro 8x8 em um bytearray de 64 casas (índice = y * 8 + x)"""
+
+    white_king_moved = _castling_flag(WHITE_KING_MOVED)
+    black_king_moved = _castling_flag(BLACK_KING_MOVED)
+    white_rook_a_moved = _castling_flag(WHITE_ROOK_A_MOVED)
+    white_rook_h_moved = _castling_flag(WHITE_ROOK_H_MOVED)
+    black_rook_a_moved = _castling_flag(BLACK_ROOK_A_MOVED)
+    black_rook_h_moved = _castling_flag(BLACK_ROOK_H_MOVED)
+
     def __init__(self):
-        self.grid = [[None for _ in range(8)] for _ in range(8)]
+        self.squares = bytearray(64)
         self.initialize_board()
-        self.move_history = []
-        self.white_king_moved = False
-        self.black_king_moved = False
-        self.white_rook_a_moved = False
-        self.white_rook_h_moved = False
-        self.black_rook_a_moved = False
-        self.black_rook_h_moved = False
+        # Estado completo da posição: vez (bit de cor), flags de roque e casa de en passant
+        self.turn = 0
+        self.castling_flags = 0
+        self.en_passant = -1
+        # Chaves das posições anteriores (uma por lance jogado) e lances desde a última captura/peão
+        self.key_history = []
+        self.halfmove_clock = 0
+        # Meios-lances jogados antes desta posição inicial (posições carregadas de FEN)
+        self.start_ply = 0
         
     def initialize_board(self):
-        # Peças pretas
-        self.grid[0] = [
-            Piece(Color.BLACK, PieceType.ROOK),
-            Piece(Color.BLACK, PieceType.KNIGHT),
-            Piece(Color.BLACK, PieceType.BISHOP),
-            Piece(Color.BLACK, PieceType.QUEEN),
-            Piece(Color.BLACK, PieceType.KING),
-            Piece(Color.BLACK, PieceType.BISHOP),
-            Piece(Color.BLACK, PieceType.KNIGHT),
-            Piece(Color.BLACK, PieceType.ROOK),
-        ]
-        # Peões pretos
-        for x in range(8):
-            self.grid[1][x] = Piece(Color.BLACK, PieceType.PAWN)
-        
-        # Peões brancos
-        for x in range(8):
-            self.grid[6][x] = Piece(Color.WHITE, PieceType.PAWN)
-        
-        # Peças brancas
-        self.grid[7] = [
-            Piece(Color.WHITE, PieceType.ROOK),
-            Piece(Color.WHITE, PieceType.KNIGHT),
-            Piece(Color.WHITE, PieceType.BISHOP),
-            Piece(Color.WHITE, PieceType.QUEEN),
-            Piece(Color.WHITE, PieceType.KING),
-            Piece(Color.WHITE, PieceType.BISHOP),
-            Piece(Color.WHITE, PieceType.KNIGHT),
-            Piece(Color.WHITE, PieceType.ROOK),
-        ]
+        squares = self.squares
+        squares[:] = bytes(64)
+        for x, piece_code in enumerate(BACK_RANK):
+            # Peças pretas e brancas
+            squares[x] = piece_code | BLACK_BIT
+            squares[56 + x] = piece_code
+            # Peões
+            squares[8 + x] = PAWN | BLACK_BIT
+            squares[48 + x] = PAWN
+        self.index_pieces()
+
+    def index_pieces(self):
+        """Reconstrói casas dos reis, conjuntos de casas por cor e chave das peças a partir do bytearray"""
+        self.king_squares = [-1, -1]
+        self.piece_squares = (set(), set())
+        self.piece_key = 0
+        self.material = 0
+        for square, code in enumerate(self.squares):
+            if code:
+                self.piece_squares[code >> 3].add(square)
+                self.piece_key ^= ZOBRIST_PIECES[code << 6 | square]
+                self.material += MATERIAL_WEIGHTS[code]
+                if code & TYPE_MASK == KING:
+                    self.king_squares[code >> 3] = square
+
+    @property
+    def key(self) -> int:
+        """Chave Zobrist de 64 bits da posição
+
+        A parte das peças é atualizada por put (set_piece, make e unmake passam por
+        ele); vez, roque e en passant entram com uma consulta de tabela cada, então
+        atribuições diretas a turn/castling_flags/en_passant continuam corretas.
+        """
+        key = self.piece_key ^ ZOBRIST_CASTLING[self.castling_flags]
+        if self.turn:
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        en_passant = self.en_passant
+        if en_passant >= 0:
+            # Só conta se algum peão do lado que joga pode mesmo capturar
+            pawn = PAWN | self.turn
+            squares = self.squares
+            for origin in PAWN_CAPTURES[(self.turn >> 3) ^ 1][en_passant]:
+                if squares[origin] == pawn:
+                    key ^= ZOBRIST_EN_PASSANT[en_passant]
+                    break
+        return key
+
+    def compute_key(self) -> int:
+        """Recalcula a chave do zero (verificador para os testes)"""
+        key = 0
+        for square, code in enumerate(self.squares):
+            key ^= ZOBRIST_PIECES[code << 6 | square]
+        key ^= ZOBRIST_CASTLING[self.castling_flags]
+        if self.turn:
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        if self.en_passant >= 0 and any(self.squares[origin] == PAWN | self.turn
+                                        for origin in PAWN_CAPTURES[(self.turn >> 3) ^ 1][self.en_passant]):
+            key ^= ZOBRIST_EN_PASSANT[self.en_passant]
+        return key
     
     def get_piece(self, x: int, y: int) -> Optional[Piece]:
         if 0 <= x < 8 and 0 <= y < 8:
-            return self.grid[y][x]
+            return PIECES[self.squares[y * 8 + x]]
         return None
     
     def set_piece(self, x: int, y: int, piece: Optional[Piece]):
         if 0 <= x < 8 and 0 <= y < 8:
-            self.grid[y][x] = piece
+            self.put(y * 8 + x, piece.code if piece else EMPTY)
     
     def is_empty(self, x: int, y: int) -> bool:
         return self.get_piece(x, y) is None
     
     def find_king(self, color: Color) -> Tuple[int, int]:
-        for y in range(8):
-            for x in range(8):
-                piece = self.get_piece(x, y)
-                if piece and piece.color == color and piece.piece_type == PieceType.KING:
-                    return (x, y)
+        square = self.king_squares[COLOR_BITS[color] >> 3]
+        if square < 0:
+            return None
+        return (square % 8, square // 8)
+
+    def put(self, square: int, code: int):
+        """Escreve um código de peça direto na casa (caminho rápido da busca)
+
+        Mantém incrementalmente as casas dos reis, os conjuntos de peças por cor, a
+        chave Zobrist das peças e a assinatura de material; roque, en passant e
+        promoção passam todos por aqui.
+        """
+        old = self.squares[square]
+        self.piece_key ^= ZOBRIST_PIECES[old << 6 | square] ^ ZOBRIST_PIECES[code << 6 | square]
+        self.material += MATERIAL_WEIGHTS[code] - MATERIAL_WEIGHTS[old]
+        if old:
+            self.piece_squares[old >> 3].discard(square)
+            if old & TYPE_MASK == KING and self.king_squares[old >> 3] == square:
+                self.king_squares[old >> 3] = -1
+        if code:
+            self.piece_squares[code >> 3].add(square)
+            if code & TYPE_MASK == KING:
+                self.king_squares[code >> 3] = square
+        self.squares[square] = code
+
+    def pawn_targets(self, square: int, color_bit: int, en_passant: int = -1) -> List[int]:
+        targets = []
+        squares = self.squares
+        x, y = square % 8, square // 8
+        direction = 1 if color_bit else -1
+        start_row = 1 if color_bit else 6
+        
+        next_y = y + direction
+        if not 0 <= next_y < 8:
+            return targets
+        
+        # Move forward one square
+        forward = next_y * 8 + x
+        if not squares[forward]:
+            targets.append(forward)
+            
+            # Move forward two squares from starting position
+            if y == start_row and not squares[forward + 8 * direction]:
+                targets.append(forward + 8 * direction)
+        
+        # Capture diagonally (and en passant)
+        for capture in PAWN_CAPTURES[color_bit >> 3][square]:
+            target = squares[capture]
+            if (target and (target & BLACK_BIT) != color_bit) or capture == en_passant:
+                targets.append(capture)
+        
+        return targets
+
+    def step_targets(self, square: int, color_bit: int, table) -> List[int]:
+        """Destinos de cavalo/rei lidos de uma tabela por casa (KNIGHT_TARGETS, KING_TARGETS)"""
+        squares = self.squares
+        return [target for target in table[square]
+                if not squares[target] or (squares[target] & BLACK_BIT) != color_bit]
+
+    def slide_targets(self, square: int, color_bit: int, rays) -> List[int]:
+        """Destinos de peça deslizante percorrendo os raios pré-calculados (ROOK_RAYS, BISHOP_RAYS, RAYS)"""
+        targets = []
+        squares = self.squares
+        for ray in rays[square]:
+            for target in ray:
+                code = squares[target]
+                if not code:
+                    targets.append(target)
+                else:
+                    if (code & BLACK_BIT) != color_bit:
+                        targets.append(target)
+                    break
+        return targets
+
+    def pseudo_targets(self, square: int, en_passant: int = -1) -> List[int]:
+        """Casas de destino pseudo-legais da peça em square, sem roque"""
+        code = self.squares[square]
+        piece_code = code & TYPE_MASK
+        color_bit = code & BLACK_BIT
+        if piece_code == PAWN:
+            return self.pawn_targets(square, color_bit, en_passant)
+        elif piece_code == KNIGHT:
+            return self.step_targets(square, color_bit, KNIGHT_TARGETS)
+        elif piece_code == BISHOP:
+            return self.slide_targets(square, color_bit, BISHOP_RAYS)
+        elif piece_code == ROOK:
+            return self.slide_targets(square, color_bit, ROOK_RAYS)
+        elif piece_code == QUEEN:
+            return self.slide_targets(square, color_bit, RAYS)
+        elif piece_code == KING:
+            return self.step_targets(square, color_bit, KING_TARGETS)
+        return []
+
+    def capture_targets(self, square: int) -> List[int]:
+        """Destinos barulhentos da peça em square: só casas com peça inimiga, mais o avanço
+        de peão que promove (en passant fica com o gerador, que o confere no tabuleiro)"""
+        squares = self.squares
+        code = squares[square]
+        piece_code = code & TYPE_MASK
+        color_bit = code & BLACK_BIT
+        enemy_bit = color_bit ^ BLACK_BIT
+        if piece_code == PAWN:
+            targets = [target for target in PAWN_CAPTURES[color_bit >> 3][square]
+                       if squares[target] and squares[target] & BLACK_BIT == enemy_bit]
+            forward = square + (8 if color_bit else -8)
+            if (forward < 8 or forward >= 56) and not squares[forward]:
+                targets.append(forward)
+            return targets
+        if piece_code == KNIGHT or piece_code == KING:
+            return [target for target in (KNIGHT_TARGETS if piece_code == KNIGHT else KING_TARGETS)[square]
+                    if squares[target] and squares[target] & BLACK_BIT == enemy_bit]
+        targets = []
+        for ray in (BISHOP_RAYS if piece_code == BISHOP else ROOK_RAYS if piece_code == ROOK else RAYS)[square]:
+            # Só a primeira peça de cada raio interessa
+            for target in ray:
+                if squares[target]:
+                    if squares[target] & BLACK_BIT == enemy_bit:
+                        targets.append(target)
+                    break
+        return targets
+
+    def pawn_moves(self, x: int, y: int, color_bit: int, en_passant_target=None) -> Set[Tuple[int, int]]:
+        return _to_coordinates(self.pawn_targets(y * 8 + x, color_bit, _to_index(en_passant_target)))
+
+    def step_moves(self, x: int, y: int, color_bit: int, table) -> Set[Tuple[int, int]]:
+        return _to_coordinates(self.step_targets(y * 8 + x, color_bit, table))
+
+    def slide_moves(self, x: int, y: int, color_bit: int, rays) -> Set[Tuple[int, int]]:
+        return _to_coordinates(self.slide_targets(y * 8 + x, color_bit, rays))
+
+    def pseudo_legal_moves(self, x: int, y: int, en_passant_target=None) -> Set[Tuple[int, int]]:
+        """Destinos pseudo-legais da peça em (x, y), sem roque"""
+        return _to_coordinates(self.pseudo_targets(y * 8 + x, _to_index(en_passant_target)))
+
+    def is_attacked(self, x: int, y: int, by_color: Color, en_passant_target=None) -> bool:
+        return self.square_attacked(y * 8 + x, COLOR_BITS[by_color])
+
+    def square_attacked(self, square: int, color_bit: int) -> bool:
+        """Sonda "super-peça": olha a partir da casa alvo e para no primeiro bloqueio"""
+        squares = self.squares
+        
+        # Peões atacantes ficam onde um peão da outra cor em square atacaria
+        pawn = PAWN | color_bit
+        for origin in PAWN_CAPTURES[(color_bit >> 3) ^ 1][square]:
+            if squares[origin] == pawn:
+                return True
+        
+        knight = KNIGHT | color_bit
+        for origin in KNIGHT_TARGETS[square]:
+            if squares[origin] == knight:
+                return True
+        
+        king = KING | color_bit
+        for origin in KING_TARGETS[square]:
+            if squares[origin] == king:
+                return True
+        
+        queen = QUEEN | color_bit
+        for rays, slider in ((ROOK_RAYS, ROOK | color_bit), (BISHOP_RAYS, BISHOP | color_bit)):
+            for ray in rays[square]:
+                for origin in ray:
+                    code = squares[origin]
+                    if code:
+                        if code == slider or code == queen:
+                            return True
+                        break
+        return False
+
+    def attackers_of(self, square: int, color: Color) -> List[int]:
+        """Casas (índices) das peças de color que atacam square"""
+        squares = self.squares
+        color_bit = COLOR_BITS[color]
+        found = []
+        
+        for table, piece_code in ((PAWN_CAPTURES[(color_bit >> 3) ^ 1], PAWN | color_bit),
+                                  (KNIGHT_TARGETS, KNIGHT | color_bit), (KING_TARGETS, KING | color_bit)):
+            for origin in table[square]:
+                if squares[origin] == piece_code:
+                    found.append(origin)
+        
+        queen = QUEEN | color_bit
+        for rays, slider in ((ROOK_RAYS, ROOK | color_bit), (BISHOP_RAYS, BISHOP | color_bit)):
+            for ray in rays[square]:
+                for origin in ray:
+                    code = squares[origin]
+                    if code:
+                        if code == slider or code == queen:
+                            found.append(origin)
+                        break
+        return found
+
+    def generate_legal(self, moves, origin: Optional[int] = None, noisy: Optional[bool] = None,
+                       context: Optional[tuple] = None):
+        """Preenche o buffer moves (lista ou array('H') reaproveitado) com os lances legais
+
+        noisy=True gera só capturas e promoções, noisy=False só os lances calmos;
+        context é o legal_context() da posição atual, para gerar em estágios sem refazê-lo.
+        """
+        del moves[:]
+        moves.extend(self._generate_legal(self.turn, self.en_passant, origin, noisy, context))
+        return moves
+
+    def is_legal(self, move: int, context: Optional[tuple] = None) -> bool:
+        """Confere um lance vindo de fora do gerador (lance da tabela, killer) gerando só a sua peça"""
+        origin = move & 63
+        code = self.squares[origin]
+        if not code or (code & BLACK_BIT) != self.turn:
+            return False
+        return move in self._generate_legal(self.turn, self.en_passant, origin, None, context)
+
+    def legal_moves(self, origin: Optional[int] = None) -> List[int]:
+        """Lances legais compactados do lado que joga, ou só da peça em origin"""
+        return self.generate_legal([], origin)
+
+    def has_any_legal_move(self, color_bit: Optional[int] = None) -> bool:
+        """Para no primeiro lance legal encontrado (xeque-mate/afogamento)"""
+        if color_bit is None:
+            color_bit = self.turn
+        en_passant = self.en_passant if color_bit == self.turn else -1
+        for _ in self._generate_legal(color_bit, en_passant):
+            return True
+        return False
+
+    def infer_move(self, origin: int, target: int, promotion: int = QUEEN) -> int:
+        """Monta o lance compactado de (origem, destino) deduzindo as flags pela posição"""
+        squares = self.squares
+        piece_code = squares[origin] & TYPE_MASK
+        flags = CAPTURE if squares[target] else QUIET
+        if piece_code == PAWN:
+            if target == self.en_passant:
+                flags = EN_PASSANT_CAPTURE
+            elif target - origin in (16, -16):
+                flags = DOUBLE_PUSH
+            elif target < 8 or target >= 56:
+                flags |= PROMOTION | (promotion - KNIGHT)
+        elif piece_code == KING and target - origin in (2, -2):
+            flags = KING_CASTLE if target > origin else QUEEN_CASTLE
+        return origin | target << 6 | flags << 12
+
+    def make(self, move: int) -> tuple:
+        """Joga o lance compactado e devolve o registro para unmake"""
+        origin = move & 63
+        target = move >> 6 & 63
+        flags = move >> 12
+        squares = self.squares
+        put = self.put
+        piece = squares[origin]
+        undo = (move, piece, squares[target], self.castling_flags, self.en_passant, self.halfmove_clock)
+        self.key_history.append(self.key)
+        # Captura ou lance de peão é irreversível: zera o relógio dos 50 lances
+        if flags & CAPTURE or piece & TYPE_MASK == PAWN:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        
+        if flags == EN_PASSANT_CAPTURE:
+            put(origin - origin % 8 + target % 8, EMPTY)
+        if flags & PROMOTION:
+            put(target, KNIGHT + (flags & 3) | (piece & BLACK_BIT))
+        else:
+            put(target, piece)
+        put(origin, EMPTY)
+        
+        if flags == KING_CASTLE:
+            put(origin + 1, squares[origin + 3])
+            put(origin + 3, EMPTY)
+        elif flags == QUEEN_CASTLE:
+            put(origin - 1, squares[origin - 4])
+            put(origin - 4, EMPTY)
+        
+        self.en_passant = (origin + target) // 2 if flags == DOUBLE_PUSH else -1
+        self.castling_flags |= CASTLING_FLAGS_TOUCHED[origin] | CASTLING_FLAGS_TOUCHED[target]
+        self.turn ^= BLACK_BIT
+        return undo
+
+    def unmake(self, undo: tuple):
+        """Desfaz o lance descrito pelo registro devolvido por make"""
+        move, piece, captured, castling_flags, en_passant, self.halfmove_clock = undo
+        self.key_history.pop()
+        origin = move & 63
+        target = move >> 6 & 63
+        flags = move >> 12
+        put = self.put
+        put(origin, piece)
+        put(target, captured)
+        
+        if flags == EN_PASSANT_CAPTURE:
+            put(origin - origin % 8 + target % 8, PAWN | ((piece & BLACK_BIT) ^ BLACK_BIT))
+        elif flags == KING_CASTLE:
+            put(origin + 3, self.squares[origin + 1])
+            put(origin + 1, EMPTY)
+        elif flags == QUEEN_CASTLE:
+            put(origin - 4, self.squares[origin - 1])
+            put(origin - 1, EMPTY)
+        
+        self.castling_flags = castling_flags
+        self.en_passant = en_passant
+        self.turn ^= BLACK_BIT
+
+    def make_null(self) -> tuple:
+        """Passa a vez sem mexer peça (busca de lance nulo); devolve o registro para unmake_null
+
+        O relógio dos 50 lances zera para que a repetição não seja procurada através do lance nulo.
+        """
+        undo = (self.en_passant, self.halfmove_clock)
+        self.key_history.append(self.key)
+        self.en_passant = -1
+        self.halfmove_clock = 0
+        self.turn ^= BLACK_BIT
+        return undo
+
+    def unmake_null(self, undo: tuple):
+        self.en_passant, self.halfmove_clock = undo
+        self.key_history.pop()
+        self.turn ^= BLACK_BIT
+
+    def has_non_pawn_material(self, color_bit: int) -> bool:
+        """O lado tem alguma peça além de rei e peões (lido da assinatura de material)"""
+        return bool(self.material & NON_PAWN_MATERIAL[color_bit >> 3])
+
+    def repetition_count(self) -> int:
+        """Quantas vezes a posição atual já ocorreu, contando a atual
+
+        Só olha as posições com o mesmo lado para jogar desde o último lance
+        irreversível (o relógio dos 50 lances limita a busca para trás).
+        """
+        history = self.key_history
+        key = self.key
+        count = 1
+        last = len(history) - 1
+        for index in range(last - 1, max(last - self.halfmove_clock, -1), -2):
+            if history[index] == key:
+                count += 1
+        return count
+
+    def is_fifty_move_draw(self) -> bool:
+        return self.halfmove_clock >= 100
+
+    def is_insufficient_material(self) -> bool:
+        """Empate por material, decidido pela assinatura (e pela cor das casas dos bispos)"""
+        material = self.material
+        if material in INSUFFICIENT_MATERIAL:
+            return True
+        if material == _BISHOP_EACH:
+            white, black = (next(square for square in self.piece_squares[side]
+                                 if self.squares[square] & TYPE_MASK == BISHOP) for side in (0, 1))
+            return (white + (white >> 3)) & 1 == (black + (black >> 3)) & 1
+        return False
+
+    def draw_reason(self, repetitions: int = 3) -> Optional[str]:
+        """'insufficient_material', 'fifty_moves', 'repetition' ou None
+
+        A busca passa repetitions=2: voltar a uma posição já vista já vale empate.
+        """
+        if self.is_insufficient_material():
+            return 'insufficient_material'
+        if self.halfmove_clock >= 100:
+            return 'fifty_moves'
+        if self.halfmove_clock >= 4 and self.repetition_count() >= repetitions:
+            return 'repetition'
+        return None
+
+    def perft(self, depth: int) -> int:
+        """Conta as folhas da árvore de lances legais (testa o gerador e make/unmake)"""
+        moves = self.legal_moves()
+        if depth <= 1:
+            return len(moves) if depth == 1 else 1
+        nodes = 0
+        for move in moves:
+            undo = self.make(move)
+            nodes += self.perft(depth - 1)
+            self.unmake(undo)
+        return nodes
+
+    def legal_context(self, color_bit: Optional[int] = None) -> Optional[tuple]:
+        """Xeques, cravadas e máscara de evasão do lado color_bit: (rei, atacantes, cravadas, evasão)
+
+        Calculado uma vez por nó e repassado a generate_legal/is_legal, os estágios
+        do seletor (capturas, killers, calmos) não refazem a varredura. None sem rei.
+        """
+        if color_bit is None:
+            color_bit = self.turn
+        squares = self.squares
+        side = color_bit >> 3
+        enemy_bit = color_bit ^ BLACK_BIT
+        king = self.king_squares[side]
+        if king < 0:
+            return None
+        checkers = self.attackers_of(king, COLORS[side ^ 1])
+        
+        # Cravadas: em cada raio do rei, uma peça nossa seguida de um deslizante inimigo.
+        # A peça cravada só anda sobre LINE[rei][peça] (bitboard da linha inteira)
+        pins = {}
+        for index, ray in enumerate(RAYS[king]):
+            slider = ROOK | enemy_bit if index < 4 else BISHOP | enemy_bit
+            blocker = -1
+            for square in ray:
+                code = squares[square]
+                if code:
+                    if (code & BLACK_BIT) == color_bit:
+                        if blocker >= 0:
+                            break
+                        blocker = square
+                    else:
+                        if blocker >= 0 and (code == slider or code == QUEEN | enemy_bit):
+                            pins[blocker] = LINE[king][blocker]
+                        break
+        
+        # Máscara de evasão: capturar o atacante ou bloquear entre ele e o rei
+        evasion = None
+        if len(checkers) == 1:
+            evasion = 1 << checkers[0] | BETWEEN[king][checkers[0]]
+        return king, checkers, pins, evasion
+
+    def _generate_legal(self, color_bit: int, en_passant: int = -1, origin: Optional[int] = None,
+                        noisy: Optional[bool] = None, context: Optional[tuple] = None):
+        """Gera só lances legais a partir do legal_context (calculado aqui se não vier pronto)
+
+        Com noisy True/False filtra capturas e promoções (flags >= CAPTURE) ou lances calmos.
+        """
+        if context is None:
+            context = self.legal_context(color_bit)
+            if context is None:
+                return
+        king, checkers, pins, evasion = context
+        squares = self.squares
+        side = color_bit >> 3
+        enemy_bit = color_bit ^ BLACK_BIT
+        
+        # Capturas só olham casas com peça inimiga; os calmos usam os destinos completos
+        targets_of = self.capture_targets if noisy else self.pseudo_targets
+        
+        # Lances do rei: tirado do tabuleiro para que os raios o atravessem
+        if origin is None or origin == king:
+            king_targets = [target for target in targets_of(king)
+                            if noisy is None or noisy == bool(squares[target])]
+            if king_targets:
+                king_code = squares[king]
+                self.put(king, EMPTY)
+                king_targets = [target for target in king_targets if not self.square_attacked(target, enemy_bit)]
+                self.put(king, king_code)
+            for target in king_targets:
+                yield king | target << 6 | (CAPTURE if squares[target] else QUIET) << 12
+            
+            # Roque: nem sair, nem passar, nem chegar em casa atacada
+            if not checkers and not noisy:
+                for target in self._castling_targets(king, color_bit):
+                    yield king | target << 6 | (KING_CASTLE if target > king else QUEEN_CASTLE) << 12
+        
+        if len(checkers) > 1:
+            return  # Xeque duplo: só o rei se move
+        
+        own = (origin,) if origin is not None else sorted(self.piece_squares[side])
+        for square in own:
+            code = squares[square]
+            if code & TYPE_MASK == KING:
+                continue
+            pin = pins.get(square)
+            is_pawn = code & TYPE_MASK == PAWN
+            for target in targets_of(square):
+                if pin is not None and not pin >> target & 1:
+                    continue
+                if evasion is not None and not evasion >> target & 1:
+                    continue
+                flags = CAPTURE if squares[target] else QUIET
+                if is_pawn:
+                    if target < 8 or target >= 56:
+                        if noisy is not False:
+                            for promotion in PROMOTION_FLAGS:
+                                yield square | target << 6 | (promotion | flags) << 12
+                        continue
+                    if target - square in (16, -16):
+                        flags = DOUBLE_PUSH
+                if noisy is None or noisy == (flags == CAPTURE):
+                    yield square | target << 6 | flags << 12
+            
+            # En passant tira duas peças de uma vez: confere no tabuleiro
+            if (is_pawn and en_passant >= 0 and noisy is not False
+                    and en_passant // 8 - square // 8 == (1 if color_bit else -1)
+                    and abs(en_passant % 8 - square % 8) == 1
+                    and self._en_passant_is_legal(square, en_passant, color_bit)):
+                yield square | en_passant << 6 | EN_PASSANT_CAPTURE << 12
+
+    def _castling_targets(self, king: int, color_bit: int) -> List[int]:
+        squares = self.squares
+        enemy_bit = color_bit ^ BLACK_BIT
+        attacked = self.square_attacked
+        targets = []
+        if color_bit == 0:
+            if king != 60 or self.white_king_moved:
+                return targets
+            if (not self.white_rook_h_moved and squares[63] == ROOK and not squares[61] and not squares[62]
+                    and not attacked(61, enemy_bit) and not attacked(62, enemy_bit)):
+                targets.append(62)
+            if (not self.white_rook_a_moved and squares[56] == ROOK and not squares[57] and not squares[58]
+                    and not squares[59] and not attacked(59, enemy_bit) and not attacked(58, enemy_bit)):
+                targets.append(58)
+        else:
+            if king != 4 or self.black_king_moved:
+                return targets
+            if (not self.black_rook_h_moved and squares[7] == ROOK | BLACK_BIT and not squares[5] and not squares[6]
+                    and not attacked(5, enemy_bit) and not attacked(6, enemy_bit)):
+                targets.append(6)
+            if (not self.black_rook_a_moved and squares[0] == ROOK | BLACK_BIT and not squares[1] and not squares[2]
+                    and not squares[3] and not attacked(3, enemy_bit) and not attacked(2, enemy_bit)):
+                targets.append(2)
+        return targets
+
+    def _en_passant_is_legal(self, origin: int, target: int, color_bit: int) -> bool:
+        captured = (origin // 8) * 8 + target % 8
+        pawn = self.squares[origin]
+        captured_code = self.squares[captured]
+        self.put(target, pawn)
+        self.put(origin, EMPTY)
+        self.put(captured, EMPTY)
+        in_check = self.square_attacked(self.king_squares[color_bit >> 3], color_bit ^ BLACK_BIT)
+        self.put(captured, captured_code)
+        self.put(origin, pawn)
+        self.put(target, EMPTY)
+        return not in_check
+
+    def snapshot(self) -> bytes:
+        """Cópia imutável das 64 casas (uma única chamada a bytes())"""
+        return bytes(self.squares)
+
+    def restore(self, snapshot: bytes):
+        self.squares[:] = snapshot
+        self.index_pieces()
+
+    def copy(self) -> 'Board':
+        board = type(self).__new__(type(self))
+        board.__dict__.update(self.__dict__)
+        board.squares = bytearray(self.squares)
+        board.king_squares = list(self.king_squares)
+        board.piece_squares = (set(self.piece_squares[0]), set(self.piece_squares[1]))
+        board.key_history = list(self.key_history)
+        return board
+
+class PositionStatus:
+    """Fatos da posição que só mudam quando um lance é jogado
+
+    Lances legais agrupados por casa de origem, xeque e resultado (xeque-mate,
+    afogamento ou empate por repetição, 50 lances ou material insuficiente),
+    calculados uma vez por lance. A interface e a validação leem
+    daqui; a busca da IA continua usando o Board diretamente.
+    """
+    __slots__ = ('key', 'moves', 'targets', 'in_check', 'result')
+
+    def __init__(self, board: Board):
+        self.key = board.key
+        # Origem -> lances compactados (promoção a dama primeiro)
+        self.moves = {}
+        for move in board.legal_moves():
+            self.moves.setdefault(move & 63, []).append(move)
+        # (x, y) -> destinos (x, y), já no formato da interface
+        self.targets = {(origin % 8, origin // 8): frozenset(_to_coordinates(move >> 6 & 63 for move in moves))
+                        for origin, moves in self.moves.items()}
+        king = board.king_squares[board.turn >> 3]
+        self.in_check = king >= 0 and board.square_attacked(king, board.turn ^ BLACK_BIT)
+        if self.moves:
+            self.result = board.draw_reason()
+        else:
+            self.result = 'checkmate' if self.in_check else 'stalemate'
+
+    def find(self, origin: int, target: int) -> Optional[int]:
+        """Lance legal compactado de origin para target (None se ilegal)"""
+        for move in self.moves.get(origin, ()):
+            if move >> 6 & 63 == target:
+                return move
         return None
 
 class ChessGame:
-    def __init__(self, ai_enabled: bool = True, ai_difficulty: str = 'medium', player_color: Color = Color.WHITE):
+    DRAW_TEXTS = {
+        'stalemate': "Afogamento - Empate!",
+        'repetition': "Repetição - Empate!",
+        'fifty_moves': "50 lances - Empate!",
+        'insufficient_material': "Material insuficiente - Empate!",
+    }
+    FPS = 60
+    
+    def __init__(self, ai_enabled: bool = True, ai_difficulty: str = 'medium', player_color: Color = Color.WHITE,
+                 board_backend: str = 'mailbox', ai_hash_mb: float = DEFAULT_HASH_MB, ai_ponder: bool = False,
+                 ai_workers: int = 1):
         pg.init()
+        # Configuração da partida, reaproveitada por new_game (tecla N)
+        self._settings = dict(ai_enabled=ai_enabled, ai_difficulty=ai_difficulty, player_color=player_color,
+                              board_backend=board_backend, ai_hash_mb=ai_hash_mb, ai_ponder=ai_ponder,
+                              ai_workers=ai_workers)
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         
         # Colors - Xadrez clássico: Dourado e Preto
@@ -140,8 +927,15 @@ class ChessGame:
         self.clock = pg.time.Clock()
         
         # Game state
-        self.board = Board()
+        if board_backend == 'bitboard':
+            from bitboard import BitBoard
+            self.board = BitBoard()
+        else:
+            self.board = Board()
+        self._status = None
         self.current_player = Color.WHITE
+        # Lances jogados, com variantes (desfazer/refazer por delta)
+        self.tree = GameTree(self.board)
         self.selected_square = None
         self.valid_moves = set()
         self.game_over = False
@@ -153,15 +947,10 @@ class ChessGame:
         self.ai_enabled = ai_enabled
         self.player_color = player_color
         self.ai_color = Color.BLACK if player_color == Color.WHITE else Color.WHITE
-        self.ai = ChessAI(ai_difficulty) if ai_enabled else None
+        self.ai = ChessAI(ai_difficulty, ai_hash_mb, ai_workers) if ai_enabled else None
         self.ai_thinking = False
-        
-        # Configurar tempo de resposta da IA baseado na dificuldade
-        self.ai_response_time = {
-            'easy': 15,      # ~250ms (rápido)
-            'medium': 30,    # ~500ms (normal)
-            'hard': 60       # ~1s (pensativo)
-        }.get(ai_difficulty, 30)
+        # Ponder: a IA continua pensando na vez do jogador
+        self.ai_ponder = ai_ponder and ai_enabled
         
         # Load piece images
         self.piece_images = self.load_piece_images()
@@ -169,6 +958,31 @@ class ChessGame:
         # Sounds
         self.sounds = self.load_sounds()
     
+    @property
+    def current_player(self) -> Color:
+        return COLORS[self.board.turn >> 3]
+    
+    @current_player.setter
+    def current_player(self, color: Color):
+        self.board.turn = COLOR_BITS[color]
+    
+    @property
+    def status(self) -> PositionStatus:
+        """Tabela de lances legais e situação da posição atual (calculada uma vez por lance)"""
+        status = self._status
+        if status is None or status.key != self.board.key:
+            status = self._status = PositionStatus(self.board)
+        return status
+    
+    @property
+    def en_passant_target(self) -> Optional[Tuple[int, int]]:
+        square = self.board.en_passant
+        return None if square < 0 else (square % 8, square // 8)
+    
+    @en_passant_target.setter
+    def en_passant_target(self, square: Optional[Tuple[int, int]]):
+        self.board.en_passant = _to_index(square)
+    
     def load_piece_images(self):
         images = {}
         pieces_files = {
@@ -185,11 +999,11 @@ class ChessGame:
             black_path = os.path.join(self.base_dir, black_file)
             
             if os.path.exists(white_path):
-                white_img = pg.image.load(white_path)
+                white_img = pg.image.load(white_path).convert_alpha()
                 images[f'w_{piece_name}'] = pg.transform.scale(white_img, (self.SQUARE_SIZE, self.SQUARE_SIZE))
             
             if os.path.exists(black_path):
-                black_img = pg.image.load(black_path)
+                black_img = pg.image.load(black_path).convert_alpha()
                 images[f'b_{piece_name}'] = pg.transform.scale(black_img, (self.SQUARE_SIZE, self.SQUARE_SIZE))
         
         return images
@@ -234,331 +1048,105 @@ class ChessGame:
         return None
     
     def get_pawn_moves(self, x: int, y: int, piece: Piece) -> Set[Tuple[int, int]]:
-        moves = set()
-        direction = -1 if piece.color == Color.WHITE else 1
-        start_row = 6 if piece.color == Color.WHITE else 1
-        
-        # Move forward one square
-        next_y = y + direction
-        if 0 <= next_y < 8 and self.board.is_empty(x, next_y):
-            moves.add((x, next_y))
-            
-            # Move forward two squares from starting position
-            if y == start_row:
-                next_next_y = y + 2 * direction
-                if self.board.is_empty(x, next_next_y):
-                    moves.add((x, next_next_y))
-        
-        # Capture diagonally
-        for dx in [-1, 1]:
-            capture_x = x + dx
-            capture_y = y + direction
-            if 0 <= capture_x < 8 and 0 <= capture_y < 8:
-                target = self.board.get_piece(capture_x, capture_y)
-                if target and target.color != piece.color:
-                    moves.add((capture_x, capture_y))
-                
-                # En passant
-                if self.en_passant_target == (capture_x, capture_y):
-                    moves.add((capture_x, capture_y))
-        
-        return moves
+        return self.board.pawn_moves(x, y, piece.code & BLACK_BIT, self.en_passant_target)
     
     def get_knight_moves(self, x: int, y: int, piece: Piece) -> Set[Tuple[int, int]]:
-        moves = set()
-        knight_moves = [
-            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-            (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
-        
-        for dx, dy in knight_moves:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < 8 and 0 <= ny < 8:
-                target = self.board.get_piece(nx, ny)
-                if target is None or target.color != piece.color:
-                    moves.add((nx, ny))
-        
-        return moves
+        return self.board.step_moves(x, y, piece.code & BLACK_BIT, KNIGHT_TARGETS)
     
     def get_bishop_moves(self, x: int, y: int, piece: Piece) -> Set[Tuple[int, int]]:
-        moves = set()
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            while 0 <= nx < 8 and 0 <= ny < 8:
-                target = self.board.get_piece(nx, ny)
-                if target is None:
-                    moves.add((nx, ny))
-                elif target.color != piece.color:
-                    moves.add((nx, ny))
-                    break
-                else:
-                    break
-                nx += dx
-                ny += dy
-        
-        return moves
+        return self.board.slide_moves(x, y, piece.code & BLACK_BIT, BISHOP_RAYS)
     
     def get_rook_moves(self, x: int, y: int, piece: Piece) -> Set[Tuple[int, int]]:
-        moves = set()
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            while 0 <= nx < 8 and 0 <= ny < 8:
-                target = self.board.get_piece(nx, ny)
-                if target is None:
-                    moves.add((nx, ny))
-                elif target.color != piece.color:
-                    moves.add((nx, ny))
-                    break
-                else:
-                    break
-                nx += dx
-                ny += dy
-        
-        return moves
+        return self.board.slide_moves(x, y, piece.code & BLACK_BIT, ROOK_RAYS)
     
     def get_queen_moves(self, x: int, y: int, piece: Piece) -> Set[Tuple[int, int]]:
-        return self.get_rook_moves(x, y, piece) | self.get_bishop_moves(x, y, piece)
+        return self.board.slide_moves(x, y, piece.code & BLACK_BIT, RAYS)
     
     def get_king_moves(self, x: int, y: int, piece: Piece) -> Set[Tuple[int, int]]:
-        moves = set()
-        
         # Normal king moves
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < 8 and 0 <= ny < 8:
-                    target = self.board.get_piece(nx, ny)
-                    if target is None or target.color != piece.color:
-                        moves.add((nx, ny))
+        moves = self.board.step_moves(x, y, piece.code & BLACK_BIT, KING_TARGETS)
+        squares = self.board.squares
         
         # Castling
         if piece.color == Color.WHITE and not self.board.white_king_moved and y == 7 and x == 4:
             # Kingside castling
-            if not self.board.white_rook_h_moved and self.board.is_empty(5, 7) and self.board.is_empty(6, 7):
-                rook = self.board.get_piece(7, 7)
-                if rook and rook.piece_type == PieceType.ROOK:
+            if not self.board.white_rook_h_moved and not squares[61] and not squares[62]:
+                if squares[63] == ROOK:
                     moves.add((6, 7))
             
             # Queenside castling
-            if not self.board.white_rook_a_moved and self.board.is_empty(1, 7) and self.board.is_empty(2, 7) and self.board.is_empty(3, 7):
-                rook = self.board.get_piece(0, 7)
-                if rook and rook.piece_type == PieceType.ROOK:
+            if not self.board.white_rook_a_moved and not squares[57] and not squares[58] and not squares[59]:
+                if squares[56] == ROOK:
                     moves.add((2, 7))
         
         elif piece.color == Color.BLACK and not self.board.black_king_moved and y == 0 and x == 4:
             # Kingside castling
-            if not self.board.black_rook_h_moved and self.board.is_empty(5, 0) and self.board.is_empty(6, 0):
-                rook = self.board.get_piece(7, 0)
-                if rook and rook.piece_type == PieceType.ROOK:
+            if not self.board.black_rook_h_moved and not squares[5] and not squares[6]:
+                if squares[7] == ROOK | BLACK_BIT:
                     moves.add((6, 0))
             
             # Queenside castling
-            if not self.board.black_rook_a_moved and self.board.is_empty(1, 0) and self.board.is_empty(2, 0) and self.board.is_empty(3, 0):
-                rook = self.board.get_piece(0, 0)
-                if rook and rook.piece_type == PieceType.ROOK:
+            if not self.board.black_rook_a_moved and not squares[1] and not squares[2] and not squares[3]:
+                if squares[0] == ROOK | BLACK_BIT:
                     moves.add((2, 0))
         
         return moves
     
     def get_valid_moves(self, x: int, y: int) -> Set[Tuple[int, int]]:
-        piece = self.board.get_piece(x, y)
-        if piece is None or piece.color != self.current_player:
-            return set()
-        
-        if piece.piece_type == PieceType.PAWN:
-            moves = self.get_pawn_moves(x, y, piece)
-        elif piece.piece_type == PieceType.KNIGHT:
-            moves = self.get_knight_moves(x, y, piece)
-        elif piece.piece_type == PieceType.BISHOP:
-            moves = self.get_bishop_moves(x, y, piece)
-        elif piece.piece_type == PieceType.ROOK:
-            moves = self.get_rook_moves(x, y, piece)
-        elif piece.piece_type == PieceType.QUEEN:
-            moves = self.get_queen_moves(x, y, piece)
-        elif piece.piece_type == PieceType.KING:
-            moves = self.get_king_moves(x, y, piece)
-        else:
-            moves = set()
-        
-        # Filter moves that leave king in check
-        legal_moves = set()
-        for move_x, move_y in moves:
-            if not self.move_leaves_king_in_check(x, y, move_x, move_y):
-                legal_moves.add((move_x, move_y))
-        
-        return legal_moves
+        return self.status.targets.get((x, y), frozenset())
     
     def is_under_attack(self, x: int, y: int, by_color: Color) -> bool:
-        for row in range(8):
-            for col in range(8):
-                piece = self.board.get_piece(col, row)
-                if piece and piece.color == by_color:
-                    moves = self.get_pseudo_legal_moves(col, row, piece)
-                    if (x, y) in moves:
-                        return True
-        return False
+        return self.board.square_attacked(y * 8 + x, COLOR_BITS[by_color])
+    
+    def attackers_of(self, square: Tuple[int, int], color: Color) -> List[Tuple[int, int]]:
+        """Casas (x, y) das peças de color que atacam square"""
+        x, y = square
+        return [(attacker % 8, attacker // 8) for attacker in self.board.attackers_of(y * 8 + x, color)]
     
     def get_pseudo_legal_moves(self, x: int, y: int, piece: Piece) -> Set[Tuple[int, int]]:
-        if piece.piece_type == PieceType.PAWN:
-            return self.get_pawn_moves(x, y, piece)
-        elif piece.piece_type == PieceType.KNIGHT:
-            return self.get_knight_moves(x, y, piece)
-        elif piece.piece_type == PieceType.BISHOP:
-            return self.get_bishop_moves(x, y, piece)
-        elif piece.piece_type == PieceType.ROOK:
-            return self.get_rook_moves(x, y, piece)
-        elif piece.piece_type == PieceType.QUEEN:
-            return self.get_queen_moves(x, y, piece)
-        elif piece.piece_type == PieceType.KING:
-            moves = set()
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    if dx == 0 and dy == 0:
-                        continue
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < 8 and 0 <= ny < 8:
-                        target = self.board.get_piece(nx, ny)
-                        if target is None or target.color != piece.color:
-                            moves.add((nx, ny))
-            return moves
-        return set()
+        return self.board.pseudo_legal_moves(x, y, self.en_passant_target)
     
     def move_leaves_king_in_check(self, from_x: int, from_y: int, to_x: int, to_y: int) -> bool:
-        # Save current state
-        piece = self.board.get_piece(from_x, from_y)
-        captured = self.board.get_piece(to_x, to_y)
-        en_passant_capture = False
-        
-        # Make the move
-        self.board.set_piece(to_x, to_y, piece)
-        self.board.set_piece(from_x, from_y, None)
-        
-        # Handle en passant capture
-        if piece.piece_type == PieceType.PAWN and self.en_passant_target == (to_x, to_y):
-            ep_x, ep_y = to_x, to_y
-            direction = -1 if piece.color == Color.WHITE else 1
-            ep_y -= direction
-            ep_piece = self.board.get_piece(ep_x, ep_y)
-            self.board.set_piece(ep_x, ep_y, None)
-            en_passant_capture = True
-        
-        # Check if king is in check
-        king_pos = self.board.find_king(piece.color)
-        opponent_color = Color.BLACK if piece.color == Color.WHITE else Color.WHITE
-        in_check = self.is_under_attack(king_pos[0], king_pos[1], opponent_color)
-        
-        # Restore state
-        self.board.set_piece(from_x, from_y, piece)
-        self.board.set_piece(to_x, to_y, captured)
-        if en_passant_capture:
-            self.board.set_piece(ep_x, ep_y, ep_piece)
-        
+        board = self.board
+        color_bit = board.squares[from_y * 8 + from_x] & BLACK_BIT
+        undo = board.make(board.infer_move(from_y * 8 + from_x, to_y * 8 + to_x))
+        in_check = board.square_attacked(board.king_squares[color_bit >> 3], color_bit ^ BLACK_BIT)
+        board.unmake(undo)
         return in_check
     
     def make_move(self, from_x: int, from_y: int, to_x: int, to_y: int) -> bool:
-        piece = self.board.get_piece(from_x, from_y)
-        if piece is None or piece.color != self.current_player:
+        # Validate against the cached legal-move table
+        move = self.status.find(from_y * 8 + from_x, to_y * 8 + to_x)
+        if move is None:
             return False
-        
-        if (to_x, to_y) not in self.get_valid_moves(from_x, from_y):
+        return self.play_move(move)
+    
+    def play_move(self, move: int) -> bool:
+        """Joga um lance compactado exatamente como veio (peça de promoção incluída), se for legal"""
+        if move not in self.status.moves.get(move & 63, ()):
             return False
         
-        # Save move history
-        captured = self.board.get_piece(to_x, to_y)
-        self.board.move_history.append((from_x, from_y, to_x, to_y, captured))
-        
-        # Move piece
-        self.board.set_piece(to_x, to_y, piece)
-        self.board.set_piece(from_x, from_y, None)
-        
-        # Handle special moves
-        # En passant capture
-        if piece.piece_type == PieceType.PAWN and self.en_passant_target == (to_x, to_y):
-            direction = -1 if piece.color == Color.WHITE else 1
-            capture_y = to_y - direction
-            self.board.set_piece(to_x, capture_y, None)
-        
-        # Pawn promotion
-        if piece.piece_type == PieceType.PAWN:
-            if (piece.color == Color.WHITE and to_y == 0) or (piece.color == Color.BLACK and to_y == 7):
-                piece.piece_type = PieceType.QUEEN
-            
-            # Check for en passant possibility
-            if abs(to_y - from_y) == 2:
-                self.en_passant_target = (to_x, from_y + (to_y - from_y) // 2)
-            else:
-                self.en_passant_target = None
-        else:
-            self.en_passant_target = None
-        
-        # Castling
-        if piece.piece_type == PieceType.KING:
-            if piece.color == Color.WHITE:
-                self.board.white_king_moved = True
-            else:
-                self.board.black_king_moved = True
-            
-            # Move rook for castling
-            if from_x == 4 and to_x == 6:  # Kingside
-                rook = self.board.get_piece(7, to_y)
-                if rook and rook.piece_type == PieceType.ROOK:
-                    self.board.set_piece(7, to_y, None)
-                    self.board.set_piece(5, to_y, rook)
-                    if piece.color == Color.WHITE:
-                        self.board.white_rook_h_moved = True
-                    else:
-                        self.board.black_rook_h_moved = True
-            
-            elif from_x == 4 and to_x == 2:  # Queenside
-                rook = self.board.get_piece(0, to_y)
-                if rook and rook.piece_type == PieceType.ROOK:
-                    self.board.set_piece(0, to_y, None)
-                    self.board.set_piece(3, to_y, rook)
-                    if piece.color == Color.WHITE:
-                        self.board.white_rook_a_moved = True
-                    else:
-                        self.board.black_rook_a_moved = True
-        
-        elif piece.piece_type == PieceType.ROOK:
-            if piece.color == Color.WHITE:
-                if from_x == 0:
-                    self.board.white_rook_a_moved = True
-                elif from_x == 7:
-                    self.board.white_rook_h_moved = True
-            else:
-                if from_x == 0:
-                    self.board.black_rook_a_moved = True
-                elif from_x == 7:
-                    self.board.black_rook_h_moved = True
+        # Move piece (special moves, castling flags and turn handled by the board)
+        # and save it in the game tree (a new variation if we are behind the last move)
+        self.tree.play(move)
+        self._status = None
         
         # Play sound
-        if captured:
-            self.play_sound('move')
-        else:
-            self.play_sound('move')
-        
-        # Switch player
-        self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
+        self.play_sound('move')
         
         # Check game state
         self.update_game_state()
         
+        # Resposta fora da previsão (ou fim de partida): o ponder não tem mais o que buscar
+        if self.ai is not None:
+            self.ai.check_ponder(None if self.game_over else self.board.key)
+        
         return True
     
     def has_legal_moves(self, color: Color) -> bool:
-        for y in range(8):
-            for x in range(8):
-                piece = self.board.get_piece(x, y)
-                if piece and piece.color == color:
-                    if self.get_valid_moves(x, y):
-                        return True
-        return False
+        if color == self.current_player:
+            return bool(self.status.moves)
+        return self.board.has_any_legal_move(COLOR_BITS[color])
     
     def is_in_check(self, color: Color) -> bool:
         king_pos = self.board.find_king(color)
@@ -568,18 +1156,17 @@ class ChessGame:
         return self.is_under_attack(king_pos[0], king_pos[1], opponent_color)
     
     def update_game_state(self):
-        current_in_check = self.is_in_check(self.current_player)
-        has_moves = self.has_legal_moves(self.current_player)
+        status = self.status
         
-        if not has_moves:
+        if status.result:
             self.game_over = True
-            if current_in_check:
+            if status.result == 'checkmate':
                 opponent = Color.WHITE if self.current_player == Color.BLACK else Color.BLACK
                 self.winner = opponent
                 self.play_sound('mate')
             else:
                 self.play_sound('move')
-        elif current_in_check:
+        elif status.in_check:
             self.play_sound('check')
     
     def move_piece(self, from_x: int, from_y: int, to_x: int, to_y: int, is_check: bool = True) -> bool:
@@ -690,6 +1277,9 @@ class ChessGame:
         # Status da IA
         if self.ai_enabled:
             ai_label = "IA" if self.current_player == self.ai_color else "Você"
+            progress = self.ai.progress
+            if self.ai_thinking and progress['depth']:
+                ai_label += f" (prof. {progress['depth']}, {progress['nodes'] // 1000}k nós)"
             time_text = self.font.render(f"Vez: {ai_label}", True, self.DARK_COLOR)
             self.window.blit(time_text, (10, 10))
         
@@ -707,11 +1297,11 @@ class ChessGame:
             if self.winner:
                 text = f"Xeque-mate - {self.winner.name.capitalize()} venceu!"
             else:
-                text = "Afogamento - Empate!"
+                text = self.DRAW_TEXTS.get(self.status.result, "Empate!")
             status_text = self.font.render(text, True, (255, 0, 0))
             self.window.blit(status_text, (10, 50))
         else:
-            if self.is_in_check(self.current_player):
+            if self.status.in_check:
                 text = f"Xeque - {self.current_player.name.capitalize()}"
                 status_text = self.font.render(text, True, (255, 100, 100))
                 self.window.blit(status_text, (10, 50))
@@ -725,7 +1315,8 @@ class ChessGame:
     
     def run(self):
         running = True
-        ai_move_timer = 0
+        frame_time = 1 / self.FPS
+        next_frame = time.perf_counter()
         while running:
             for event in pg.event.get():
                 if event.type == pg.QUIT:
@@ -737,41 +1328,135 @@ class ChessGame:
                     if event.key == pg.K_ESCAPE:
                         running = False
                     elif event.key == pg.K_n:
-                        self.__init__()
+                        self.new_game()
                     elif event.key == pg.K_u:
                         self.undo_move()
+                    elif event.key == pg.K_r:
+                        self.redo_move()
+                elif event.type == AI_MOVE_EVENT:
+                    self.play_ai_move(event)
             
-            # AI faz seu movimento
-            if self.ai_enabled and self.current_player == self.ai_color and not self.game_over:
-                ai_move_timer += 1
-                # Aguarda tempo configurado pela dificuldade
-                if ai_move_timer >= self.ai_response_time:
-                    ai_move_timer = 0
-                    ai_move = self.ai.get_best_move(self, self.ai_color)
-                    if ai_move:
-                        from_x, from_y, to_x, to_y = ai_move
-                        self.make_move(from_x, from_y, to_x, to_y)
+            # AI pensa em segundo plano (o tempo de busca vem da dificuldade); a janela
+            # continua desenhando e respondendo enquanto isso
+            if self.ai_enabled and self.current_player == self.ai_color and not self.game_over \
+                    and not self.ai_thinking:
+                self.ai_thinking = True
+                self.ai.think(self)
             
-            self.clock.tick(60)
+            # Quadros em horário absoluto: com a IA pensando em outra thread, a espera pelo GIL
+            # depois de dormir entra na conta do quadro seguinte (clock.tick a perderia, ~45 FPS)
+            next_frame += frame_time
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_frame = time.perf_counter()
             self.draw()
         
+        self.stop_ai()
+        if self.ai is not None:
+            self.ai.close()
         pg.quit()
     
-    def undo_move(self):
-        if not self.board.move_history:
+    def new_game(self):
+        """Recomeça a partida com a mesma configuração (motor, dificuldade, tabela, ponder, processos)"""
+        self.stop_ai()
+        if self.ai is not None:
+            self.ai.close()
+        self.__init__(**self._settings)
+    
+    def play_ai_move(self, event: pg.event.Event):
+        """Joga o lance de um AI_MOVE_EVENT, se ainda é da posição atual"""
+        if not self.ai_thinking or event.key != self.board.key:
             return
+        self.ai_thinking = False
+        if event.move:
+            self.play_move(event.move)
+            if self.ai_ponder and not self.game_over:
+                self.ai.ponder(self)
+    
+    def stop_ai(self):
+        """Cancela o que a IA estiver pensando em segundo plano"""
+        if self.ai is not None:
+            self.ai.stop_thinking()
+            self.ai.stop_pondering()
+        self.ai_thinking = False
+    
+    def load_fen(self, fen: str):
+        """Recomeça a partida a partir de uma posição FEN (sem histórico de lances)"""
+        from position import board_from_fen
+        self.stop_ai()
+        self.board = board_from_fen(fen, type(self.board))
+        self.tree = GameTree(self.board)
+        self._status = None
         
-        from_x, from_y, to_x, to_y, captured = self.board.move_history.pop()
-        piece = self.board.get_piece(to_x, to_y)
+        self.selected_square = None
+        self.valid_moves = set()
+        self.game_over = False
+        self.winner = None
+        self.update_game_state()
+    
+    def undo_move(self):
+        self.stop_ai()
+        if self.tree.undo() is None:
+            return
+        self._status = None
         
-        self.board.set_piece(from_x, from_y, piece)
-        self.board.set_piece(to_x, to_y, captured)
+        self.selected_square = None
+        self.valid_moves = set()
+        self.game_over = False
+        self.winner = None
+    
+    def redo_move(self):
+        self.stop_ai()
+        if self.tree.redo() is None:
+            return
+        self._status = None
         
-        self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
         self.selected_square = None
         self.valid_moves = set()
+        self.update_game_state()
+
+# Nota de xeque-mate: quem é mateado em ply plies a partir da raiz vale -(MATE - ply), então
+# o mate mais curto vale mais e a defesa mais longa vale mais para quem perde. Notas com
+# valor absoluto acima de MATE_BOUND são mates (a avaliação nunca chega perto disso)
+MATE = 100000.0
+MATE_BOUND = MATE - 1000
+
+
+def score_to_table(score: float, ply: int) -> float:
+    """Nota de mate relativa à raiz -> relativa ao nó (como a tabela de transposição guarda)"""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score: float, ply: int) -> float:
+    """Nota de mate lida da tabela -> relativa à raiz da busca atual"""
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchPosition:
+    """Cópia da posição com o que a busca lê de ChessGame, para buscar fora da interface
+
+    A busca faz e desfaz lances no tabuleiro; numa cópia ela pode rodar em
+    outra thread enquanto a interface desenha e joga no tabuleiro da partida.
+    """
+    
+    def __init__(self, board: Board):
+        self.board = board.copy()
         self.game_over = False
         self.winner = None
+    
+    def is_under_attack(self, x: int, y: int, by_color: Color) -> bool:
+        return self.board.square_attacked(y * 8 + x, COLOR_BITS[by_color])
+
 
 class ChessAI:
     """Inteligência Artificial para jogar Xadrez"""
@@ -785,148 +1470,866 @@ class ChessAI:
         PieceType.QUEEN: 9,
         PieceType.KING: 1000
     }
+    # Mesmos valores indexados pelo código inteiro do tipo (tabuleiro compacto)
+    _CODE_VALUES = [0] + list(map(PIECE_VALUES.get, PieceType))
+    # d5, e5, d4, e4
+    _CENTER_SQUARES = frozenset((27, 28, 35, 36))
+    # Dificuldade -> (profundidade máxima, tempo por lance em segundos)
+    LEVELS = {
+        'easy': (1, 0.0),       # lance aleatório, imediato
+        'medium': (3, 0.3),
+        'hard': (32, 1.5),
+    }
+    # O relógio é consultado a cada STOP_CHECK_NODES nós (potência de dois)
+    STOP_CHECK_NODES = 256
+    # Plies extras que a busca de quiescência pode descer além da profundidade nominal
+    QUIESCENCE_PLIES = 32
+    # Busca seletiva: cada técnica pode ser desligada em ai.pruning para medir o seu efeito
+    PRUNING = frozenset(('null_move', 'lmr', 'futility', 'reverse_futility', 'razoring'))
+    # Margens em peões, indexadas pela profundidade restante
+    FUTILITY_MARGINS = (0.0, 2.0, 4.0)
+    DELTA_MARGIN = 2.0
+    REVERSE_FUTILITY_MARGINS = (0.0, 1.5, 3.0, 4.5)
+    RAZOR_MARGINS = (0.0, 3.0, 4.5, 6.0)
+    # Janela "vazia": as notas andam em décimos de peão, meio décimo separa passar ou não
+    NULL_WINDOW = 0.05
+    # Janela de aspiração em volta da nota da iteração anterior (0 desliga); dobra a cada falha
+    # e passa a infinita quando chega a ASPIRATION_LIMIT
+    ASPIRATION_WINDOW = 1.0
+    ASPIRATION_LIMIT = 16.0
+    # Entre jogadas o histórico é dividido por 2 ** HISTORY_AGING (cortes recentes pesam mais)
+    HISTORY_AGING = 2
     
-    def __init__(self, difficulty: str = 'medium'):
+    def __init__(self, difficulty: str = 'medium', hash_mb: float = DEFAULT_HASH_MB, workers: int = 1):
         """
         Inicializa a IA
         difficulty: 'easy', 'medium' ou 'hard'
+        hash_mb: memória da tabela de transposição em MB (0 desliga a tabela)
+        workers: processos da busca paralela na raiz (1 = busca sequencial); as
+                 tabelas deles dividem outros hash_mb entre si
         """
         self.difficulty = difficulty
-        self.max_depth = {
-            'easy': 1,
-            'medium': 3,
-            'hard': 5
-        }.get(difficulty, 3)
+        self.hash_mb = hash_mb
+        # Busca paralela: pool de processos (parallel.RootSplitPool), criado na primeira busca
+        self.workers = workers
+        self._pool = None
+        self._search_count = 0
+        self.max_depth, self.move_time = self.LEVELS.get(difficulty, self.LEVELS['medium'])
         self.eval_count = 0
+        # Nós visitados, profundidade completada e nota da última busca
+        self.nodes = 0
+        self.depth_reached = 0
+        self.score = 0.0
+        # Parada cooperativa: prazo (perf_counter) e pedido de parada, lidos durante a busca;
+        # soft_deadline é o último momento para abrir mais uma iteração
+        self._search_start = 0.0
+        self._deadline = None
+        self._soft_deadline = None
+        self._stopped = False
+        # Ordenação: buffers (capturas, calmos) e dois killers por ply, resposta a cada lance
+        # (origem, destino) e histórico "butterfly" por lado, origem e destino
+        self._move_buffers = []
+        self._killers = []
+        self._reserve_plies(self.max_depth)
+        self._countermoves = [0] * 4096
+        self._history = [0] * 8192
+        # Variante principal da última busca (lances compactados a partir da raiz) e a chave
+        # da posição esperada depois do nosso lance e da resposta prevista
+        self.pv = []
+        self._predicted_key = None
+        self._predicted_line = []
+        self.predicted = False
+        # Ponder: thread pensando na posição depois da resposta prevista, a chave dessa posição
+        # e o lance que ela achou; pondered diz se o último lance veio de um acerto
+        self._ponder_thread = None
+        self._ponder_key = None
+        self._ponder_move = 0
+        self.pondered = False
+        # A busca de ponder já envelheceu killers e histórico para o ply da resposta
+        self._ponder_aged = False
+        # Busca de think() em segundo plano e o progresso dela, atualizado a cada iteração
+        self._think_thread = None
+        self._cancelled = False
+        self.progress = {'depth': 0, 'nodes': 0, 'score': 0.0, 'move': None}
+        # Técnicas de poda ligadas (subconjunto de PRUNING)
+        self.pruning = set(self.PRUNING)
+        # Cortes beta da última busca e quantos vieram do primeiro lance tentado
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # Tabela de transposição (mantida entre jogadas; a idade separa as buscas)
+        self.tt = TranspositionTable(hash_mb) if hash_mb and difficulty != 'easy' else None
     
-    def get_best_move(self, game: 'ChessGame', color: Color) -> Optional[Tuple[int, int, int, int]]:
-        """Retorna o melhor movimento para a cor dada"""
-        import random
-        
-        # Coletar todos os movimentos possíveis
-        all_moves = []
-        for y in range(8):
-            for x in range(8):
-                piece = game.board.get_piece(x, y)
-                if piece and piece.color == color:
-                    moves = game.get_piece_moves(x, y)
-                    for to_x, to_y in moves:
-                        all_moves.append((x, y, to_x, to_y))
-        
-        if not all_moves:
+    def get_best_move(self, game: 'ChessGame', color: Color, move_time: Optional[float] = None,
+                      clock: Optional[float] = None, increment: float = 0.0) -> Optional[Tuple[int, int, int, int]]:
+        """Retorna o melhor movimento para a cor dada
+
+        O tempo de busca é move_time, ou uma fatia de clock (tempo restante) mais
+        o increment; sem nenhum dos dois, o tempo da dificuldade.
+        """
+        board = game.board
+        if board.turn != COLOR_BITS[color]:
             return None
         
         # Fácil: retorna um movimento aleatório
         if self.difficulty == 'easy':
-            return random.choice(all_moves)
-        
-        # Médio e Difícil: usar minimax
-        best_move = all_moves[0]
-        best_score = float('-inf')
-        
-        for from_x, from_y, to_x, to_y in all_moves:
-            # Fazer o movimento temporariamente
-            captured_piece = game.board.get_piece(to_x, to_y)
-            piece = game.board.get_piece(from_x, from_y)
-            
-            # Salvar estado
-            old_current_player = game.current_player
-            old_game_over = game.game_over
-            old_winner = game.winner
-            
-            # Executar movimento manualmente sem registrar no histórico
-            game.board.set_piece(to_x, to_y, piece)
-            game.board.set_piece(from_x, from_y, None)
-            game.current_player = Color.BLACK if game.current_player == Color.WHITE else Color.WHITE
-            
-            # Avaliar posição
-            score = self._minimax(game, self.max_depth - 1, False, color)
-            
-            # Restaurar estado
-            game.board.set_piece(from_x, from_y, piece)
-            game.board.set_piece(to_x, to_y, captured_piece)
-            game.current_player = old_current_player
-            game.game_over = old_game_over
-            game.winner = old_winner
-            
-            if score > best_score:
-                best_score = score
-                best_move = (from_x, from_y, to_x, to_y)
+            all_moves = board.legal_moves()
+            return move_to_coordinates(random.choice(all_moves)) if all_moves else None
         
+        # Médio e Difícil: aprofundamento iterativo dentro do tempo
+        ponder_thread = self._start_move(board, self.time_budget(move_time, clock, increment))
+        best_move = self._finish_move(game, ponder_thread)
+        return move_to_coordinates(best_move) if best_move else None
+    
+    def think(self, game: 'ChessGame', move_time: Optional[float] = None, clock: Optional[float] = None,
+              increment: float = 0.0):
+        """Busca o lance do lado que joga em outra thread, numa cópia da posição, e volta na hora
+
+        O progresso (profundidade, nós, nota e lance da última iteração) fica em
+        progress. No fim é postado um AI_MOVE_EVENT com move (lance compactado,
+        com a peça de promoção; 0 se não há lances) e key (chave da posição buscada). stop() faz a busca acabar já com
+        o melhor lance até ali; stop_thinking() a cancela sem postar nada.
+        """
+        self.stop_thinking()
+        position = SearchPosition(game.board)
+        self.progress = {'depth': 0, 'nodes': 0, 'score': 0.0, 'move': None}
+        self._cancelled = False
+        ponder_thread = None
+        if self.difficulty != 'easy':
+            # Prazos, contadores e stop() valem já aqui, antes de a thread começar
+            ponder_thread = self._start_move(position.board, self.time_budget(move_time, clock, increment))
+        self._think_thread = threading.Thread(target=self._think, args=(position, ponder_thread), daemon=True)
+        self._think_thread.start()
+    
+    def _think(self, position: 'SearchPosition', ponder_thread: Optional[threading.Thread]):
+        if self.difficulty == 'easy':
+            moves = position.board.legal_moves()
+            move = random.choice(moves) if moves else 0
+        else:
+            move = self._finish_move(position, ponder_thread)
+        if not self._cancelled:
+            pg.event.post(pg.event.Event(AI_MOVE_EVENT, move=move, key=position.board.key))
+    
+    @property
+    def thinking(self) -> bool:
+        """Há uma busca de think() rodando"""
+        thread = self._think_thread
+        return thread is not None and thread.is_alive()
+    
+    def stop_thinking(self):
+        """Cancela a busca de think() em andamento; o lance dela não é postado"""
+        thread = self._think_thread
+        if thread is None:
+            return
+        self._think_thread = None
+        self._cancelled = True
+        self.stop()
+        thread.join()
+    
+    def _start_move(self, board: Board, move_time: float) -> Optional[threading.Thread]:
+        """Prepara a busca do lance na thread de quem chama
+
+        Num acerto do ponder devolve a thread de ponder, que continua com o
+        prazo contado desde o seu começo (se a IA já pensou o bastante, a
+        resposta sai quase na hora); senão prepara uma busca nova e devolve None.
+        """
+        thread = self._ponder_thread
+        self.pondered = thread is not None and board.key == self._ponder_key
+        if self.pondered:
+            self._ponder_thread = None
+            self._set_time(move_time)
+            return thread
+        # Previsão errada (ou sem ponder): a tabela continua valendo; killers e histórico
+        # só envelhecem se a busca de ponder (mesmo ply desta) já não os envelheceu
+        self.stop_pondering()
+        age = thread is None and not self._ponder_aged
+        self._ponder_aged = False
+        self._begin_search(board, self.max_depth, move_time, age=age)
+        return None
+    
+    def _finish_move(self, game: 'ChessGame', ponder_thread: Optional[threading.Thread]) -> int:
+        """Roda (ou espera, num acerto do ponder) a busca preparada por _start_move"""
+        if ponder_thread is not None:
+            ponder_thread.join()
+            return self._ponder_move
+        return self._iterate(game, self.max_depth)
+    
+    def time_budget(self, move_time: Optional[float] = None, clock: Optional[float] = None,
+                    increment: float = 0.0) -> float:
+        """Segundos para este lance"""
+        if move_time is not None:
+            return move_time
+        if clock is not None:
+            # ~30 lances ainda por jogar, sem nunca gastar mais da metade do relógio
+            return max(min(clock / 30 + increment * 0.75, clock / 2), 0.01)
+        return self.move_time
+    
+    def search_stats(self) -> dict:
+        """Nós, profundidade e qualidade da ordenação da última busca"""
+        stats = {
+            'nodes': self.nodes,
+            'depth': self.depth_reached,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            'predicted': self.predicted,
+            'pondered': self.pondered,
+        }
+        if self.tt is not None:
+            stats.update(('tt_' + name, value) for name, value in self.tt.stats().items())
+        return stats
+    
+    def stop(self):
+        """Pede para a busca em andamento parar (seguro a partir de outra thread)"""
+        self._stopped = True
+    
+    def search(self, game: 'ChessGame', max_depth: Optional[int] = None, move_time: Optional[float] = None) -> int:
+        """Aprofundamento iterativo até max_depth ou até acabar move_time (None = sem limite)
+
+        Cada iteração começa pelo melhor lance da anterior, então mesmo uma
+        iteração interrompida só troca o lance por outro que já se mostrou
+        melhor. Devolve o lance compactado (0 se não há lances).
+
+        Nada recomeça do zero entre jogadas: tabela, killers, respostas e
+        histórico (envelhecido) continuam, e se o adversário jogou a resposta
+        prevista a variante principal anterior abre a busca.
+        """
+        max_depth = max_depth or self.max_depth
+        self._begin_search(game.board, max_depth, move_time)
+        return self._iterate(game, max_depth)
+    
+    def ponder(self, game: 'ChessGame') -> bool:
+        """Pensa, em outra thread, na posição depois da resposta prevista ao nosso lance
+
+        Chamado logo depois de jogar o lance da IA, enquanto o adversário pensa.
+        A busca roda numa cópia do tabuleiro e sem prazo: se o adversário jogar
+        a resposta prevista, get_best_move e think continuam essa busca;
+        senão ela é cancelada e só a tabela de transposição é aproveitada.
+        Devolve False se não há resposta prevista.
+        """
+        self.stop_pondering()
+        board = game.board
+        if self.difficulty == 'easy' or len(self.pv) < 2 or self.pv[1] not in board.legal_moves():
+            return False
+        position = SearchPosition(board)
+        position.board.make(self.pv[1])
+        if position.board.key != self._predicted_key:
+            return False
+        # Contadores e stop() valem já aqui, antes de a thread começar
+        self._begin_search(position.board, self.max_depth, None)
+        self._ponder_aged = True
+        self._ponder_key = position.board.key
+        self._ponder_move = 0
+        self._ponder_thread = threading.Thread(target=self._ponder, args=(position,), daemon=True)
+        self._ponder_thread.start()
+        return True
+    
+    def _ponder(self, position: 'SearchPosition'):
+        self._ponder_move = self._iterate(position, self.max_depth)
+    
+    @property
+    def pondering(self) -> bool:
+        return self._ponder_thread is not None
+    
+    def check_ponder(self, key: Optional[int]):
+        """Cancela o ponder se a posição da partida (key; None = partida terminada) não é a prevista"""
+        if self._ponder_thread is not None and key != self._ponder_key:
+            self.stop_pondering()
+    
+    def stop_pondering(self):
+        """Cancela o ponder em andamento (desfazer, novo jogo, resposta não prevista)"""
+        thread = self._ponder_thread
+        if thread is None:
+            return
+        self._ponder_thread = None
+        self.stop()
+        thread.join()
+    
+    def _begin_search(self, board: Board, max_depth: int, move_time: Optional[float], age: bool = True):
+        """Zera contadores e prazos de uma busca nova; age envelhece as tabelas da jogada anterior"""
+        self._reserve_plies(max_depth)
+        self.nodes = 0
+        self.depth_reached = 0
+        self.cutoffs = self.first_move_cutoffs = 0
+        self._stopped = False
+        self._search_start = time.perf_counter()
+        self._set_time(move_time)
+        self._search_count += 1
+        if self.tt is not None:
+            self.tt.new_search()
+        self._predicted_line = self._age_search_state(board) if age else []
+    
+    def _set_time(self, move_time: Optional[float]):
+        """Prazos contados do começo da busca: move_time para parar, metade para não abrir outra iteração"""
+        start = self._search_start
+        self._soft_deadline = None if move_time is None else start + move_time / 2
+        self._deadline = None if move_time is None else start + move_time
+    
+    def _iterate(self, game: 'ChessGame', max_depth: int) -> int:
+        """Laço do aprofundamento iterativo (depois de _begin_search)"""
+        board = game.board
+        predicted = self._predicted_line
+        best_move = predicted[0] if predicted else 0
+        if not best_move:
+            # Parando antes de completar a profundidade 1, ainda há um lance legal para jogar
+            entry = self.tt.probe(board.key) if self.tt is not None else None
+            best_move = next(self._ordered_moves(board, 0, entry[0] if entry else 0), 0)
+        score = 0.0
+        for depth in range(1, max_depth + 1):
+            # Aspiração: janela estreita em volta da última nota; falhando, alarga só o lado que falhou
+            window = self.ASPIRATION_WINDOW
+            if depth > 1 and window and abs(score) < MATE_BOUND:
+                alpha, beta = score - window, score + window
+            else:
+                alpha, beta = float('-inf'), float('inf')
+            while True:
+                move, value = self._search_root(game, depth, best_move, alpha, beta)
+                if self._stopped or not move:
+                    break
+                window *= 2
+                if value <= alpha:
+                    alpha = score - window if window < self.ASPIRATION_LIMIT else float('-inf')
+                elif value >= beta:
+                    # Falha alta: o lance que passou de beta é o primeiro da nova tentativa
+                    best_move = move
+                    beta = score + window if window < self.ASPIRATION_LIMIT else float('inf')
+                else:
+                    break
+            if move:
+                best_move = move
+            if self._stopped:
+                break
+            score = value
+            self.depth_reached, self.score = depth, score
+            self.progress = {'depth': depth, 'nodes': self.nodes, 'score': score,
+                             'move': move_to_coordinates(best_move) if best_move else None}
+            # Mate encontrado, ou a próxima iteração (bem mais cara) não caberia no tempo
+            if abs(score) >= MATE_BOUND:
+                break
+            soft_deadline = self._soft_deadline
+            if soft_deadline is not None and time.perf_counter() > soft_deadline:
+                break
+        self._deadline = None
+        self._remember_pv(board, best_move)
         return best_move
     
-    def _minimax(self, game: 'ChessGame', depth: int, is_maximizing: bool, ai_color: Color) -> float:
-        """Algoritmo Minimax com profundidade limitada"""
-        # Avaliar posição terminal
-        if depth == 0 or game.game_over:
-            return self._evaluate_board(game, ai_color)
-        
-        opponent_color = Color.BLACK if ai_color == Color.WHITE else Color.WHITE
-        current_color = ai_color if is_maximizing else opponent_color
-        
-        # Coletar todos os movimentos possíveis para a cor atual
-        all_moves = []
-        for y in range(8):
-            for x in range(8):
-                piece = game.board.get_piece(x, y)
-                if piece and piece.color == current_color:
-                    moves = game.get_piece_moves(x, y)
-                    for to_x, to_y in moves:
-                        all_moves.append((x, y, to_x, to_y))
+    def _age_search_state(self, board: Board) -> List[int]:
+        """Prepara as tabelas da jogada anterior para esta busca; devolve a linha prevista
+
+        Dois plies se passaram (o nosso lance e a resposta): os killers descem
+        dois plies e o histórico perde peso. Se a posição é a que a variante
+        principal previa, o resto dela volta para a tabela como lances a tentar
+        primeiro e é devolvido.
+        """
+        killers = self._killers
+        killers[:] = killers[2:] + [[0, 0] for _ in range(min(2, len(killers)))]
+        shift = self.HISTORY_AGING
+        self._history = [value >> shift for value in self._history]
+        
+        self.predicted = bool(self.pv) and board.key == self._predicted_key
+        predicted = self.pv[2:] if self.predicted else []
+        self._seed_line(board, predicted)
+        return predicted
+    
+    def _seed_line(self, board: Board, line: List[int]):
+        """Guarda os lances de line (a partir da posição atual) na tabela como lances a tentar primeiro"""
+        tt = self.tt
+        if tt is None:
+            return
+        # Profundidade 0: só ordena, nunca corta
+        undos = []
+        for move in line:
+            entry = tt.probe(board.key)
+            if not entry or not entry[0]:
+                tt.store(board.key, 0, UPPER, 0.0, move)
+            undos.append(board.make(move))
+        for undo in reversed(undos):
+            board.unmake(undo)
+    
+    def _table_line(self, board: Board, length: int) -> List[int]:
+        """Até length lances seguindo a tabela a partir da posição atual (legais, sem repetir posição)"""
+        line = []
+        undos = []
+        seen = {board.key}
+        tt = self.tt
+        while tt is not None and len(line) < length:
+            entry = tt.probe(board.key)
+            move = entry[0] if entry else 0
+            if not move or not board.is_legal(move):
+                break
+            line.append(move)
+            undos.append(board.make(move))
+            if board.key in seen:
+                break
+            seen.add(board.key)
+        for undo in reversed(undos):
+            board.unmake(undo)
+        return line
+    
+    def _remember_pv(self, board: Board, best_move: int):
+        """Guarda a variante principal (seguindo os lances da tabela) e a posição que ela prevê"""
+        self.pv = []
+        self._predicted_key = None
+        if not best_move:
+            return
+        undo = board.make(best_move)
+        self.pv = [best_move] + self._table_line(board, max(self.depth_reached, 2) - 1)
+        if len(self.pv) >= 2:
+            reply = board.make(self.pv[1])
+            self._predicted_key = board.key
+            board.unmake(reply)
+        board.unmake(undo)
+    
+    def _reserve_plies(self, depth: int):
+        """Garante buffers e killers para uma busca até depth (mais a quiescência)"""
+        while len(self._killers) <= depth:
+            self._killers.append([0, 0])
+        while len(self._move_buffers) <= depth + self.QUIESCENCE_PLIES:
+            self._move_buffers.append(([], []))
+    
+    def _search_root(self, game: 'ChessGame', depth: int, first_move: int = 0,
+                     alpha: float = float('-inf'), beta: float = float('inf')) -> Tuple[int, float]:
+        """Uma busca alfa-beta de profundidade fixa; devolve (lance, nota) dos lances buscados por inteiro
+
+        Com janela finita a nota sai limitada a [alpha, beta]: nota == alpha quer dizer
+        que nenhum lance passou de alpha (o lance devolvido é o primeiro tentado) e
+        nota == beta que o lance devolvido passou de beta e a busca parou nele.
+        """
+        if self.workers > 1 and depth > 1:
+            return self._search_root_parallel(game, depth, first_move, alpha, beta)
+        board = game.board
+        tt = self.tt
+        if not first_move and tt is not None:
+            entry = tt.probe(board.key)
+            if entry:
+                first_move = entry[0]
+        best_move = 0
+        window_alpha = alpha
+        for move in self._ordered_moves(board, 0, first_move):
+            # Executar movimento sem registrar no histórico (make/unmake reversível)
+            undo = board.make(move)
+            if not best_move:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, 1, move)
+            else:
+                # PVS: os demais só precisam provar que não passam do melhor (janela vazia)
+                score = -self._negamax(game, depth - 1, -alpha - self.NULL_WINDOW, -alpha, 1, move)
+                if score > alpha and not self._stopped:
+                    score = -self._negamax(game, depth - 1, -beta, -alpha, 1, move)
+            board.unmake(undo)
+            if self._stopped:
+                break
+            
+            # Só um lance estritamente melhor substitui o atual (mesmo desempate do minimax)
+            if not best_move or score > alpha:
+                alpha = max(alpha, score)
+                best_move = move
+                if alpha >= beta:
+                    break
         
-        if not all_moves:
-            # Sem movimentos: xeque-mate ou afogamento
-            if game.is_in_check(current_color):
-                return float('-inf') if is_maximizing else float('inf')
+        if tt is not None and best_move and not self._stopped and alpha > window_alpha:
+            tt.store(board.key, depth, EXACT if alpha < beta else LOWER, alpha, best_move)
+        return best_move, alpha
+
+    def _search_root_parallel(self, game: 'ChessGame', depth: int, first_move: int = 0,
+                              alpha: float = float('-inf'), beta: float = float('inf')) -> Tuple[int, float]:
+        """_search_root com os lances da raiz divididos entre os processos do pool
+
+        O primeiro lance (o melhor da iteração anterior) vai sozinho, com a janela
+        inteira, e fixa alpha; os outros vão juntos, cada um com janela vazia no
+        alpha compartilhado entre os processos, que sobe assim que um deles passa.
+        Só entra na comparação a nota de quem passou do alpha com que foi buscado.
+        """
+        from parallel import RootSplitPool
+        pool = self._pool
+        if pool is None:
+            pool = self._pool = RootSplitPool(self.workers, self.difficulty, self.hash_mb)
+        board = game.board
+        tt = self.tt
+        if not first_move and tt is not None:
+            entry = tt.probe(board.key)
+            if entry:
+                first_move = entry[0]
+        moves = list(self._ordered_moves(board, 0, first_move))
+        if not moves:
+            return 0, alpha
+        
+        time_left = None if self._deadline is None else self._deadline - time.perf_counter()
+        pool.begin(board, self._search_count, depth, alpha, beta, time_left, self.pruning)
+        window_alpha = alpha
+        best_move = 0
+        best_line = []
+        pending = {pool.submit(moves[0], first=True)}
+        later = moves[1:]
+        while pending:
+            done, pending = wait(pending, timeout=0.01, return_when=FIRST_COMPLETED)
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                self._stopped = True
+            for future in done:
+                move, score, raised, nodes, line = future.result()
+                self.nodes += nodes
+                if score is None:
+                    # O processo parou pelo prazo no meio do lance
+                    self._stopped = True
+                elif not best_move or (raised and score > alpha):
+                    alpha = max(alpha, score)
+                    best_move, best_line = move, line
+            if self._stopped or alpha >= beta:
+                break
+            if best_move and later:
+                pending.update(pool.submit(move) for move in later)
+                later = []
+        if pending:
+            pool.cancel(pending)
+        
+        if tt is not None and best_move and not self._stopped and alpha > window_alpha:
+            # A linha veio da tabela do processo que buscou o lance: vira dica de ordenação aqui
+            self._seed_line(board, [best_move] + best_line)
+            tt.store(board.key, depth, EXACT if alpha < beta else LOWER, alpha, best_move)
+        return best_move, alpha
+    
+    def score_root_move(self, game: 'ChessGame', move: int, depth: int, alpha: float, beta: float,
+                        move_time: Optional[float] = None, first: bool = False) -> Tuple[Optional[float], List[int]]:
+        """Nota de um lance da raiz e a linha que a tabela dá depois dele (para os processos do pool)
+
+        first busca com a janela inteira; os demais com janela vazia em alpha e de
+        novo inteira se passarem (PVS). A nota é None se a busca parou no meio.
+        """
+        board = game.board
+        self._reserve_plies(depth)
+        self.nodes = 0
+        self._stopped = False
+        self._search_start = time.perf_counter()
+        self._set_time(move_time)
+        undo = board.make(move)
+        if first:
+            score = -self._negamax(game, depth - 1, -beta, -alpha, 1, move)
+        else:
+            score = -self._negamax(game, depth - 1, -alpha - self.NULL_WINDOW, -alpha, 1, move)
+            if score > alpha and not self._stopped:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, 1, move)
+        line = [] if self._stopped else self._table_line(board, depth - 1)
+        board.unmake(undo)
+        self._deadline = None
+        return (None if self._stopped else score), line
+    
+    def close(self):
+        """Encerra os processos da busca paralela, se houver"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+    
+    def _ordered_moves(self, board: Board, ply: int, hash_move: int = 0, last_move: int = 0,
+                       context: Optional[tuple] = None):
+        """Seletor preguiçoso: lance da tabela, capturas boas (troca estática >= 0, em MVV-LVA),
+        killers, resposta ao lance anterior, calmos pelo histórico e capturas ruins
+
+        Cada estágio só é gerado quando a busca pede mais lances, então um corte
+        no primeiro lance não paga a geração dos lances calmos.
+        """
+        # Xeques e cravadas uma vez só, para todos os estágios
+        if context is None:
+            context = board.legal_context()
+        if hash_move and board.is_legal(hash_move, context):
+            yield hash_move
+        
+        captures, quiets = self._move_buffers[ply]
+        board.generate_legal(captures, noisy=True, context=context)
+        winning, losing = self._rank_captures(board, captures, hash_move)
+        for move in winning:
+            yield move
+        
+        # Killers do ply e a resposta que já refutou last_move: calmos, legais e ainda não tentados
+        tried = [hash_move]
+        countermove = self._countermoves[last_move & 4095] if last_move else 0
+        for move in (*self._killers[ply], countermove):
+            if move and move not in tried and move >> 12 < CAPTURE and board.is_legal(move, context):
+                tried.append(move)
+                yield move
+        
+        board.generate_legal(quiets, noisy=False, context=context)
+        history = self._history
+        side = board.turn << 9
+        quiets.sort(key=lambda move: history[side | move & 4095], reverse=True)
+        for move in quiets:
+            if move not in tried:
+                yield move
+        
+        for move in losing:
+            yield move
+    
+    def _rank_captures(self, board: Board, captures, skip: int = 0) -> Tuple[List[int], List[int]]:
+        """Separa capturas e promoções em boas (troca estática >= 0) e ruins, cada grupo em MVV-LVA"""
+        squares = board.squares
+        values = self._CODE_VALUES
+        winning = []
+        losing = []
+        for move in captures:
+            if move == skip:
+                continue
+            # MVV-LVA: vítima mais valiosa primeiro, atacante mais barato desempata
+            victim = values[PAWN if move >> 12 == EN_PASSANT_CAPTURE else squares[move >> 6 & 63] & TYPE_MASK]
+            promotion = move_promotion(move)
+            if promotion:
+                victim += values[promotion] - values[PAWN]
+            attacker = values[squares[move & 63] & TYPE_MASK]
+            # Vítima que vale pelo menos o atacante nunca perde material; só as outras pagam a troca estática
+            if victim >= attacker or self._see(board, move) >= 0:
+                winning.append((victim, -attacker, move))
             else:
+                losing.append((victim, -attacker, move))
+        winning.sort(reverse=True)
+        losing.sort(reverse=True)
+        return [move for _, _, move in winning], [move for _, _, move in losing]
+    
+    def _see(self, board: Board, move: int) -> int:
+        """Troca estática: saldo material de move depois das recapturas mais baratas em seu destino
+
+        Cada lado pode parar de recapturar quando isso o faria perder; peças que
+        saem da casa revelam atacantes em raio-x atrás delas. Cravadas são ignoradas.
+        """
+        values = self._CODE_VALUES
+        squares = bytearray(board.squares)
+        origin, target = move & 63, move >> 6 & 63
+        piece = squares[origin]
+        if move >> 12 == EN_PASSANT_CAPTURE:
+            squares[(origin & 56) | (target & 7)] = EMPTY
+            gains = [values[PAWN]]
+        else:
+            gains = [values[squares[target] & TYPE_MASK]]
+        on_target = values[piece & TYPE_MASK]
+        promotion = move_promotion(move)
+        if promotion:
+            gains[0] += values[promotion] - values[PAWN]
+            on_target = values[promotion]
+        squares[origin] = EMPTY
+        color_bit = (piece & BLACK_BIT) ^ BLACK_BIT
+        while True:
+            attacker = _least_valuable_attacker(squares, target, color_bit)
+            if attacker < 0:
+                break
+            # Ganho de quem recaptura, supondo que o outro lado recaptura de novo
+            gains.append(on_target - gains[-1])
+            on_target = values[squares[attacker] & TYPE_MASK]
+            squares[attacker] = EMPTY
+            color_bit ^= BLACK_BIT
+        for index in range(len(gains) - 1, 0, -1):
+            gains[index - 1] = -max(-gains[index - 1], gains[index])
+        return gains[0]
+    
+    def _quiescence(self, game: 'ChessGame', alpha: float, beta: float, ply: int) -> float:
+        """Busca só de capturas (e de todas as evasões quando em xeque) além do horizonte
+
+        Fora de xeque o lado que joga pode parar na avaliação estática (stand-pat);
+        capturas que a troca estática diz que perdem material não são buscadas.
+        """
+        self.nodes += 1
+        if not self.nodes & (self.STOP_CHECK_NODES - 1) and self._deadline is not None \
+                and time.perf_counter() >= self._deadline:
+            self._stopped = True
+        if self._stopped:
+            return 0
+        board = game.board
+        if ply >= len(self._move_buffers):
+            return self._evaluate_board(game, COLORS[board.turn >> 3])
+        
+        context = board.legal_context()
+        captures, quiets = self._move_buffers[ply]
+        board.generate_legal(captures, noisy=True, context=context)
+        if context is not None and context[1]:
+            # Evasões calmas podem repetir posição; capturas são irreversíveis e não precisam da busca
+            if board.draw_reason(repetitions=2):
                 return 0
-        
-        if is_maximizing:
-            max_eval = float('-inf')
-            for from_x, from_y, to_x, to_y in all_moves:
-                # Salvar estado
-                captured_piece = game.board.get_piece(to_x, to_y)
-                piece = game.board.get_piece(from_x, from_y)
-                old_current_player = game.current_player
-                
-                # Executar movimento
-                game.board.set_piece(to_x, to_y, piece)
-                game.board.set_piece(from_x, from_y, None)
-                game.current_player = opponent_color
-                
-                eval_score = self._minimax(game, depth - 1, False, ai_color)
-                
-                # Restaurar estado
-                game.board.set_piece(from_x, from_y, piece)
-                game.board.set_piece(to_x, to_y, captured_piece)
-                game.current_player = old_current_player
-                
-                max_eval = max(max_eval, eval_score)
-            
-            return max_eval
+            board.generate_legal(quiets, noisy=False, context=context)
+            if not captures and not quiets:
+                return -(MATE - ply)
+            winning, losing = self._rank_captures(board, captures)
+            moves = winning + list(quiets) + losing
         else:
-            min_eval = float('inf')
-            for from_x, from_y, to_x, to_y in all_moves:
-                # Salvar estado
-                captured_piece = game.board.get_piece(to_x, to_y)
-                piece = game.board.get_piece(from_x, from_y)
-                old_current_player = game.current_player
-                
-                # Executar movimento
-                game.board.set_piece(to_x, to_y, piece)
-                game.board.set_piece(from_x, from_y, None)
-                game.current_player = ai_color
-                
-                eval_score = self._minimax(game, depth - 1, True, ai_color)
-                
-                # Restaurar estado
-                game.board.set_piece(from_x, from_y, piece)
-                game.board.set_piece(to_x, to_y, captured_piece)
-                game.current_player = old_current_player
-                
-                min_eval = min(min_eval, eval_score)
+            if board.is_insufficient_material():
+                return 0
+            stand_pat = self._evaluate_board(game, COLORS[board.turn >> 3])
+            if stand_pat >= beta:
+                return beta
+            if stand_pat > alpha:
+                alpha = stand_pat
+            moves, _ = self._rank_captures(board, captures)
+            # Futility da quiescência (delta): nem ganhando a peça, mais a margem, a captura chegaria a alpha
+            if 'futility' in self.pruning:
+                squares = board.squares
+                values = self._CODE_VALUES
+                floor = alpha - stand_pat - self.DELTA_MARGIN
+                moves = [move for move in moves
+                         if move >> 12 & PROMOTION or move >> 12 == EN_PASSANT_CAPTURE
+                         or values[squares[move >> 6 & 63] & TYPE_MASK] > floor]
+        
+        for move in moves:
+            undo = board.make(move)
+            score = -self._quiescence(game, -beta, -alpha, ply + 1)
+            board.unmake(undo)
+            if self._stopped:
+                return 0
+            if score > alpha:
+                if score >= beta:
+                    return beta
+                alpha = score
+        return alpha
+    
+    def _negamax(self, game: 'ChessGame', depth: int, alpha: float, beta: float, ply: int = 1,
+                 last_move: int = 0) -> float:
+        """Negamax com poda alfa-beta: nota do ponto de vista de quem joga, limitada a [alpha, beta]
+
+        Um lance com nota >= beta refuta a posição (o adversário não a escolheria)
+        e os irmãos restantes não são buscados; se for calmo, vira killer do ply,
+        resposta a last_move e ganha pontos no histórico.
+
+        Fora de xeque, perto das folhas, a avaliação estática decide podas
+        seletivas (self.pruning): reverse futility, razoring, lance nulo,
+        futility dos calmos e redução dos lances tardios (LMR).
+        """
+        # No horizonte, a quiescência resolve as capturas pendentes antes de avaliar
+        if depth <= 0:
+            return self._quiescence(game, alpha, beta, ply)
+        
+        self.nodes += 1
+        if not self.nodes & (self.STOP_CHECK_NODES - 1) and self._deadline is not None \
+                and time.perf_counter() >= self._deadline:
+            self._stopped = True
+        if self._stopped:
+            return 0
+        board = game.board
+        
+        # Repetição (já na segunda ocorrência), 50 lances ou material insuficiente
+        if board.draw_reason(repetitions=2):
+            return 0
+        
+        # Partida já terminada
+        if game.game_over:
+            return self._evaluate_board(game, COLORS[board.turn >> 3])
+        
+        # Tabela de transposição: nota pronta se a entrada é funda o bastante, senão só o lance
+        tt = self.tt
+        hash_move = 0
+        if tt is not None:
+            key = board.key
+            entry = tt.probe(key)
+            if entry:
+                hash_move, entry_depth, bound, score = entry
+                score = score_from_table(score, ply)
+                if entry_depth >= depth:
+                    if bound == EXACT:
+                        tt.cutoffs += 1
+                        return min(max(score, alpha), beta)
+                    if bound == LOWER and score >= beta:
+                        tt.cutoffs += 1
+                        return beta
+                    if bound == UPPER and score <= alpha:
+                        tt.cutoffs += 1
+                        return alpha
+        
+        # Avaliação estática para as podas; em xeque nenhuma delas vale
+        context = board.legal_context()
+        in_check = context is not None and bool(context[1])
+        # Nó da variante principal: janela maior que a vazia (os demais só provam limites)
+        pv_node = beta - alpha > 2 * self.NULL_WINDOW
+        pruning = self.pruning
+        static_eval = None
+        if not in_check and pruning:
+            static_eval = self._evaluate_board(game, COLORS[board.turn >> 3])
             
-            return min_eval
+            # Reverse futility: mesmo cedendo a margem, a posição ainda passa de beta
+            if ('reverse_futility' in pruning and not pv_node and depth < len(self.REVERSE_FUTILITY_MARGINS)
+                    and beta < MATE_BOUND and static_eval - self.REVERSE_FUTILITY_MARGINS[depth] >= beta):
+                return beta
+            
+            # Razoring: tão abaixo de alpha que só capturas poderiam salvar; a quiescência confirma
+            if ('razoring' in pruning and not pv_node and depth < len(self.RAZOR_MARGINS) and not hash_move
+                    and alpha > -MATE_BOUND and static_eval + self.RAZOR_MARGINS[depth] <= alpha):
+                if self._quiescence(game, alpha, alpha + self.NULL_WINDOW, ply) <= alpha:
+                    return alpha
+            
+            # Lance nulo: se passar a vez ainda passa de beta, um lance de verdade também passaria.
+            # Nunca dois seguidos (o filho de um lance nulo tem last_move 0) nem em finais de peões
+            if ('null_move' in pruning and not pv_node and depth >= 3 and last_move and static_eval >= beta
+                    and beta < MATE_BOUND and board.has_non_pawn_material(board.turn)):
+                reduction = 3 if depth >= 6 else 2
+                undo = board.make_null()
+                # Se o adversário já ganha material de graça, passar a vez falharia: nem tenta
+                captures = self._move_buffers[ply + 1][0]
+                board.generate_legal(captures, noisy=True)
+                threat = max([self._see(board, move) for move in captures], default=0)
+                if static_eval - threat >= beta:
+                    score = -self._negamax(game, depth - 1 - reduction, -beta, -beta + self.NULL_WINDOW, ply + 1)
+                else:
+                    score = alpha
+                board.unmake_null(undo)
+                if self._stopped:
+                    return 0
+                if score >= beta:
+                    return beta
+        
+        # Futility: calmos que nem com a margem chegariam a alpha não são buscados
+        futile = ('futility' in pruning and static_eval is not None and depth < len(self.FUTILITY_MARGINS)
+                  and alpha > -MATE_BOUND and static_eval + self.FUTILITY_MARGINS[depth] <= alpha)
+        reduce = 'lmr' in pruning and depth >= 3 and not in_check
+        killers = self._killers[ply]
+        history = self._history
+        side = board.turn << 9
+        
+        # Lances em estágios: lance da tabela, capturas boas e killers antes dos calmos
+        searched = 0
+        best_move = 0
+        for move in self._ordered_moves(board, ply, hash_move, last_move, context):
+            undo = board.make(move)
+            reduction = 0
+            # Calmos tardios que não dão xeque: podados (futility) ou buscados mais rasos (LMR)
+            if (searched and move >> 12 < CAPTURE and (futile or reduce and searched >= 3)
+                    and move not in killers
+                    and not board.square_attacked(board.king_squares[board.turn >> 3], board.turn ^ BLACK_BIT)):
+                if futile:
+                    board.unmake(undo)
+                    continue
+                # Quanto mais tarde na ordem, mais reduz; histórico bom reduz menos
+                reduction = 1 if searched < 6 else 2
+                if history[side | move & 4095] > depth * depth:
+                    reduction -= 1
+            if not searched:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1, move)
+            else:
+                # PVS: janela vazia em alpha (e mais raso, se reduzido); só quem passa é buscado de novo
+                score = -self._negamax(game, depth - 1 - reduction, -alpha - self.NULL_WINDOW, -alpha, ply + 1, move)
+                if score > alpha and reduction and not self._stopped:
+                    score = -self._negamax(game, depth - 1, -alpha - self.NULL_WINDOW, -alpha, ply + 1, move)
+                if score > alpha and pv_node and not self._stopped:
+                    score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1, move)
+            board.unmake(undo)
+            if self._stopped:
+                return 0
+            searched += 1
+            
+            if score > alpha:
+                if score >= beta:
+                    self.cutoffs += 1
+                    if searched == 1:
+                        self.first_move_cutoffs += 1
+                    if move >> 12 < CAPTURE:
+                        if killers[0] != move:
+                            killers[1] = killers[0]
+                            killers[0] = move
+                        if last_move:
+                            self._countermoves[last_move & 4095] = move
+                        history[side | move & 4095] += depth * depth
+                    if tt is not None:
+                        tt.store(key, depth, LOWER, score_to_table(beta, ply), move)
+                    return beta
+                alpha = score
+                best_move = move
+        
+        if not searched:
+            # Sem movimentos: xeque-mate ou afogamento
+            return -(MATE - ply) if in_check else 0
+        
+        if tt is not None:
+            tt.store(key, depth, EXACT if best_move else UPPER, score_to_table(alpha, ply), best_move)
+        return alpha
     
     def _evaluate_board(self, game: 'ChessGame', ai_color: Color) -> float:
         """Avalia a qualidade da posição atual"""
@@ -935,51 +2338,31 @@ class ChessAI:
         
         # Verificar xeque-mate primeiro (máxima prioridade)
         if game.game_over and game.winner == ai_color:
-            return float('inf')
+            return MATE
         if game.game_over and game.winner == opponent_color:
-            return float('-inf')
-        
-        # Contar material (valor das peças)
-        for y in range(8):
-            for x in range(8):
-                piece = game.board.get_piece(x, y)
-                if piece:
-                    piece_value = self.PIECE_VALUES.get(piece.piece_type, 0)
-                    if piece.color == ai_color:
-                        score += piece_value
-                    else:
-                        score -= piece_value
-        
-        # Bônus por posição dos peões (peões avançados são mais valiosos)
-        for y in range(8):
-            for x in range(8):
-                piece = game.board.get_piece(x, y)
-                if piece and piece.piece_type == PieceType.PAWN:
-                    if piece.color == ai_color:
-                        # Peões brancos mais perto da fileira 8 são melhores
-                        if ai_color == Color.WHITE:
-                            advance = 7 - y
-                            score += advance * 0.3
-                        else:
-                            advance = y
-                            score += advance * 0.3
-                    else:
-                        if opponent_color == Color.WHITE:
-                            advance = 7 - y
-                            score -= advance * 0.3
-                        else:
-                            advance = y
-                            score -= advance * 0.3
-        
-        # Bônus por controlar o centro
-        center_squares = [(3, 3), (3, 4), (4, 3), (4, 4)]
-        for cx, cy in center_squares:
-            piece = game.board.get_piece(cx, cy)
-            if piece:
-                if piece.color == ai_color:
-                    score += 0.2
+            return -MATE
+        
+        ai_index = COLOR_BITS[ai_color] >> 3
+        values = self._CODE_VALUES
+        squares = game.board.squares
+        # Soma inteira em décimos de peão: a nota não depende da ordem de iteração dos conjuntos
+        tenths = 0
+        for color_index, piece_squares in enumerate(game.board.piece_squares):
+            for square in piece_squares:
+                code = squares[square]
+                # Contar material (valor das peças)
+                piece_value = values[code & TYPE_MASK] * 10
+                # Bônus por posição dos peões (peões avançados são mais valiosos)
+                if code & TYPE_MASK == PAWN:
+                    piece_value += (square // 8 if color_index else 7 - square // 8) * 3
+                # Bônus por controlar o centro
+                if square in self._CENTER_SQUARES:
+                    piece_value += 2
+                if color_index == ai_index:
+                    tenths += piece_value
                 else:
-                    score -= 0.2
+                    tenths -= piece_value
+        score += tenths / 10
         
         # Verificar se o rei está em perigo
         king_pos = game.board.find_king(ai_color)
@@ -993,20 +2376,33 @@ class ChessAI:
         
         return score
 
-def main(difficulty: str = 'medium', player_color: str = 'white'):
+def main(difficulty: str = 'medium', player_color: str = 'white', board_backend: str = 'mailbox',
+         fen: Optional[str] = None, hash_mb: float = DEFAULT_HASH_MB, ponder: bool = False,
+         workers: int = 1):
     """
     Inicia o jogo de xadrez contra a IA
     
     Args:
         difficulty: 'easy', 'medium' ou 'hard'
         player_color: 'white' ou 'black'
+        board_backend: 'mailbox' (bytearray) ou 'bitboard'
+        fen: posição inicial opcional em FEN
+        hash_mb: memória da tabela de transposição da IA em MB
+        ponder: a IA pensa também na vez do jogador
+        workers: processos da busca paralela na raiz
     """
     player_color_enum = Color.WHITE if player_color.lower() == 'white' else Color.BLACK
     game = ChessGame(
         ai_enabled=True,
         ai_difficulty=difficulty,
-        player_color=player_color_enum
+        player_color=player_color_enum,
+        board_backend=board_backend,
+        ai_hash_mb=hash_mb,
+        ai_ponder=ponder,
+        ai_workers=workers
     )
+    if fen:
+        game.load_fen(fen)
     game.run()
 
 if __name__ == '__main__':
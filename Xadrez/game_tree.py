@@ -0,0 +1,156 @@
+"""
+Árvore de partida persistente para o chess_new
+
+Cada nó guarda só o delta do lance (o lance compactado e o registro de
+make/unmake do Board), a chave Zobrist da posição e o link para o pai.
+A cada KEYFRAME_INTERVAL lances o nó guarda também uma foto completa da
+posição. Desfazer, refazer, abrir uma variante ou saltar para qualquer
+nó custa O(delta) por lance percorrido; saltos longos recomeçam da foto
+mais próxima. A memória cresce só com os lances realmente jogados.
+
+    tree = GameTree(board)
+    tree.play(move)         # joga (ou reaproveita a variante já existente)
+    tree.undo(); tree.redo()
+    tree.goto(node)         # qualquer nó, inclusive de outra variante
+"""
+
+from typing import List, Optional
+
+KEYFRAME_INTERVAL = 32
+
+
+class GameNode:
+    """Um lance na árvore: delta em relação ao pai e, às vezes, uma foto completa"""
+    __slots__ = ('parent', 'move', 'undo', 'key', 'ply', 'children', 'next', 'keyframe')
+
+    def __init__(self, parent: Optional['GameNode'], move: int, undo: Optional[tuple], key: int, ply: int):
+        self.parent = parent
+        self.move = move
+        self.undo = undo
+        self.key = key
+        self.ply = ply
+        self.children = None  # lista criada só quando há continuação
+        self.next = None      # filho seguido por redo (a última variante visitada)
+        self.keyframe = None
+
+    def child(self, move: int) -> Optional['GameNode']:
+        for child in self.children or ():
+            if child.move == move:
+                return child
+        return None
+
+    def path(self) -> List['GameNode']:
+        """Nós da raiz (exclusive) até este"""
+        nodes = []
+        node = self
+        while node.parent is not None:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+
+def _keyframe(board) -> tuple:
+    return (board.snapshot(), board.turn, board.castling_flags, board.en_passant, board.halfmove_clock)
+
+
+class GameTree:
+    """Partida com variantes sobre um Board reversível (make/unmake)"""
+
+    def __init__(self, board):
+        self.board = board
+        self.root = GameNode(None, 0, None, board.key, 0)
+        self.root.keyframe = _keyframe(board)
+        self.current = self.root
+
+    def play(self, move: int) -> GameNode:
+        """Joga move a partir do nó atual; se a variante já existe, só a percorre"""
+        node = self.current
+        undo = self.board.make(move)
+        child = node.child(move)
+        if child is None:
+            child = GameNode(node, move, undo, self.board.key, node.ply + 1)
+            if child.ply % KEYFRAME_INTERVAL == 0:
+                child.keyframe = _keyframe(self.board)
+            if node.children is None:
+                node.children = []
+            node.children.append(child)
+        node.next = child
+        self.current = child
+        return child
+
+    def undo(self) -> Optional[GameNode]:
+        """Volta um lance; devolve o nó desfeito (None na raiz)"""
+        node = self.current
+        if node.parent is None:
+            return None
+        self.board.unmake(node.undo)
+        self.current = node.parent
+        return node
+
+    def redo(self) -> Optional[GameNode]:
+        """Refaz o lance da última variante visitada a partir do nó atual"""
+        child = self.current.next
+        if child is None:
+            return None
+        self.board.make(child.move)
+        self.current = child
+        return child
+
+    def goto(self, target: GameNode):
+        """Leva o tabuleiro até target pelo caminho mais curto (ancestral comum ou foto)"""
+        node = self.current
+        # Ancestral comum: sobe primeiro pelo lado mais profundo
+        up, down = node, target
+        steps_down = []
+        while up.ply > down.ply:
+            up = up.parent
+        while down.ply > up.ply:
+            steps_down.append(down)
+            down = down.parent
+        while up is not down:
+            up = up.parent
+            steps_down.append(down)
+            down = down.parent
+        cost = node.ply - up.ply + len(steps_down)
+
+        # Foto mais próxima acima de target (no máximo KEYFRAME_INTERVAL lances)
+        keyframe = target
+        while keyframe.keyframe is None:
+            keyframe = keyframe.parent
+        if target.ply - keyframe.ply < cost:
+            self._restore(keyframe)
+            steps_down = []
+            step = target
+            while step is not keyframe:
+                steps_down.append(step)
+                step = step.parent
+        else:
+            while self.current is not up:
+                self.undo()
+
+        for step in reversed(steps_down):
+            self.board.make(step.move)
+            step.parent.next = step
+            self.current = step
+
+    def goto_ply(self, ply: int):
+        """Salta para o lance ply da linha atual (ancestral ou continuação por redo)"""
+        node = self.current
+        while node.ply > ply and node.parent is not None:
+            node = node.parent
+        while node.ply < ply and node.next is not None:
+            node = node.next
+        self.goto(node)
+
+    def line(self) -> List[int]:
+        """Lances da raiz até o nó atual"""
+        return [node.move for node in self.current.path()]
+
+    def _restore(self, node: GameNode):
+        board = self.board
+        snapshot, board.turn, board.castling_flags, board.en_passant, board.halfmove_clock = node.keyframe
+        board.restore(snapshot)
+        # Chaves das posições anteriores (repetição e unmake continuam valendo abaixo da foto)
+        board.key_history = [ancestor.key for ancestor in ([self.root] + node.path())[:-1]]
+        self.current = node
@@ -0,0 +1,169 @@
+"""
+Busca paralela na raiz para a IA do chess_new
+
+Os lances da raiz são divididos entre os processos de um ProcessPoolExecutor.
+Cada processo guarda o seu próprio ChessAI (tabela, killers e histórico
+continuam de uma tarefa para a outra) e recebe a posição como os 37 bytes de
+position.pack, mais as chaves desde o último lance irreversível para
+reconhecer repetições. As tabelas dos processos dividem entre si o hash_mb
+da IA: com N processos a memória fica em 2x hash_mb, não em (N+1)x.
+
+Dois valores compartilhados ligam os processos:
+
+    alpha    melhor nota já provada nesta iteração; cada tarefa busca com janela
+             vazia em cima dele e o sobe quando passa
+    cancel   geração das tarefas; quando muda, uma thread de cada processo chama
+             stop() na busca em andamento (corte beta, prazo, stop() da IA)
+
+    ai = ChessAI('hard', workers=4)   # ChessAI cria e usa o RootSplitPool
+    ai.search(game, max_depth=6)
+    ai.close()
+
+    python parallel.py [profundidade] [processos...]   # curva de speedup
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Optional
+
+from chess_new import ChessAI, SearchPosition, Board
+from position import pack, unpack, board_from_fen
+
+# Intervalo (s) com que a thread de cada processo olha a geração de cancelamento
+CANCEL_POLL = 0.005
+
+# Estado de cada processo do pool (preenchido por _start_worker)
+_ai = None
+_alpha = None
+_cancel = None
+_generation = 0
+_search_count = 0
+# A troca de geração e o stop da thread de cancelamento não se cruzam
+_generation_lock = threading.Lock()
+
+
+def _start_worker(difficulty: str, hash_mb: float, alpha, cancel):
+    global _ai, _alpha, _cancel
+    _ai = ChessAI(difficulty, hash_mb)
+    _alpha = alpha
+    _cancel = cancel
+    threading.Thread(target=_watch_cancel, daemon=True).start()
+
+
+def _watch_cancel():
+    while True:
+        time.sleep(CANCEL_POLL)
+        with _generation_lock:
+            if _cancel.value != _generation:
+                _ai.stop()
+
+
+def _search_move(packed: bytes, history: tuple, board_class, search_count: int, generation: int,
+                 move: int, depth: int, beta: float, deadline: Optional[float], pruning: frozenset,
+                 first: bool):
+    """Tarefa de um processo: (lance, nota ou None, passou do alpha, nós, linha)"""
+    global _generation, _search_count
+    ai = _ai
+    with _generation_lock:
+        # Um stop pedido para a tarefa anterior acontece antes daqui e score_root_move o limpa;
+        # depois daqui a thread já compara com esta geração
+        _generation = generation
+    if search_count != _search_count:
+        # Busca nova do processo principal: entradas antigas da tabela passam a ser substituíveis
+        _search_count = search_count
+        if ai.tt is not None:
+            ai.tt.new_search()
+    board = unpack(packed, 0, board_class)
+    board.key_history = list(history)
+    board.start_ply -= len(history)
+    ai.pruning = set(pruning)
+    alpha = _alpha.value
+    move_time = None if deadline is None else max(deadline - time.time(), 0.0)
+    score, line = ai.score_root_move(SearchPosition(board), move, depth, alpha, beta, move_time, first)
+    raised = score is not None and score > alpha
+    if raised:
+        with _alpha.get_lock():
+            if score > _alpha.value:
+                _alpha.value = score
+    return move, score, raised, ai.nodes, line
+
+
+class RootSplitPool:
+    """Processos da busca paralela na raiz, com alpha e cancelamento compartilhados"""
+
+    def __init__(self, workers: int, difficulty: str = 'hard', hash_mb: float = 16):
+        """hash_mb é o total das tabelas dos processos, dividido igualmente entre eles"""
+        # spawn: o processo principal tem threads (interface, ponder), que fork não copiaria
+        context = multiprocessing.get_context('spawn')
+        self.workers = workers
+        self._alpha = context.Value('d', float('-inf'))
+        self._cancel = context.Value('i', 0, lock=False)
+        self._executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_start_worker,
+                                             initargs=(difficulty, hash_mb / workers, self._alpha, self._cancel))
+        self._job = None
+
+    def begin(self, board: Board, search_count: int, depth: int, alpha: float, beta: float,
+              move_time: Optional[float], pruning):
+        """Prepara uma iteração: posição, profundidade, janela e prazo das próximas tarefas"""
+        self._alpha.value = alpha
+        history = tuple(board.key_history[len(board.key_history) - board.halfmove_clock:])
+        deadline = None if move_time is None else time.time() + move_time
+        self._job = (pack(board), history, type(board), search_count, self._cancel.value,
+                     depth, beta, deadline, frozenset(pruning))
+
+    def submit(self, move: int, first: bool = False):
+        """Manda um lance da raiz para o pool; o Future dá (lance, nota, passou, nós, linha)"""
+        packed, history, board_class, search_count, generation, depth, beta, deadline, pruning = self._job
+        return self._executor.submit(_search_move, packed, history, board_class, search_count, generation,
+                                     move, depth, beta, deadline, pruning, first)
+
+    def cancel(self, futures):
+        """Descarta as tarefas: as da fila não começam, as em andamento param (e são esperadas)"""
+        for future in futures:
+            future.cancel()
+        self._cancel.value += 1
+        wait(futures)
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+BENCHMARK_FENS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4',
+    'r2q1rk1/ppp2ppp/2np1n2/2b1p1B1/2B1P1b1/2NP1N2/PPP2PPP/R2Q1RK1 w - - 0 8',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    '6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1',
+]
+
+
+def benchmark(depth: int = 5, worker_counts=(1, 2, 4, 8, 16)):
+    """Tempo da busca de profundidade fixa nas posições de BENCHMARK_FENS para cada número de processos"""
+    base = None
+    for workers in worker_counts:
+        ai = ChessAI('hard', workers=workers)
+        if workers > 1:
+            # Sobe os processos antes de medir (spawn importa os módulos de novo)
+            ai.search(SearchPosition(Board()), max_depth=2)
+        elapsed = nodes = 0
+        for fen in BENCHMARK_FENS:
+            ai.tt.clear()
+            position = SearchPosition(board_from_fen(fen))
+            start = time.perf_counter()
+            ai.search(position, max_depth=depth)
+            elapsed += time.perf_counter() - start
+            nodes += ai.nodes
+        ai.close()
+        base = base or elapsed
+        print(f"{workers:2d} processos: {elapsed:6.2f}s  {nodes:9d} nós  speedup {base / elapsed:4.2f}")
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    print(f"CPUs: {os.cpu_count()}")
+    benchmark(args[0] if args else 5, tuple(args[1:]) or (1, 2, 4, 8, 16))
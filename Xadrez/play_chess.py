@@ -10,10 +10,15 @@ Exemplos:
     python play_chess.py easy white      # IA Fácil, você joga com peças brancas
     python play_chess.py medium black    # IA Médio, você joga com peças pretas
     python play_chess.py hard white      # IA Difícil, você joga com peças brancas
+    python play_chess.py hard white --bitboard   # Motor de bitboards
+    python play_chess.py medium white --fen "8/8/4k3/8/8/4K3/4P3/8 w - - 0 1"
+    python play_chess.py hard white --hash 64    # Tabela de transposição de 64 MB
+    python play_chess.py hard white --ponder     # IA pensa também na sua vez
+    python play_chess.py hard white --workers 4  # Busca paralela em 4 processos
 """
 
 import sys
-from chess_new import main, Color
+from chess_new import main, Color, DEFAULT_HASH_MB
 
 def print_help():
     print(__doc__)
@@ -23,6 +28,48 @@ def print_help():
 if __name__ == '__main__':
     difficulty = 'medium'
     player_color = 'white'
+    board_backend = 'mailbox'
+    fen = None
+    hash_mb = DEFAULT_HASH_MB
+    ponder = False
+    workers = 1
+    
+    if '--hash' in sys.argv:
+        index = sys.argv.index('--hash')
+        try:
+            hash_mb = float(sys.argv.pop(index + 1))
+        except (IndexError, ValueError):
+            print("--hash precisa do tamanho da tabela em MB")
+            print_help()
+            sys.exit(1)
+        sys.argv.pop(index)
+    
+    if '--fen' in sys.argv:
+        index = sys.argv.index('--fen')
+        if index + 1 >= len(sys.argv):
+            print("--fen precisa de uma posição")
+            print_help()
+            sys.exit(1)
+        fen = sys.argv.pop(index + 1)
+        sys.argv.pop(index)
+    
+    if '--workers' in sys.argv:
+        index = sys.argv.index('--workers')
+        try:
+            workers = int(sys.argv.pop(index + 1))
+        except (IndexError, ValueError):
+            print("--workers precisa do número de processos")
+            print_help()
+            sys.exit(1)
+        sys.argv.pop(index)
+    
+    if '--ponder' in sys.argv:
+        sys.argv.remove('--ponder')
+        ponder = True
+    
+    if '--bitboard' in sys.argv:
+        sys.argv.remove('--bitboard')
+        board_backend = 'bitboard'
     
     if len(sys.argv) > 1:
         if sys.argv[1].lower() in ['easy', 'medium', 'hard']:
@@ -51,6 +98,8 @@ if __name__ == '__main__':
     print(f"   - ESC para sair")
     print(f"   - N para novo jogo")
     print(f"   - U para desfazer")
+    print(f"   - R para refazer")
     print()
     
-    main(difficulty=difficulty, player_color=player_color)
+    main(difficulty=difficulty, player_color=player_color, board_backend=board_backend, fen=fen, hash_mb=hash_mb,
+         ponder=ponder, workers=workers)
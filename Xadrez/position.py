@@ -0,0 +1,177 @@
+"""
+Serialização de posições do chess_new: FEN e codificação binária compacta
+
+FEN para ler e gravar posições legíveis (arquivos, posições de benchmark):
+
+    board = board_from_fen('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+    board_to_fen(board)
+
+Codificação binária de tamanho fixo (PACKED_SIZE = 37 bytes) para mandar
+posições entre processos e guardá-las em caches:
+
+    bytes 0-31  casas, dois códigos de peça por byte (casa par no nibble baixo)
+    byte  32    castling_flags (os 6 bits "já moveu") | vez das pretas << 7
+    byte  33    casa de en passant (255 = nenhuma)
+    byte  34    halfmove_clock (limitado a 255)
+    bytes 35-36 lances já jogados (start_ply + lances do key_history), little-endian
+
+unpack lê direto de bytes, bytearray ou memoryview, a partir de um offset,
+sem fatiar o buffer; várias posições podem ficar lado a lado no mesmo buffer.
+O estado guardado é o do Board (vez, roque, en passant), que é também o do
+ChessGame. O histórico de chaves não vai junto: a posição decodificada
+recomeça a contagem de repetições.
+"""
+
+import struct
+from operator import or_
+
+from chess_new import (
+    Board, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, BLACK_BIT,
+    WHITE_KING_MOVED, WHITE_ROOK_A_MOVED, WHITE_ROOK_H_MOVED,
+    BLACK_KING_MOVED, BLACK_ROOK_A_MOVED, BLACK_ROOK_H_MOVED,
+)
+
+LETTERS = {'p': PAWN, 'n': KNIGHT, 'b': BISHOP, 'r': ROOK, 'q': QUEEN, 'k': KING}
+CODE_LETTERS = {code | BLACK_BIT: letter for letter, code in LETTERS.items()}
+CODE_LETTERS.update({code: letter.upper() for letter, code in LETTERS.items()})
+FILES = 'abcdefgh'
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# Letra de roque -> (casa do rei, casa da torre, código do rei, código da torre, flags que a letra limpa)
+CASTLING_LETTERS = (
+    ('K', 60, 63, KING, ROOK, WHITE_KING_MOVED | WHITE_ROOK_H_MOVED),
+    ('Q', 60, 56, KING, ROOK, WHITE_KING_MOVED | WHITE_ROOK_A_MOVED),
+    ('k', 4, 7, KING | BLACK_BIT, ROOK | BLACK_BIT, BLACK_KING_MOVED | BLACK_ROOK_H_MOVED),
+    ('q', 4, 0, KING | BLACK_BIT, ROOK | BLACK_BIT, BLACK_KING_MOVED | BLACK_ROOK_A_MOVED),
+)
+ALL_CASTLING_FLAGS = 63
+
+_LAYOUT = struct.Struct('<32sBBBH')
+PACKED_SIZE = _LAYOUT.size
+NO_EN_PASSANT = 255
+BLACK_TO_MOVE = 128
+# Nibble baixo e alto de cada byte, como tabelas para bytes.translate
+_LOW_NIBBLE = bytes(value & 15 for value in range(256))
+_HIGH_NIBBLE = bytes(value >> 4 for value in range(256))
+_TO_HIGH_NIBBLE = bytes((value << 4) & 255 for value in range(256))
+
+
+def square_name(square: int) -> str:
+    return FILES[square % 8] + str(8 - square // 8)
+
+
+def parse_square(name: str) -> int:
+    if len(name) != 2 or name[0] not in FILES or name[1] not in '12345678':
+        raise ValueError(f"Casa inválida: {name!r}")
+    return (8 - int(name[1])) * 8 + FILES.index(name[0])
+
+
+def _reset(board: Board, squares, turn: int, castling_flags: int, en_passant: int,
+           halfmove_clock: int, ply: int) -> Board:
+    board.restore(squares)
+    board.turn = turn
+    board.castling_flags = castling_flags
+    board.en_passant = en_passant
+    board.halfmove_clock = halfmove_clock
+    board.start_ply = ply
+    board.key_history = []
+    return board
+
+
+def board_from_fen(fen: str, board_class=Board) -> Board:
+    """Monta um board_class (Board ou BitBoard) a partir de um FEN completo ou só das peças"""
+    fields = fen.split()
+    if not fields or len(fields) > 6:
+        raise ValueError(f"FEN inválido: {fen!r}")
+    placement, turn, castling, en_passant, halfmove, fullmove = fields + ['w', '-', '-', '0', '1'][len(fields) - 1:]
+
+    squares = bytearray(64)
+    rows = placement.split('/')
+    if len(rows) != 8:
+        raise ValueError(f"FEN precisa de 8 fileiras: {placement!r}")
+    for y, row in enumerate(rows):
+        x = 0
+        for char in row:
+            if char.isdigit():
+                x += int(char)
+            elif char.lower() in LETTERS and x < 8:
+                squares[y * 8 + x] = LETTERS[char.lower()] | (BLACK_BIT if char.islower() else 0)
+                x += 1
+            else:
+                raise ValueError(f"Fileira inválida no FEN: {row!r}")
+        if x != 8:
+            raise ValueError(f"Fileira inválida no FEN: {row!r}")
+
+    if turn not in ('w', 'b'):
+        raise ValueError(f"Vez inválida no FEN: {turn!r}")
+    castling_flags = ALL_CASTLING_FLAGS
+    if castling != '-':
+        for char in castling:
+            rights = [entry for entry in CASTLING_LETTERS if entry[0] == char]
+            if not rights:
+                raise ValueError(f"Roque inválido no FEN: {castling!r}")
+            castling_flags &= ~rights[0][5]
+    try:
+        halfmove_clock, fullmove_number = int(halfmove), int(fullmove)
+    except ValueError:
+        raise ValueError(f"Contadores inválidos no FEN: {halfmove!r} {fullmove!r}") from None
+
+    side = BLACK_BIT if turn == 'b' else 0
+    ply = max(fullmove_number - 1, 0) * 2 + (1 if side else 0)
+    board = board_class()
+    return _reset(board, squares, side, castling_flags,
+                  -1 if en_passant == '-' else parse_square(en_passant), halfmove_clock, ply)
+
+
+def board_to_fen(board: Board) -> str:
+    squares = board.squares
+    rows = []
+    for y in range(8):
+        row = ''
+        empty = 0
+        for code in squares[y * 8:y * 8 + 8]:
+            if code:
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += CODE_LETTERS[code]
+            else:
+                empty += 1
+        rows.append(row + (str(empty) if empty else ''))
+
+    # Só anuncia o roque se as flags permitem e rei e torre estão nas casas de origem
+    castling = ''.join(letter for letter, king, rook, king_code, rook_code, flags in CASTLING_LETTERS
+                       if not board.castling_flags & flags and squares[king] == king_code and squares[rook] == rook_code)
+    en_passant = square_name(board.en_passant) if board.en_passant >= 0 else '-'
+    return ' '.join(('/'.join(rows), 'b' if board.turn else 'w', castling or '-', en_passant,
+                     str(board.halfmove_clock), str(ply_count(board) // 2 + 1)))
+
+
+def ply_count(board: Board) -> int:
+    """Meios-lances desde o início da partida (inclui os anteriores ao FEN carregado)"""
+    return board.start_ply + len(board.key_history)
+
+
+def pack(board: Board) -> bytes:
+    """Codifica a posição em PACKED_SIZE bytes"""
+    squares = board.squares
+    placement = bytes(map(or_, squares[0::2], squares[1::2].translate(_TO_HIGH_NIBBLE)))
+    en_passant = board.en_passant if board.en_passant >= 0 else NO_EN_PASSANT
+    return _LAYOUT.pack(placement, board.castling_flags | (BLACK_TO_MOVE if board.turn else 0), en_passant,
+                        min(board.halfmove_clock, 255), ply_count(board) & 0xFFFF)
+
+
+def pack_into(buffer, offset: int, board: Board):
+    """Grava a posição em um buffer gravável (bytearray, memoryview, memória compartilhada)"""
+    buffer[offset:offset + PACKED_SIZE] = pack(board)
+
+
+def unpack(data, offset: int = 0, board_class=Board) -> Board:
+    """Decodifica uma posição de bytes/bytearray/memoryview a partir de offset"""
+    placement, flags, en_passant, halfmove_clock, ply = _LAYOUT.unpack_from(data, offset)
+    squares = bytearray(64)
+    squares[0::2] = placement.translate(_LOW_NIBBLE)
+    squares[1::2] = placement.translate(_HIGH_NIBBLE)
+    return _reset(board_class(), squares, BLACK_BIT if flags & BLACK_TO_MOVE else 0, flags & ALL_CASTLING_FLAGS,
+                  -1 if en_passant == NO_EN_PASSANT else en_passant, halfmove_clock, ply)
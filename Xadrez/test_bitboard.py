@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testes do motor de bitboards (perft e integração com o ChessGame)
+"""
+
+import os
+import sys
+import random
+
+# Adicionar diretório ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from chess_new import ChessGame, Board, Color, COLOR_BITS, CAPTURE, Piece, PieceType, move_to_coordinates
+from bitboard import BitBoard, legal_moves
+
+LETTERS = {'p': PieceType.PAWN, 'n': PieceType.KNIGHT, 'b': PieceType.BISHOP,
+           'r': PieceType.ROOK, 'q': PieceType.QUEEN, 'k': PieceType.KING}
+
+
+def board_from_rows(rows: str) -> BitBoard:
+    """Monta uma BitBoard a partir da parte de peças de um FEN"""
+    board = BitBoard()
+    for square in range(64):
+        board.put(square, 0)
+    for y, row in enumerate(rows.split('/')):
+        x = 0
+        for char in row:
+            if char.isdigit():
+                x += int(char)
+            else:
+                color = Color.WHITE if char.isupper() else Color.BLACK
+                board.set_piece(x, y, Piece(color, LETTERS[char.lower()]))
+                x += 1
+    return board
+
+
+def test_perft_start_position():
+    board = BitBoard()
+    assert [board.perft(depth) for depth in range(1, 5)] == [20, 400, 8902, 197281]
+
+
+def test_perft_kiwipete():
+    board = board_from_rows('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R')
+    assert [board.perft(depth) for depth in range(1, 4)] == [48, 2039, 97862]
+
+
+def test_perft_endgame_with_en_passant_pins():
+    board = board_from_rows('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8')
+    assert [board.perft(depth) for depth in range(1, 5)] == [14, 191, 2812, 43238]
+
+
+def test_mailbox_make_unmake_perft():
+    # Board.perft usa o gerador legal do mailbox e make/unmake, com as quatro promoções
+    for rows, expected in (('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR', [20, 400, 8902]),
+                           ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R', [48, 2039]),
+                           ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8', [14, 191, 2812]),
+                           ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1', [6, 264, 9467])):
+        board = Board()
+        board.restore(board_from_rows(rows).snapshot())
+        before = (board.snapshot(), board.castling_flags, board.en_passant, board.turn)
+        assert [board.perft(depth) for depth in range(1, len(expected) + 1)] == expected
+        assert (board.snapshot(), board.castling_flags, board.en_passant, board.turn) == before
+
+
+def test_matches_mailbox_board_in_game():
+    random.seed(7)
+    mailbox = ChessGame(ai_enabled=False)
+    bitboards = ChessGame(ai_enabled=False, board_backend='bitboard')
+    for _ in range(60):
+        moves = []
+        for square, code in enumerate(mailbox.board.squares):
+            x, y = square % 8, square // 8
+            if code:
+                piece = mailbox.board.get_piece(x, y)
+                pseudo = mailbox.get_pseudo_legal_moves(x, y, piece)
+                # Peões: o mailbox também devolve avanços, iguais nos dois motores
+                assert pseudo == bitboards.get_pseudo_legal_moves(x, y, piece)
+                if piece.color == mailbox.current_player:
+                    assert mailbox.get_valid_moves(x, y) == bitboards.get_valid_moves(x, y)
+                    moves.extend((x, y, to_x, to_y) for to_x, to_y in mailbox.get_valid_moves(x, y))
+        if not moves:
+            break
+        move = random.choice(sorted(moves))
+        assert mailbox.make_move(*move) and bitboards.make_move(*move)
+        assert mailbox.board.snapshot() == bitboards.board.snapshot()
+
+
+def test_attackers_match_mailbox_probe():
+    board = board_from_rows('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R')
+    mailbox = Board()
+    mailbox.restore(board.snapshot())
+    for square in range(64):
+        for color in Color:
+            assert sorted(board.attackers_of(square, color)) == sorted(mailbox.attackers_of(square, color))
+
+
+def _bitboard_legal(board: BitBoard, color: Color, en_passant_target):
+    en_passant = -1 if en_passant_target is None else en_passant_target[1] * 8 + en_passant_target[0]
+    return set(legal_moves(board.bitboards, board.occupancy, COLOR_BITS[color] >> 3, board.castling_rights(), en_passant))
+
+
+def test_mailbox_legal_generator_matches_bitboards():
+    rng = random.Random(5)
+    for _ in range(12):
+        game = ChessGame(ai_enabled=False, board_backend='bitboard')
+        for _ in range(150):
+            moves = game.board.legal_moves()
+            assert len(moves) == len(set(moves))
+            assert set(moves) == _bitboard_legal(game.board, game.current_player, game.en_passant_target)
+            assert game.board.has_any_legal_move() == bool(moves)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            assert game.make_move(*move_to_coordinates(move))
+
+
+def test_legal_generator_on_tricky_positions():
+    for rows in ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R',
+                 '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8',
+                 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1'):
+        board = board_from_rows(rows)
+        for color in Color:
+            board.turn = COLOR_BITS[color]
+            expected = _bitboard_legal(board, color, None)
+            assert set(board.legal_moves()) == expected
+
+
+def test_staged_generation_shares_context():
+    rng = random.Random(11)
+    for backend in ('mailbox', 'bitboard'):
+        game = ChessGame(ai_enabled=False, board_backend=backend)
+        board = game.board
+        captures, quiets = [], []
+        for _ in range(200):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            # Capturas e calmos gerados com o mesmo contexto somam a geração completa
+            context = board.legal_context()
+            board.generate_legal(captures, noisy=True, context=context)
+            board.generate_legal(quiets, noisy=False, context=context)
+            assert sorted(captures + quiets) == sorted(moves)
+            assert all(move >> 12 >= CAPTURE for move in captures) and all(move >> 12 < CAPTURE for move in quiets)
+            assert bool(context[1]) == game.is_in_check(game.current_player)
+            assert all(board.is_legal(move, context) for move in moves)
+            board.make(rng.choice(moves))
+
+
+def test_ai_runs_on_bitboards():
+    game = ChessGame(ai_difficulty='medium', board_backend='bitboard')
+    before = game.board.snapshot()
+    move = game.ai.get_best_move(game, Color.WHITE)
+    assert move is not None
+    assert game.board.snapshot() == before
+    assert game.make_move(*move)
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testes do tabuleiro compacto (Board)
+"""
+
+import os
+import sys
+import pickle
+import random
+import subprocess
+from array import array
+
+# Adicionar diretório ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from chess_new import (ChessGame, Board, Piece, PIECES, Color, PieceType, COLOR_BITS, KING, QUEEN, ROOK, KNIGHT, PAWN,
+                       BLACK_BIT, TYPE_MASK, EN_PASSANT_CAPTURE, KING_CASTLE, encode_move, move_promotion,
+                       move_to_coordinates)
+from geometry import KNIGHT_TARGETS, KING_TARGETS, PAWN_CAPTURES, RAYS, BETWEEN, LINE
+
+
+def test_initial_position():
+    board = Board()
+    assert len(board.squares) == 64
+    assert board.squares[4] == KING | BLACK_BIT
+    assert board.squares[60] == KING
+    assert board.squares[56] == ROOK
+    assert all(board.squares[8 + x] == PAWN | BLACK_BIT for x in range(8))
+    assert board.get_piece(4, 7) == 'w_kg'
+    assert board.get_piece(3, 4) is None
+    assert board.find_king(Color.WHITE) == (4, 7)
+    assert board.find_king(Color.BLACK) == (4, 0)
+
+
+def test_pieces_are_shared_flyweights():
+    queen = Piece(Color.WHITE, PieceType.QUEEN)
+    assert queen is Piece(Color.WHITE, PieceType.QUEEN)
+    assert PIECES[queen.code] is queen
+    assert pickle.loads(pickle.dumps(queen)) is queen
+    try:
+        queen.piece_type = PieceType.PAWN
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Piece deveria ser imutável")
+
+
+def test_snapshot_and_copy():
+    board = Board()
+    snapshot = board.snapshot()
+    assert isinstance(snapshot, bytes) and len(snapshot) == 64
+
+    copy = board.copy()
+    copy.set_piece(4, 6, None)
+    assert board.get_piece(4, 6) is not None
+
+    board.set_piece(0, 0, None)
+    board.restore(snapshot)
+    assert board.get_piece(0, 0) == 'b_rk'
+
+
+def _random_board(rng: random.Random) -> Board:
+    board = Board()
+    for square in range(64):
+        board.put(square, 0)
+    codes = [KING, KING | BLACK_BIT] + [rng.choice((1, 2, 3, 4, 5, 9, 10, 11, 12, 13)) for _ in range(rng.randint(2, 20))]
+    for code, square in zip(codes, rng.sample(range(64), len(codes))):
+        board.put(square, code)
+    return board
+
+
+def _attackers_by_move_generation(board: Board, square: int, color: Color):
+    """Referência lenta: gera os lances de cada peça inimiga (peões só capturam)"""
+    found = []
+    for origin, code in enumerate(board.squares):
+        if code and origin != square and (code & BLACK_BIT) == COLOR_BITS[color]:
+            x, y = origin % 8, origin // 8
+            if code & TYPE_MASK == PAWN:
+                direction = 1 if code & BLACK_BIT else -1
+                targets = {(x - 1, y + direction), (x + 1, y + direction)}
+            else:
+                # Casa ocupada por peça da mesma cor também é defendida
+                saved = board.squares[square]
+                board.put(square, PAWN | (BLACK_BIT ^ COLOR_BITS[color]) if saved else 0)
+                targets = board.pseudo_legal_moves(x, y)
+                board.put(square, saved)
+            if (square % 8, square // 8) in targets:
+                found.append(origin)
+    return sorted(found)
+
+
+def test_super_piece_probe_matches_move_generation():
+    rng = random.Random(3)
+    for _ in range(200):
+        board = _random_board(rng)
+        for square in range(64):
+            for color in Color:
+                expected = _attackers_by_move_generation(board, square, color)
+                assert sorted(board.attackers_of(square, color)) == expected
+                assert board.square_attacked(square, COLOR_BITS[color]) == bool(expected)
+
+
+
+def test_geometry_tables():
+    assert sum(map(len, KNIGHT_TARGETS)) == 336 and sum(map(len, KING_TARGETS)) == 420
+    assert PAWN_CAPTURES[0][52] == (43, 45) and PAWN_CAPTURES[1][8] == (17,)
+    assert sum(len(ray) for rays in RAYS for ray in rays) == 1456
+    for a in range(64):
+        for b in range(64):
+            assert BETWEEN[a][b] == BETWEEN[b][a] and LINE[a][b] == LINE[b][a]
+            assert not BETWEEN[a][b] or LINE[a][b] & BETWEEN[a][b] == BETWEEN[a][b]
+    assert BETWEEN[60][4] == sum(1 << (y * 8 + 4) for y in range(1, 7))
+    assert LINE[0][9] >> 63 & 1 and not LINE[0][10]
+
+
+def test_geometry_import_is_cheap():
+    # Mede a construção das tabelas num interpretador novo
+    code = ('import time; start = time.perf_counter(); import geometry; '
+            'print(time.perf_counter() - start)')
+    elapsed = float(subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__))))
+    assert elapsed < 0.1, elapsed
+
+
+def _assert_index_matches(board: Board):
+    fresh = board.copy()
+    fresh.index_pieces()
+    assert board.king_squares == fresh.king_squares
+    assert board.piece_squares == fresh.piece_squares
+
+
+def test_piece_index_follows_special_moves():
+    game = ChessGame(ai_enabled=False)
+    # Roque pequeno das brancas, en passant e promoção numa mesma partida
+    for move in [(4, 6, 4, 4), (0, 1, 0, 3), (6, 7, 5, 5), (0, 3, 0, 4), (5, 7, 4, 6),
+                 (7, 1, 7, 2), (4, 7, 6, 7), (7, 2, 7, 3), (1, 6, 1, 4), (0, 4, 1, 5),
+                 (7, 6, 7, 5), (1, 5, 0, 6), (7, 5, 7, 4), (0, 6, 1, 7)]:
+        assert game.make_move(*move), move
+        _assert_index_matches(game.board)
+    assert game.board.find_king(Color.WHITE) == (6, 7)
+    assert game.board.get_piece(5, 7) == 'w_rk'
+    assert game.board.get_piece(1, 4) is None
+    assert game.board.get_piece(1, 7) == 'b_qn'
+
+
+def test_piece_index_during_random_games():
+    rng = random.Random(11)
+    game = ChessGame(ai_enabled=False)
+    for _ in range(120):
+        moves = [(x, y, to_x, to_y)
+                 for square in sorted(game.board.piece_squares[COLOR_BITS[game.current_player] >> 3])
+                 for x, y in [(square % 8, square // 8)]
+                 for to_x, to_y in sorted(game.get_valid_moves(x, y))]
+        if not moves:
+            break
+        assert game.make_move(*rng.choice(moves))
+        _assert_index_matches(game.board)
+
+
+
+def _state(board: Board):
+    return (board.snapshot(), board.turn, board.castling_flags, board.en_passant,
+            list(board.king_squares), (set(board.piece_squares[0]), set(board.piece_squares[1])))
+
+
+def test_make_unmake_restores_every_field():
+    rng = random.Random(21)
+    board = Board()
+    for _ in range(150):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        before = _state(board)
+        for move in moves:
+            undo = board.make(move)
+            assert board.turn != before[1]
+            board.unmake(undo)
+            assert _state(board) == before
+        board.make(rng.choice(moves))
+
+
+def test_packed_moves_fill_reusable_buffers():
+    board = Board()
+    buffer = array('H')
+    assert board.generate_legal(buffer) is buffer and len(buffer) == 20
+    moves = board.legal_moves()
+    assert list(buffer) == moves
+    assert move_to_coordinates(encode_move(52, 36)) == (4, 6, 4, 4)
+    assert board.infer_move(52, 36) in moves  # e2e4 com a flag de avanço duplo
+
+    # Promoção: quatro lances por destino, dama primeiro; subpromoção desfeita por unmake
+    for square in range(64):
+        board.put(square, 0)
+    board.put(60, KING)
+    board.put(4, KING | BLACK_BIT)
+    board.put(9, PAWN)
+    promotions = [move for move in board.legal_moves(9) if move >> 6 & 63 == 1]
+    assert [move_promotion(move) for move in promotions] == [QUEEN, ROOK, 3, KNIGHT]
+    before = _state(board)
+    undo = board.make(promotions[-1])
+    assert board.squares[1] == KNIGHT and 9 not in board.piece_squares[0]
+    board.unmake(undo)
+    assert _state(board) == before
+
+
+def test_special_moves_carry_flags():
+    game = ChessGame(ai_enabled=False)
+    for move in [(4, 6, 4, 4), (0, 1, 0, 2), (4, 4, 4, 3), (3, 1, 3, 3)]:
+        assert game.make_move(*move)
+    assert encode_move(28, 19, EN_PASSANT_CAPTURE) in game.board.legal_moves(28)
+    for move in [(6, 7, 5, 5), (0, 2, 0, 3), (5, 7, 4, 6), (0, 3, 0, 4)]:
+        assert game.make_move(*move)
+    assert encode_move(60, 62, KING_CASTLE) in game.board.legal_moves(60)
+
+
+def test_zobrist_key_is_incremental():
+    rng = random.Random(33)
+    for backend in ('mailbox', 'bitboard'):
+        game = ChessGame(ai_enabled=False, board_backend=backend)
+        board = game.board
+        for _ in range(120):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            key = board.key
+            assert key == board.compute_key()
+            for move in moves:
+                undo = board.make(move)
+                assert board.key == board.compute_key() != key
+                board.unmake(undo)
+                assert board.key == key
+            board.make(rng.choice(moves))
+
+
+def test_zobrist_key_identifies_positions():
+    game = ChessGame(ai_enabled=False)
+    start = game.board.key
+    # Transposição: os cavalos vão e voltam
+    for move in [(6, 7, 5, 5), (6, 0, 5, 2), (5, 5, 6, 7), (5, 2, 6, 0)]:
+        assert game.make_move(*move)
+    assert game.board.key == start
+    # Mesmas peças com outro lado para jogar, ou sem direito de roque, são outra posição
+    game.board.turn = BLACK_BIT
+    assert game.board.key != start
+    game.board.turn = 0
+    game.board.white_king_moved = True
+    assert game.board.key != start
+    game.board.white_king_moved = False
+    # En passant só entra na chave se houver peão para capturar
+    assert game.make_move(4, 6, 4, 4)
+    without_en_passant = game.board.key
+    game.board.en_passant = -1
+    assert game.board.key == without_en_passant
+    game.board.set_piece(3, 4, Piece(Color.BLACK, PieceType.PAWN))
+    game.board.en_passant = 44
+    with_en_passant = game.board.key
+    game.board.en_passant = -1
+    assert with_en_passant != game.board.key == game.board.compute_key()
+
+
+def _count_legal_move_generation(board: Board):
+    calls = []
+    legal_moves = board.legal_moves
+    board.legal_moves = lambda origin=None: calls.append(origin) or legal_moves(origin)
+    return calls
+
+
+def test_position_status_is_computed_once_per_ply():
+    game = ChessGame(ai_enabled=False)
+    calls = _count_legal_move_generation(game.board)
+    for _ in range(60):
+        game.draw_game_status()
+    game.handle_click((450, 650))  # seleciona o peão de e2
+    assert game.valid_moves == {(4, 5), (4, 4)}
+    assert game.get_valid_moves(1, 7) == {(0, 5), (2, 5)}
+    assert len(calls) == 1
+    
+    game.handle_click((450, 450))  # e2e4: valida pela tabela e atualiza o estado
+    assert game.board.get_piece(4, 4) == 'w_pw'
+    assert len(calls) == 2
+    for _ in range(60):
+        game.draw_game_status()
+    assert len(calls) == 2
+    
+    game.undo_move()
+    assert game.get_valid_moves(4, 6) == {(4, 5), (4, 4)}
+    assert len(calls) == 3
+
+
+def test_position_status_reports_mate_and_check():
+    game = ChessGame(ai_enabled=False)
+    # Mate do pastor
+    for move in [(4, 6, 4, 4), (4, 1, 4, 3), (5, 7, 2, 4), (1, 0, 2, 2), (3, 7, 7, 3), (6, 0, 5, 2)]:
+        assert game.make_move(*move)
+    assert not game.status.in_check and game.status.result is None
+    assert not game.make_move(7, 3, 6, 1)  # lance ilegal recusado pela tabela
+    assert game.make_move(7, 3, 5, 1)
+    assert game.status.in_check and game.status.result == 'checkmate'
+    assert game.game_over and game.winner == Color.WHITE
+    assert game.get_valid_moves(4, 0) == set()
+    # Mexer no tabuleiro por fora muda a chave e refaz a tabela
+    game.board.set_piece(5, 1, None)
+    assert not game.status.in_check and game.status.result is None
+
+
+KNIGHT_SHUFFLE = [(6, 7, 5, 5), (6, 0, 5, 2), (5, 5, 6, 7), (5, 2, 6, 0)]
+
+
+def test_threefold_repetition():
+    game = ChessGame(ai_enabled=False)
+    for move in KNIGHT_SHUFFLE:
+        assert game.make_move(*move)
+    assert game.board.repetition_count() == 2
+    assert game.board.draw_reason() is None and game.board.draw_reason(repetitions=2) == 'repetition'
+    assert not game.game_over
+    for move in KNIGHT_SHUFFLE:
+        assert game.make_move(*move)
+    assert game.board.repetition_count() == 3
+    assert game.status.result == 'repetition'
+    assert game.game_over and game.winner is None
+    game.undo_move()
+    assert game.board.repetition_count() == 2 and game.status.result is None
+
+
+def test_pawn_move_resets_repetition_and_fifty_move_clock():
+    game = ChessGame(ai_enabled=False)
+    for move in KNIGHT_SHUFFLE[:2]:
+        assert game.make_move(*move)
+    assert game.board.halfmove_clock == 2
+    assert game.make_move(4, 6, 4, 4)
+    assert game.board.halfmove_clock == 0
+    after_pawn_move = game.board.key
+    for move in [(5, 2, 6, 0), (5, 5, 6, 7), (6, 0, 5, 2), (6, 7, 5, 5)]:
+        assert game.make_move(*move)
+    # Só conta desde o e4: as posições anteriores ao lance de peão não entram
+    assert game.board.key == after_pawn_move and game.board.repetition_count() == 2
+    game.undo_move()
+    assert game.board.halfmove_clock == 3
+    
+    game.board.halfmove_clock = 99
+    assert game.make_move(6, 7, 5, 5)
+    assert game.board.is_fifty_move_draw() and game.status.result == 'fifty_moves'
+
+
+def test_insufficient_material_signature():
+    def position(pieces):
+        board = Board()
+        for square in range(64):
+            board.put(square, 0)
+        board.put(60, KING)
+        board.put(4, KING | BLACK_BIT)
+        for square, code in pieces:
+            board.put(square, code)
+        return board
+    
+    assert position([]).is_insufficient_material()
+    assert position([(10, KNIGHT)]).is_insufficient_material()
+    assert position([(10, 3 | BLACK_BIT)]).is_insufficient_material()
+    assert not position([(10, KNIGHT), (11, KNIGHT | BLACK_BIT)]).is_insufficient_material()
+    assert not position([(10, PAWN | BLACK_BIT)]).is_insufficient_material()
+    assert not position([(10, ROOK)]).is_insufficient_material()
+    # Bispos de cada lado: c1 e f8 andam em casas escuras; c1 e c8, em cores diferentes
+    assert position([(58, 3), (5, 3 | BLACK_BIT)]).is_insufficient_material()
+    assert not position([(58, 3), (2, 3 | BLACK_BIT)]).is_insufficient_material()
+    board = position([(10, KNIGHT), (11, QUEEN | BLACK_BIT)])
+    board.turn = 0
+    undo = board.make(board.infer_move(10, 11))
+    assert board.is_insufficient_material() and board.draw_reason() == 'insufficient_material'
+    board.unmake(undo)
+    assert not board.is_insufficient_material()
+
+
+def test_null_move_passes_the_turn():
+    game = ChessGame(ai_enabled=False)
+    for move in [(4, 6, 4, 4), (3, 1, 3, 3), (4, 4, 4, 3), (5, 1, 5, 3)]:
+        assert game.make_move(*move)
+    board = game.board
+    before = _state(board) + (list(board.key_history),)
+    assert board.en_passant >= 0
+    undo = board.make_null()
+    # Outra vez, sem en passant e sem repetição através do lance nulo
+    assert board.turn == BLACK_BIT and board.en_passant == -1 and board.key == board.compute_key()
+    assert board.repetition_count() == 1
+    board.unmake_null(undo)
+    assert _state(board) + (list(board.key_history),) == before
+    # Só peões e rei: sem material de peça (final propenso a zugzwang)
+    assert board.has_non_pawn_material(0) and board.has_non_pawn_material(BLACK_BIT)
+    for square in range(64):
+        if board.squares[square] & TYPE_MASK not in (PAWN, KING, 0) and board.squares[square] & BLACK_BIT:
+            board.put(square, 0)
+    assert board.has_non_pawn_material(0) and not board.has_non_pawn_material(BLACK_BIT)
+
+
+def test_search_scores_repetition_as_draw():
+    game = ChessGame(ai_difficulty='medium')
+    for move in KNIGHT_SHUFFLE:
+        assert game.make_move(*move)
+    assert game.ai._negamax(game, 2, float('-inf'), float('inf')) == 0
+
+
+def test_undo_move_restores_castling_and_en_passant():
+    game = ChessGame(ai_enabled=False)
+    for move in [(4, 6, 4, 4), (3, 1, 3, 3), (4, 4, 4, 3), (5, 1, 5, 3)]:
+        assert game.make_move(*move)
+    assert game.en_passant_target == (5, 2)
+    assert game.make_move(4, 3, 5, 2)  # en passant
+    assert game.board.get_piece(5, 3) is None
+    game.undo_move()
+    assert game.board.get_piece(5, 3) == 'b_pw'
+    assert game.en_passant_target == (5, 2)
+    assert game.current_player == Color.WHITE
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
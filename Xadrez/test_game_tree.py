@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testes da árvore de partida (desfazer, refazer, variantes e fotos)
+"""
+
+import os
+import sys
+import random
+
+# Adicionar diretório ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from chess_new import ChessGame, Board
+from game_tree import GameTree, KEYFRAME_INTERVAL
+
+
+def _state(board: Board):
+    return (board.snapshot(), board.turn, board.castling_flags, board.en_passant, board.halfmove_clock,
+            board.key, list(board.key_history), list(board.king_squares))
+
+
+def _random_line(tree: GameTree, rng: random.Random, length: int):
+    """Joga lances aleatórios guardando o estado depois de cada um"""
+    states = {}
+    for _ in range(length):
+        moves = tree.board.legal_moves()
+        if not moves:
+            break
+        node = tree.play(rng.choice(moves))
+        states[node] = _state(tree.board)
+    return states
+
+
+def test_undo_redo_walks_the_line():
+    rng = random.Random(4)
+    tree = GameTree(Board())
+    start = _state(tree.board)
+    states = _random_line(tree, rng, 40)
+    last = tree.current
+    while tree.undo():
+        pass
+    assert tree.current is tree.root and _state(tree.board) == start
+    while tree.redo():
+        assert _state(tree.board) == states[tree.current]
+    assert tree.current is last
+
+
+def test_variations_and_goto():
+    rng = random.Random(9)
+    tree = GameTree(Board())
+    states = _random_line(tree, rng, 3 * KEYFRAME_INTERVAL)
+    main_line = tree.line()
+    # Volta 50 lances e abre uma variante longa
+    tree.goto_ply(tree.current.ply - 50)
+    branch_point = tree.current
+    states.update(_random_line(tree, rng, 2 * KEYFRAME_INTERVAL))
+    assert tree.line()[:branch_point.ply] == main_line[:branch_point.ply]
+    assert len(branch_point.children) == 2
+
+    # Saltos entre nós quaisquer das duas variantes (por ancestral comum ou por foto)
+    nodes = list(states)
+    for _ in range(60):
+        node = rng.choice(nodes)
+        tree.goto(node)
+        assert tree.current is node
+        assert _state(tree.board) == states[node]
+
+    # Jogar um lance que já existe reaproveita o nó
+    tree.goto(branch_point)
+    child = branch_point.children[0]
+    assert tree.play(child.move) is child and len(branch_point.children) == 2
+
+
+def test_keyframes_are_periodic():
+    tree = GameTree(Board())
+    _random_line(tree, random.Random(2), 2 * KEYFRAME_INTERVAL + 5)
+    frames = [node.ply for node in [tree.root] + tree.current.path() if node.keyframe is not None]
+    assert frames == [0, KEYFRAME_INTERVAL, 2 * KEYFRAME_INTERVAL]
+
+
+def test_game_undo_and_redo():
+    game = ChessGame(ai_enabled=False)
+    for move in [(4, 6, 4, 4), (3, 1, 3, 3), (4, 4, 4, 3), (5, 1, 5, 3), (4, 3, 5, 2)]:
+        assert game.make_move(*move)
+    after = game.board.snapshot()
+    game.undo_move()
+    game.undo_move()
+    assert game.board.get_piece(5, 1) == 'b_pw'
+    game.redo_move()
+    game.redo_move()
+    assert game.board.snapshot() == after and game.board.get_piece(5, 3) is None
+    # Depois de desfazer, outro lance abre uma variante e o redo segue por ela
+    game.undo_move()
+    assert game.make_move(3, 6, 3, 4)
+    game.undo_move()
+    game.redo_move()
+    assert game.board.get_piece(3, 4) == 'w_pw'
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testes da busca paralela na raiz
+"""
+
+import os
+import sys
+import time
+import threading
+
+# Adicionar diretório ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from chess_new import ChessAI, SearchPosition, Board
+from position import board_from_fen, parse_square
+from parallel import BENCHMARK_FENS, RootSplitPool
+
+
+def test_parallel_root_matches_sequential():
+    # Sem tabela e sem poda a nota da raiz é a do minimax, qualquer que seja a divisão
+    parallel = ChessAI('hard', hash_mb=0, workers=2)
+    sequential = ChessAI('hard', hash_mb=0)
+    parallel.pruning = set()
+    sequential.pruning = set()
+    try:
+        for fen in BENCHMARK_FENS[:4]:
+            position = SearchPosition(board_from_fen(fen))
+            move = parallel.search(position, max_depth=3)
+            assert move in position.board.legal_moves()
+            assert parallel.nodes > 0
+            sequential.search(SearchPosition(board_from_fen(fen)), max_depth=3)
+            assert parallel.score == sequential.score
+            assert parallel.depth_reached == 3
+    finally:
+        parallel.close()
+
+
+def test_parallel_search_keeps_table_and_pv():
+    ai = ChessAI('hard', workers=2)
+    try:
+        position = SearchPosition(board_from_fen(BENCHMARK_FENS[2]))
+        move = ai.search(position, max_depth=4)
+        # A linha do processo que buscou o melhor lance chega à tabela do processo principal
+        assert ai.pv[0] == move and len(ai.pv) >= 2
+        board = position.board
+        undos = []
+        for pv_move in ai.pv:
+            assert pv_move in board.legal_moves()
+            undos.append(board.make(pv_move))
+        for undo in reversed(undos):
+            board.unmake(undo)
+    finally:
+        ai.close()
+
+
+def test_parallel_search_stops():
+    ai = ChessAI('hard', workers=2)
+    try:
+        # Primeira busca sobe os processos
+        ai.search(SearchPosition(Board()), max_depth=2)
+        position = SearchPosition(board_from_fen(BENCHMARK_FENS[1]))
+        start = time.perf_counter()
+        move = ai.search(position, move_time=0.3)
+        assert time.perf_counter() - start < 1.0
+        assert move in position.board.legal_moves()
+        timer = threading.Timer(0.2, ai.stop)
+        timer.start()
+        start = time.perf_counter()
+        move = ai.search(position)
+        assert time.perf_counter() - start < 1.0
+        timer.join()
+        assert move in position.board.legal_moves()
+    finally:
+        ai.close()
+
+
+def test_pool_sends_packed_position_and_history():
+    board = Board()
+    for move in ['g1f3', 'g8f6', 'f3g1', 'f6g8']:
+        board.make(_parse(board, move))
+    pool = RootSplitPool(1)
+    try:
+        pool.begin(board, 1, 2, -1.0, 1.0, None, ChessAI.PRUNING)
+        packed, history = pool._job[:2]
+        assert len(packed) == 37
+        # As chaves para reconhecer repetição (a posição inicial já se repetiu uma vez)
+        assert history == tuple(board.key_history) and board.key in history
+        # Só as chaves desde o último lance irreversível
+        board.make(_parse(board, 'e2e4'))
+        pool.begin(board, 1, 2, -1.0, 1.0, None, ChessAI.PRUNING)
+        assert pool._job[1] == ()
+    finally:
+        pool.close()
+
+
+def test_cancel_does_not_stop_the_next_task():
+    board = board_from_fen(BENCHMARK_FENS[1])
+    moves = board.legal_moves()
+    pool = RootSplitPool(1, hash_mb=1)
+    try:
+        for _ in range(10):
+            # Um lance fundo cancelado no meio e logo em seguida uma tarefa nova
+            pool.begin(board, 1, 8, float('-inf'), float('inf'), None, ChessAI.PRUNING)
+            future = pool.submit(moves[0], first=True)
+            time.sleep(0.02)
+            pool.cancel([future])
+            pool.begin(board, 1, 2, float('-inf'), float('inf'), None, ChessAI.PRUNING)
+            move, score, raised, nodes, line = pool.submit(moves[1], first=True).result()
+            assert move == moves[1] and score is not None
+    finally:
+        pool.close()
+
+
+def _parse(board: Board, text: str) -> int:
+    origin, target = parse_square(text[:2]), parse_square(text[2:4])
+    return next(move for move in board.legal_moves() if move & 63 == origin and move >> 6 & 63 == target)
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testes de FEN e da codificação binária compacta de posições
+"""
+
+import os
+import sys
+import random
+
+# Adicionar diretório ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from chess_new import ChessGame, Board, Color, WHITE_ROOK_H_MOVED
+from bitboard import BitBoard
+from position import (
+    board_from_fen, board_to_fen, pack, pack_into, unpack, ply_count, PACKED_SIZE, START_FEN,
+)
+
+FENS = [
+    START_FEN,
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+    'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3',
+    '4k3/8/8/8/8/8/8/4K2R b K - 17 42',
+]
+
+
+def _state(board: Board):
+    return (board.snapshot(), board.turn, board.castling_flags, board.en_passant, board.halfmove_clock, board.key)
+
+
+def test_fen_round_trip():
+    for fen in FENS:
+        board = board_from_fen(fen)
+        assert board_to_fen(board) == fen
+        assert board.key == board.compute_key()
+    assert board_to_fen(Board()) == START_FEN
+    assert _state(board_from_fen(START_FEN)) == _state(Board())
+
+
+def test_fen_state():
+    board = board_from_fen(FENS[4])
+    assert board.turn == 0 and board.en_passant == 2 * 8 + 5
+    assert board.get_piece(4, 3).code == board.squares[28]
+    assert ply_count(board) == 4
+    board = board_from_fen(FENS[5])
+    assert board.castling_flags == 63 & ~(1 | WHITE_ROOK_H_MOVED)
+    assert board.halfmove_clock == 17 and ply_count(board) == 83
+    # Só as peças: brancas jogam, sem roque
+    assert board_to_fen(board_from_fen('8/8/4k3/8/8/4K3/4P3/8')) == '8/8/4k3/8/8/4K3/4P3/8 w - - 0 1'
+
+
+def test_fen_perft():
+    # Posições 2, 3 e 4 do perft carregadas pelo FEN nos dois motores
+    for fen, counts in [(FENS[1], [48, 2039]), (FENS[2], [14, 191, 2812]), (FENS[3], [6, 264])]:
+        for board_class in (Board, BitBoard):
+            board = board_from_fen(fen, board_class)
+            assert [board.perft(depth) for depth in range(1, len(counts) + 1)] == counts
+
+
+def test_invalid_fen():
+    for fen in ['', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1',
+                'rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+                'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1',
+                'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KX - 0 1',
+                'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e9 0 1']:
+        try:
+            board_from_fen(fen)
+        except ValueError:
+            continue
+        raise AssertionError(f"FEN deveria ser rejeitado: {fen!r}")
+
+
+def test_pack_round_trip():
+    rng = random.Random(14)
+    board = Board()
+    for _ in range(120):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        board.make(rng.choice(moves))
+        data = pack(board)
+        assert len(data) == PACKED_SIZE
+        decoded = unpack(data)
+        assert _state(decoded) == _state(board)
+        assert ply_count(decoded) == ply_count(board)
+        assert board_to_fen(decoded) == board_to_fen(board)
+        assert sorted(decoded.legal_moves()) == sorted(board.legal_moves())
+
+
+def test_unpack_from_shared_buffer():
+    boards = [board_from_fen(fen) for fen in FENS]
+    buffer = bytearray(PACKED_SIZE * len(boards))
+    for index, board in enumerate(boards):
+        pack_into(buffer, index * PACKED_SIZE, board)
+    view = memoryview(buffer)
+    for index, board in enumerate(boards):
+        decoded = unpack(view, index * PACKED_SIZE, BitBoard)
+        assert isinstance(decoded, BitBoard)
+        assert board_to_fen(decoded) == FENS[index]
+        assert decoded.bitboards == board_from_fen(FENS[index], BitBoard).bitboards
+
+
+def test_game_load_fen():
+    game = ChessGame(ai_enabled=False)
+    game.load_fen('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+    assert game.game_over and game.status.result == 'stalemate'
+    game.load_fen(FENS[4])
+    assert game.current_player == Color.WHITE and not game.game_over
+    assert game.make_move(4, 3, 5, 2)  # exf6 en passant
+    assert game.board.get_piece(5, 3) is None
+    game.undo_move()
+    assert board_to_fen(game.board) == FENS[4]
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
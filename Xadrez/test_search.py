@@ -0,0 +1,446 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testes da busca da IA (seletor de lances e ordenação)
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+
+# Adicionar diretório ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame as pg
+
+from chess_new import (
+    ChessGame, ChessAI, Board, Color, AI_MOVE_EVENT, KNIGHT, ROOK, MATE, MATE_BOUND, CAPTURE, DOUBLE_PUSH,
+    encode_move, move_to_coordinates,
+)
+from test_bitboard import board_from_rows
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R'
+
+
+def test_picker_yields_every_legal_move_once():
+    rng = random.Random(8)
+    ai = ChessAI('medium')
+    game = ChessGame(ai_enabled=False)
+    board = game.board
+    for _ in range(80):
+        legal = board.legal_moves()
+        if not legal:
+            break
+        hash_move = rng.choice(legal)
+        ai._killers[2][0] = rng.choice(legal)
+        picked = list(ai._ordered_moves(board, 2, hash_move))
+        assert sorted(picked) == sorted(legal)
+        assert picked[0] == hash_move
+        board.make(rng.choice(legal))
+
+
+def test_picker_stages():
+    board = board_from_rows(KIWIPETE)
+    ai = ChessAI('medium')
+    picked = list(ai._ordered_moves(board, 2))
+    noisy = [move >> 12 >= CAPTURE for move in picked]
+    first_quiet = noisy.index(False)
+    # Capturas boas, depois calmos, depois capturas ruins
+    assert noisy[0] and sum(1 for a, b in zip(noisy, noisy[1:]) if a != b) == 2
+    # Bxa6 (bispo não defendido) vem antes dos calmos; Qxf6 (cavalo defendido) depois
+    assert picked.index(encode_move(52, 16, CAPTURE)) < first_quiet
+    assert picked.index(encode_move(45, 21, CAPTURE)) > first_quiet
+
+
+def test_picker_generates_quiet_moves_lazily():
+    board = Board()
+    calls = []
+    generate_legal = board.generate_legal
+    board.generate_legal = lambda moves, origin=None, noisy=None, context=None: \
+        calls.append(noisy) or generate_legal(moves, origin, noisy, context)
+    ai = ChessAI('medium')
+    ai._killers[2][0] = encode_move(52, 36, DOUBLE_PUSH)  # e2e4
+    picker = ai._ordered_moves(board, 2)
+    assert next(picker) == encode_move(52, 36, DOUBLE_PUSH)
+    assert calls == [True]
+    next(picker)
+    assert calls == [True, False]
+
+
+def test_ai_finds_mate_in_one_with_picker():
+    # Dama branca em h5, bispo em c4: Qxf7#
+    game = ChessGame(ai_enabled=False)
+    for move in [(4, 6, 4, 4), (4, 1, 4, 3), (5, 7, 2, 4), (1, 0, 2, 2), (3, 7, 7, 3), (6, 0, 5, 2)]:
+        assert game.make_move(*move)
+    ai = ChessAI('medium')
+    assert ai.get_best_move(game, game.current_player) == (7, 3, 5, 1)
+
+
+# Plies de quiescência além do horizonte nos testes contra o minimax (a completa é lenta demais sem poda)
+REFERENCE_QUIESCENCE_PLIES = 2
+
+
+def _shallow_ai(depth: int) -> ChessAI:
+    """IA sem tabela nem podas seletivas, com a quiescência cortada em REFERENCE_QUIESCENCE_PLIES plies"""
+    ai = ChessAI('medium', hash_mb=0)
+    ai.pruning.clear()
+    del ai._move_buffers[depth + REFERENCE_QUIESCENCE_PLIES:]
+    return ai
+
+
+def test_mate_scores_count_plies():
+    # Mate em 2: 1.Kf7 Kh7 2.Rh1#; do lado preto, a defesa que adia o mate
+    game = ChessGame(ai_enabled=False)
+    game.load_fen('7k/8/5K2/8/8/8/8/R7 w - - 0 1')
+    ai = ChessAI('hard')
+    assert move_to_coordinates(ai.search(game, max_depth=8)) == (5, 2, 5, 1)
+    # Parou no primeiro mate achado, sem ir até max_depth
+    assert ai.score == MATE - 3 and ai.depth_reached == 3
+    # A segunda busca lê da tabela mates guardados em outros plies: mesma distância
+    assert move_to_coordinates(ai.search(game, max_depth=8)) == (5, 2, 5, 1)
+    assert ai.score == MATE - 3
+    game.load_fen('7k/8/5K2/8/8/8/8/R7 b - - 0 1')
+    ai.search(game, max_depth=8)
+    assert ai.score == -(MATE - 4) and ai.score <= -MATE_BOUND
+
+
+def _minimax_reference(game: ChessGame, depth: int):
+    """Minimax completo, sem poda (a busca antiga): devolve (lances ótimos, nota, nós visitados)"""
+    board = game.board
+    ai = _shallow_ai(depth)
+    nodes = 0
+
+    def search(depth, ply):
+        nonlocal nodes
+        # Folhas: a mesma quiescência, com janela completa (nota exata)
+        if depth == 0:
+            return ai._quiescence(game, float('-inf'), float('inf'), ply)
+        nodes += 1
+        if board.draw_reason(repetitions=2):
+            return 0
+        best = None
+        for move in board.legal_moves():
+            undo = board.make(move)
+            score = -search(depth - 1, ply + 1)
+            board.unmake(undo)
+            best = score if best is None else max(best, score)
+        if best is None:
+            return -(MATE - ply) if game.is_in_check(game.current_player) else 0
+        return best
+
+    scores = {}
+    for move in board.legal_moves():
+        undo = board.make(move)
+        scores[move] = -search(depth - 1, 1)
+        board.unmake(undo)
+    best_score = max(scores.values())
+    return {move for move, score in scores.items() if score == best_score}, best_score, nodes + ai.nodes
+
+
+def test_alpha_beta_matches_minimax():
+    positions = [
+        (None, 3),
+        ('r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3', 3),
+        ('r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4', 2),
+        ('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1', 3),
+        (KIWIPETE + ' w KQkq - 0 1', 2),
+    ]
+    nodes = full_width_nodes = 0
+    for fen, depth in positions:
+        game = ChessGame(ai_enabled=False)
+        if fen:
+            game.load_fen(fen)
+        best_moves, best_score, reference_nodes = _minimax_reference(game, depth)
+        # Uma iteração de profundidade fixa, sem tabela, com a mesma quiescência: mesma nota
+        # que o minimax (entre lances empatados a ordenação decide qual sai)
+        ai = _shallow_ai(depth)
+        move, score = ai._search_root(game, depth)
+        assert move in best_moves and score == best_score
+        nodes += ai.nodes
+        full_width_nodes += reference_nodes
+    # Nas posições táticas quase tudo é quiescência em xeque; no conjunto a poda corta mais da metade
+    assert nodes < full_width_nodes / 2
+
+
+def test_aspiration_windows_keep_the_score():
+    game = ChessGame(ai_enabled=False)
+    game.load_fen('r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3')
+    scores = []
+    for window in (0, ChessAI.ASPIRATION_WINDOW, 0.1):
+        # Sem tabela nem podas a nota exata não depende do caminho: a janela não pode mudá-la
+        ai = ChessAI('hard', hash_mb=0)
+        ai.pruning.clear()
+        ai.ASPIRATION_WINDOW = window
+        ai.search(game, max_depth=3)
+        scores.append(ai.score)
+    assert scores[0] == scores[1] == scores[2]
+    # Fora da janela a raiz devolve o limite que falhou
+    ai = ChessAI('hard', hash_mb=0)
+    ai.pruning.clear()
+    score = scores[0]
+    assert ai._search_root(game, 3, 0, score + 1, score + 2)[1] == score + 1
+    move, bound = ai._search_root(game, 3, 0, score - 2, score - 1)
+    assert bound == score - 1 and move in game.board.legal_moves()
+
+
+def test_first_move_cutoff_rate():
+    game = ChessGame(ai_enabled=False)
+    game.load_fen(KIWIPETE + ' w KQkq - 0 1')
+    ai = ChessAI('hard', hash_mb=0)
+    ai.search(game, max_depth=4)
+    stats = ai.search_stats()
+    assert stats['cutoffs'] > 0 and stats['first_move_rate'] > 0.8
+    # No kiwipete as refutações são capturas; da posição inicial saem cortes calmos
+    ai.search(ChessGame(ai_enabled=False), max_depth=4)
+    assert any(ai._history) and any(ai._countermoves) and any(killers[0] for killers in ai._killers)
+
+
+def test_selective_search_switches():
+    game = ChessGame(ai_enabled=False)
+    game.load_fen('r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3')
+    nodes = {}
+    for name in sorted(ChessAI.PRUNING) + ['all', 'none']:
+        ai = ChessAI('hard')
+        ai.pruning = {'all': set(ChessAI.PRUNING), 'none': set()}.get(name, {name})
+        move = ai.search(game, max_depth=4)
+        assert move in game.board.legal_moves()
+        nodes[name] = ai.nodes
+    assert nodes['all'] < nodes['none'] / 2
+    assert all(nodes[name] <= nodes['none'] for name in ChessAI.PRUNING)
+    assert ChessAI('hard').pruning == set(ChessAI.PRUNING)
+
+
+def test_iterative_deepening_respects_time():
+    game = ChessGame(ai_enabled=False)
+    ai = ChessAI('hard')
+    start = time.perf_counter()
+    move = ai.get_best_move(game, game.current_player, move_time=0.2)
+    elapsed = time.perf_counter() - start
+    # Parou pelo prazo, não pela profundidade (a margem só cobre máquinas lentas)
+    assert 1 <= ai.depth_reached < ai.max_depth
+    assert elapsed < 1.0
+    assert game.status.find(move[1] * 8 + move[0], move[3] * 8 + move[2])
+    # Sem tempo nenhum ainda sai um lance legal
+    game.load_fen(KIWIPETE + ' w KQkq - 0 1')
+    move = ai.get_best_move(game, game.current_player, move_time=0.0)
+    assert game.status.find(move[1] * 8 + move[0], move[3] * 8 + move[2])
+
+
+def test_search_stops_on_request():
+    game = ChessGame(ai_enabled=False)
+    ai = ChessAI('hard')
+    timer = threading.Timer(0.1, ai.stop)
+    timer.start()
+    start = time.perf_counter()
+    move = ai.search(game)
+    assert time.perf_counter() - start < 0.5
+    timer.join()
+    assert move in game.board.legal_moves()
+    # A busca interrompida deixa o tabuleiro como estava
+    assert game.board.snapshot() == Board().snapshot() and game.board.key_history == []
+    # Parada antes de terminar o primeiro lance da profundidade 1: ainda um lance legal
+    for hash_mb in (0, 1):
+        ai = ChessAI('hard', hash_mb=hash_mb)
+        ai._begin_search(game.board, ai.max_depth, None)
+        ai.stop()
+        assert ai._iterate(game, ai.max_depth) in game.board.legal_moves()
+
+
+def test_explicit_depth_is_not_capped():
+    game = ChessGame(ai_enabled=False)
+    ai = ChessAI('medium', hash_mb=0)
+    ai.search(game, max_depth=ai.max_depth + 1)
+    assert ai.depth_reached == ai.max_depth + 1
+    assert len(ai._killers) > ai.depth_reached
+
+
+def test_search_state_carries_over():
+    game = ChessGame(ai_enabled=False)
+    ai = ChessAI('medium')
+    ai.search(game, max_depth=4)
+    board = game.board
+    assert len(ai.pv) >= 2 and not ai.predicted
+    # A variante principal é uma sequência de lances legais a partir da raiz
+    undos = []
+    for move in ai.pv:
+        assert move in board.legal_moves()
+        undos.append(board.make(move))
+    for undo in reversed(undos):
+        board.unmake(undo)
+    # O adversário joga a resposta prevista
+    game.make_move(*move_to_coordinates(ai.pv[0]))
+    game.make_move(*move_to_coordinates(ai.pv[1]))
+    fresh = ChessAI('medium')
+    fresh.search(game, max_depth=4)
+    move = ai.search(game, max_depth=4)
+    assert ai.predicted and ai.search_stats()['predicted']
+    assert move in game.board.legal_moves()
+    assert ai.nodes < fresh.nodes
+    # Entre jogadas os killers descem dois plies e o histórico perde peso, sem zerar
+    ai._killers[2][:] = (move, 0)
+    ai._history[move & 0xFFF] = 40
+    ai._age_search_state(game.board)
+    assert ai._killers[0] == [move, 0]
+    assert ai._history[move & 0xFFF] == 40 >> ChessAI.HISTORY_AGING
+    # Um lance fora da previsão não aproveita a variante
+    game.undo_move()
+    game.make_move(*move_to_coordinates(next(m for m in game.board.legal_moves() if m != ai.pv[1])))
+    ai.search(game, max_depth=2)
+    assert not ai.predicted
+
+
+def test_ponder_hit_continues_the_search():
+    game = ChessGame(ai_enabled=False)
+    ai = ChessAI('hard')
+    game.make_move(*ai.get_best_move(game, game.current_player, move_time=0.2))
+    reply = ai.pv[1]
+    state = (game.board.snapshot(), game.board.key, list(game.board.key_history))
+    assert ai.ponder(game) and ai.pondering
+    time.sleep(0.3)
+    # O ponder roda numa cópia: o tabuleiro da partida não se mexe
+    assert (game.board.snapshot(), game.board.key, game.board.key_history) == state
+    game.make_move(*move_to_coordinates(reply))
+    # Já pensou mais que o prazo inteiro: responde na hora
+    start = time.perf_counter()
+    move = ai.get_best_move(game, game.current_player, move_time=0.2)
+    assert time.perf_counter() - start < 0.1
+    assert ai.pondered and ai.search_stats()['pondered'] and not ai.pondering
+    assert ai.depth_reached >= 2
+    assert game.status.find(move[1] * 8 + move[0], move[3] * 8 + move[2])
+
+
+def test_ponder_miss_and_cancel():
+    game = ChessGame(ai_enabled=True, ai_difficulty='hard', ai_ponder=True)
+    ai = game.ai
+    game.make_move(*ai.get_best_move(game, game.current_player, move_time=0.1))
+    reply = ai.pv[1]
+    assert ai.ponder(game)
+    thread = ai._ponder_thread
+    # Resposta fora da previsão: o ponder para já no lance do jogador
+    game.make_move(*move_to_coordinates(next(m for m in game.board.legal_moves() if m != reply)))
+    assert not ai.pondering and not thread.is_alive()
+    move = ai.get_best_move(game, game.current_player, move_time=0.1)
+    assert not ai.pondered
+    assert game.status.find(move[1] * 8 + move[0], move[3] * 8 + move[2])
+    # Desfazer cancela o ponder na hora
+    game.make_move(*move)
+    assert ai.ponder(game)
+    thread = ai._ponder_thread
+    start = time.perf_counter()
+    game.undo_move()
+    assert time.perf_counter() - start < 0.1
+    assert not ai.pondering and not thread.is_alive()
+    # Sem resposta prevista não há o que pensar
+    ai.pv = ai.pv[:1]
+    assert not ai.ponder(game) and not ai.pondering
+
+
+def test_ponder_stops_when_the_game_ends():
+    game = ChessGame(ai_enabled=True, ai_difficulty='hard', ai_ponder=True)
+    game.load_fen('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+    ai = game.ai
+    board = game.board
+    # Previsão: o jogador responde Kf1; ele dá Ra8 mate e a partida acaba
+    reply = game.status.find(62, 61)
+    undo = board.make(reply)
+    ai.pv, ai._predicted_key = [0, reply], board.key
+    board.unmake(undo)
+    assert ai.ponder(game)
+    thread = ai._ponder_thread
+    assert game.make_move(0, 7, 0, 0) and game.game_over
+    assert not ai.pondering and not thread.is_alive()
+
+
+def test_new_game_keeps_settings():
+    game = ChessGame(ai_enabled=True, ai_difficulty='hard', player_color=Color.BLACK, board_backend='bitboard',
+                     ai_hash_mb=1, ai_ponder=True, ai_workers=2)
+    old_ai = game.ai
+    closed = []
+    old_ai.close = lambda: closed.append(True)
+    game.make_move(4, 6, 4, 4)
+    game.new_game()
+    assert type(game.board).__name__ == 'BitBoard' and not game.board.key_history
+    assert game.ai is not old_ai and closed
+    assert (game.ai.difficulty, game.ai.hash_mb, game.ai.workers) == ('hard', 1, 2)
+    assert game.ai_ponder and game.player_color == Color.BLACK
+
+
+def _wait_ai_move(timeout_ms: int):
+    """Primeiro AI_MOVE_EVENT da fila (None se não chegar a tempo)"""
+    deadline = pg.time.get_ticks() + timeout_ms
+    while pg.time.get_ticks() < deadline:
+        for event in pg.event.get(AI_MOVE_EVENT):
+            return event
+        pg.time.wait(5)
+    return None
+
+
+def test_think_runs_in_background():
+    game = ChessGame(ai_enabled=True, ai_difficulty='hard', player_color=Color.BLACK)
+    ai = game.ai
+    state = (game.board.snapshot(), game.board.key, list(game.board.key_history))
+    start = time.perf_counter()
+    ai.think(game, move_time=0.3)
+    assert time.perf_counter() - start < 0.05 and ai.thinking
+    event = _wait_ai_move(2000)
+    assert event is not None and event.key == game.board.key
+    assert event.move in game.board.legal_moves()
+    assert ai.progress['depth'] >= 1 and ai.progress['move'] is not None
+    # A busca usou uma cópia: o tabuleiro que a interface desenha não mudou
+    assert (game.board.snapshot(), game.board.key, game.board.key_history) == state
+    # stop() faz jogar já o melhor lance até ali
+    ai.think(game, move_time=60.0)
+    time.sleep(0.1)
+    ai.stop()
+    event = _wait_ai_move(500)
+    assert event is not None and event.move in game.board.legal_moves()
+    # stop_thinking() cancela sem postar o lance
+    ai.think(game, move_time=60.0)
+    start = time.perf_counter()
+    ai.stop_thinking()
+    assert time.perf_counter() - start < 0.1 and not ai.thinking
+    assert _wait_ai_move(200) is None
+
+
+def test_ai_move_event_keeps_the_promotion():
+    # f8=D afoga; a IA escolhe f8=T (mate em seguida) e é esse lance que a partida joga
+    game = ChessGame(ai_enabled=True, ai_difficulty='hard', player_color=Color.BLACK)
+    game.load_fen('8/5P1k/5K2/8/8/8/8/8 w - - 0 1')
+    game.ai_thinking = True
+    game.ai.think(game, move_time=0.5)
+    event = _wait_ai_move(3000)
+    assert event is not None and event.move >> 12 & 3 == ROOK - KNIGHT
+    game.play_ai_move(event)
+    assert game.board.squares[5] == ROOK and not game.game_over
+
+
+def test_window_keeps_drawing_while_ai_thinks():
+    game = ChessGame(ai_enabled=True, ai_difficulty='hard', player_color=Color.BLACK)
+    frames = []
+    draw = game.draw
+    game.draw = lambda: frames.append(game.ai_thinking) or draw()
+    threading.Timer(1.0, pg.event.post, (pg.event.Event(pg.QUIT),)).start()
+    game.run()
+    # A IA (brancas) pensa 1,5 s de 'hard'; o laço continua desenhando enquanto ela pensa
+    # (antes a janela congelava até o lance). Só um mínimo: o ritmo depende da máquina
+    assert sum(frames) >= 5
+    assert not game.ai.thinking
+
+
+def test_time_budget():
+    ai = ChessAI('hard')
+    assert ai.time_budget() == ai.move_time
+    assert ai.time_budget(move_time=0.7) == 0.7
+    assert ai.time_budget(clock=60.0, increment=1.0) == 60.0 / 30 + 0.75
+    assert ai.time_budget(clock=1.0, increment=5.0) == 0.5
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testes da tabela de transposição (tamanho fixo, substituição e uso na busca)
+"""
+
+import os
+import sys
+
+# Adicionar diretório ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from chess_new import ChessGame, ChessAI, move_to_coordinates
+from transposition import TranspositionTable, ENTRY_SIZE, EXACT, LOWER, UPPER
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+def test_table_respects_memory_budget():
+    for megabytes in (1, 3, 16):
+        table = TranspositionTable(megabytes)
+        assert table.size_bytes <= megabytes * 1024 * 1024 < 2 * table.size_bytes
+        assert len(table) == 2 * (table.mask + 1)
+        assert len(table) * ENTRY_SIZE == table.size_bytes
+
+
+def test_store_and_probe():
+    table = TranspositionTable(1)
+    key = 0x123456789ABCDEF0
+    assert table.probe(key) is None
+    table.store(key, 4, LOWER, 2.5, 1234)
+    assert table.probe(key) == (1234, 4, LOWER, 2.5)
+    # Mesmo índice, outra chave: não confunde
+    assert table.probe(key ^ (1 << 63)) is None
+    # Limite superior sem lance mantém o lance anterior
+    table.store(key, 5, UPPER, float('-inf'), 0)
+    assert table.probe(key) == (1234, 5, UPPER, float('-inf'))
+    assert table.stats()['hits'] == 2 and table.stats()['probes'] == 4
+
+
+def test_bucket_replacement():
+    table = TranspositionTable(1)
+    deep, shallow, newer = 5, 5 + table.mask + 1, 5 + 2 * (table.mask + 1)
+    table.store(deep, 6, EXACT, 1.0, 10)
+    # Mais raso no mesmo balde: vai para a entrada "sempre substitui"
+    table.store(shallow, 2, EXACT, 2.0, 20)
+    assert table.probe(deep)[0] == 10 and table.probe(shallow)[0] == 20
+    table.store(newer, 1, EXACT, 3.0, 30)
+    assert table.probe(deep)[0] == 10 and table.probe(shallow) is None and table.probe(newer)[0] == 30
+    # Numa busca nova a entrada funda antiga pode ser substituída
+    table.new_search()
+    table.store(shallow, 1, EXACT, 2.0, 20)
+    assert table.probe(deep) is None and table.probe(shallow)[0] == 20
+
+
+def test_table_saves_nodes_and_reports_rates():
+    game = ChessGame(ai_enabled=False)
+    game.load_fen(KIWIPETE)
+    plain = ChessAI('hard', hash_mb=0)
+    plain.search(game, max_depth=4)
+    ai = ChessAI('hard', hash_mb=1)
+    ai.search(game, max_depth=4)
+    assert ai.nodes < plain.nodes
+    stats = ai.tt.stats()
+    assert stats['hits'] > 0 and stats['cutoffs'] > 0
+    assert 0 < stats['cutoff_rate'] <= stats['hit_rate'] <= 1
+    # A mesma posição de novo: a raiz já tem o lance e os filhos têm notas prontas
+    first_nodes = ai.nodes
+    move = move_to_coordinates(ai.search(game, max_depth=4))
+    assert ai.nodes < first_nodes / 2
+    assert game.status.find(move[1] * 8 + move[0], move[3] * 8 + move[2])
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
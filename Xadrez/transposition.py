@@ -0,0 +1,107 @@
+"""
+Tabela de transposição da IA do chess_new
+
+Memória fixa, alocada uma vez em três arrays paralelos (sem dict crescendo):
+
+    keys[i]    chave Zobrist completa (64 bits, confere colisões de índice)
+    data[i]    lance (16 bits) | profundidade << 16 (8 bits) | limite << 24 (2 bits) | idade << 26 (6 bits)
+    scores[i]  nota (float; mates relativos ao nó, a busca converte na entrada e na saída)
+
+São 20 bytes por entrada. As entradas vêm em baldes de duas: a primeira só é
+substituída por uma busca de profundidade igual ou maior (ou se for de uma
+busca antiga), a segunda é sempre substituída. O número de baldes é a maior
+potência de dois que cabe no orçamento, então o índice é só key & mask.
+
+    table = TranspositionTable(64)   # MB
+    table.store(board.key, depth, LOWER, score, move)
+    entry = table.probe(board.key)   # (lance, profundidade, limite, nota) ou None
+"""
+
+from array import array
+from typing import Optional, Tuple
+
+# Tipo da nota guardada: exata, limite inferior (corte beta) ou superior (nenhum lance passou de alpha)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+ENTRY_SIZE = 8 + 4 + 8
+DEFAULT_HASH_MB = 16
+_AGE_MASK = 63
+
+
+class TranspositionTable:
+    """Tabela de tamanho fixo com baldes (profundidade preferida, sempre substitui)"""
+
+    def __init__(self, megabytes: float = DEFAULT_HASH_MB):
+        buckets = 1
+        while buckets * 4 * ENTRY_SIZE <= megabytes * 1024 * 1024:
+            buckets *= 2
+        self.mask = buckets - 1
+        size = buckets * 2
+        self.keys = array('Q', bytes(8 * size))
+        self.data = array('I', bytes(4 * size))
+        self.scores = array('d', bytes(8 * size))
+        self.age = 0
+        self.probes = self.hits = self.cutoffs = self.stores = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.keys) * ENTRY_SIZE
+
+    def clear(self):
+        size = len(self.keys)
+        self.keys = array('Q', bytes(8 * size))
+        self.data = array('I', bytes(4 * size))
+        self.scores = array('d', bytes(8 * size))
+        self.age = 0
+
+    def new_search(self):
+        """Começa uma busca: entradas das buscas anteriores passam a ser substituíveis"""
+        self.age = (self.age + 1) & _AGE_MASK
+        self.probes = self.hits = self.cutoffs = self.stores = 0
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, float]]:
+        self.probes += 1
+        index = (key & self.mask) << 1
+        keys = self.keys
+        if keys[index] != key:
+            index += 1
+            if keys[index] != key:
+                return None
+        self.hits += 1
+        data = self.data[index]
+        return data & 0xFFFF, data >> 16 & 0xFF, data >> 24 & 3, self.scores[index]
+
+    def store(self, key: int, depth: int, bound: int, score: float, move: int):
+        self.stores += 1
+        index = (key & self.mask) << 1
+        keys = self.keys
+        data = self.data
+        old = data[index]
+        if keys[index] == key:
+            # Mesma posição: sem lance novo, mantém o lance que já estava
+            if not move:
+                move = old & 0xFFFF
+        elif depth < (old >> 16 & 0xFF) and old >> 26 == self.age:
+            index += 1
+            if not move and keys[index] == key:
+                move = data[index] & 0xFFFF
+        keys[index] = key
+        data[index] = move | depth << 16 | bound << 24 | self.age << 26
+        self.scores[index] = score
+
+    def fill(self) -> float:
+        """Fração das entradas ocupadas"""
+        return sum(1 for key in self.keys if key) / len(self.keys)
+
+    def stats(self) -> dict:
+        """Acertos e cortes da busca atual (zerados em new_search)"""
+        return {
+            'probes': self.probes,
+            'hits': self.hits,
+            'cutoffs': self.cutoffs,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'cutoff_rate': self.cutoffs / self.probes if self.probes else 0.0,
+        }